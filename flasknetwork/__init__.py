@@ -3,14 +3,12 @@ import os
 from flask import Flask
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from flask_mail import Mail
 from flasknetwork.config import Config
 
 
 db = SQLAlchemy()
-bcrypt = Bcrypt()
 login_manager = LoginManager()
 login_manager.login_view = 'users.login'
 login_manager.login_message_category = 'info'
@@ -23,7 +21,6 @@ def create_app(config_class=Config):
     app.config.from_object(Config)
 
     db.init_app(app)
-    bcrypt.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
     migrate.init_app(app, db)
@@ -39,4 +36,34 @@ def create_app(config_class=Config):
     app.register_blueprint(courses, url_prefix='/courses')
     app.register_blueprint(errors)
 
+    from flasknetwork.main.fragments import post_card_cache
+    post_card_cache.init_app(app)
+
+    from flasknetwork.users.loader import user_cache
+    user_cache.init_app(app)
+
+    from flasknetwork.users.hashing import password_hasher
+    password_hasher.init_app(app)
+
+    from flasknetwork.outbox import outbox_sender
+    outbox_sender.init_app(app)
+
+    from flasknetwork.assets import static_assets
+    static_assets.init_app(app)
+
+    from flasknetwork.images import image_variants
+    image_variants.init_app(app)
+
+    from flasknetwork.users.avatars import avatar_registry
+    avatar_registry.init_app(app)
+
+    from flasknetwork.sqlstats import sql_stats
+    sql_stats.init_app(app)
+
+    from flasknetwork.timing import request_timing
+    request_timing.init_app(app)
+
+    from flasknetwork.metrics import metrics
+    metrics.init_app(app)
+
     return app
\ No newline at end of file
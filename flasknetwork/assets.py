@@ -0,0 +1,219 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli variants are optional; gzip is always built
+    brotli = None
+
+
+# Output directory (inside the static folder) and manifest written by scripts/build_assets.py
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Text formats worth precompressing; images are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.ico'}
+
+# Precompressed variants in order of preference, as (Content-Encoding, file suffix)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def _fingerprinted_name(path, digest):
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+def _rewrite_css_urls(css, css_path, hashed):
+    """Point relative url() references in a stylesheet at the fingerprinted files."""
+    base = posixpath.dirname(css_path)
+
+    def replace(match):
+        quote, target = match.groups()
+        if target.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        clean = target.split('?', 1)[0].split('#', 1)[0]
+        resolved = posixpath.normpath(posixpath.join(base, clean))
+        if resolved not in hashed:
+            return match.group(0)
+        relative = posixpath.relpath(hashed[resolved], base)
+        return f"url({quote}{relative}{target[len(clean):]}{quote})"
+
+    return _CSS_URL.sub(replace, css)
+
+
+def build_assets(static_folder, use_brotli=True, log=print):
+    """
+    Fingerprint every file under static_folder into static_folder/dist and precompress text assets.
+
+    Each file is copied to dist/<dir>/<name>.<hash><ext> (hash of its content, so a changed file
+    gets a new URL) together with .gz and, if the brotli package is installed, .br variants when
+    they are smaller. Stylesheets are hashed after the files they reference, with their relative
+    url()s rewritten. The mapping is written to dist/manifest.json; files from previous builds
+    that are no longer referenced are removed.
+
+    Args:
+        static_folder (str): The Flask static folder
+        use_brotli (bool): Write .br variants (requires the brotli package)
+        log (callable): Progress output
+
+    Returns:
+        dict: The manifest, {source path: {'path': fingerprinted path, 'encodings': [...]}}
+    """
+    dist_root = os.path.join(static_folder, DIST_DIR)
+    use_brotli = use_brotli and brotli is not None
+
+    sources = []
+    for directory, subdirs, files in os.walk(static_folder):
+        if os.path.abspath(directory) == os.path.abspath(static_folder):
+            subdirs[:] = [d for d in subdirs if d != DIST_DIR]
+        for filename in files:
+            # Build manifests (e.g. static/variants/manifest.json) are read from disk, not served
+            if filename.startswith('.') or filename.endswith('.bak') or filename == MANIFEST_NAME:
+                continue
+            full_path = os.path.join(directory, filename)
+            sources.append(os.path.relpath(full_path, static_folder).replace(os.sep, '/'))
+
+    # Stylesheets last, so the files they reference already have their hashed names
+    sources.sort(key=lambda path: (path.endswith('.css'), path))
+
+    manifest = {}
+    hashed = {}
+    written = set()
+    raw_total = sent_total = 0
+    for source in sources:
+        with open(os.path.join(static_folder, source), 'rb') as f:
+            content = f.read()
+        if source.endswith('.css'):
+            content = _rewrite_css_urls(content.decode('utf-8'), source, hashed).encode('utf-8')
+
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        target = _fingerprinted_name(source, digest)
+        hashed[source] = target
+
+        target_path = os.path.join(dist_root, target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        if not os.path.exists(target_path):
+            with open(target_path, 'wb') as f:
+                f.write(content)
+        written.add(target)
+
+        encodings = []
+        best = len(content)
+        if os.path.splitext(source)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            variants = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+            if use_brotli:
+                variants['br'] = lambda data: brotli.compress(data, quality=11)
+            for encoding, suffix in ENCODINGS:
+                if encoding not in variants:
+                    continue
+                compressed = variants[encoding](content)
+                if len(compressed) >= len(content):
+                    continue
+                with open(target_path + suffix, 'wb') as f:
+                    f.write(compressed)
+                written.add(target + suffix)
+                encodings.append(encoding)
+                best = min(best, len(compressed))
+
+        manifest[source] = {'path': f"{DIST_DIR}/{target}", 'encodings': encodings}
+        raw_total += len(content)
+        sent_total += best
+        log(f" {source} -> {target} ({len(content)} B"
+            + (f", {' '.join(encodings)} {best} B" if encodings else '') + ")")
+
+    # Drop outputs of earlier builds
+    for directory, _, files in os.walk(dist_root):
+        for filename in files:
+            relative = os.path.relpath(os.path.join(directory, filename), dist_root).replace(os.sep, '/')
+            if relative != MANIFEST_NAME and relative not in written:
+                os.remove(os.path.join(directory, filename))
+
+    with open(os.path.join(dist_root, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    log(f"{len(manifest)} assets, {raw_total} B -> {sent_total} B over the wire with compression")
+    return manifest
+
+
+def clean_assets(static_folder):
+    """Remove the build output, so the app serves the unhashed files again."""
+    shutil.rmtree(os.path.join(static_folder, DIST_DIR), ignore_errors=True)
+
+
+class StaticAssets:
+    """
+    Serves the output of build_assets().
+
+    url_for('static', filename=...) emits the fingerprinted path of any file listed in the
+    manifest; files without an entry (or all files, if no build exists) keep their plain URL.
+    Fingerprinted files never change, so they are sent with a one-year immutable Cache-Control
+    and, when the client accepts it, as the precompressed brotli or gzip variant.
+
+    The manifest is read once at startup: rebuild the assets and restart after changing them.
+    Set STATIC_FINGERPRINT=false to ignore an existing build (e.g. while editing CSS).
+    """
+
+    def __init__(self):
+        self.manifest = {}
+        self.immutable = {}
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.manifest = {}
+        self.immutable = {}
+        if app.config.get('STATIC_FINGERPRINT', True):
+            self.load_manifest(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME), app.logger)
+
+        app.url_defaults(self._fingerprint_url)
+        app.view_functions['static'] = self.send_static_file
+
+    def load_manifest(self, path, logger):
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            logger.info("No static asset manifest, serving unfingerprinted files "
+                        "(run scripts/build_assets.py)")
+            return
+        self.manifest = {source: entry['path'] for source, entry in manifest.items()}
+        self.immutable = {entry['path']: entry['encodings'] for entry in manifest.values()}
+        logger.info(f"Loaded static asset manifest: {len(self.manifest)} fingerprinted files")
+
+    def _fingerprint_url(self, endpoint, values):
+        if endpoint == 'static':
+            hashed = self.manifest.get(values.get('filename'))
+            if hashed:
+                values['filename'] = hashed
+
+    def send_static_file(self, filename):
+        encodings = self.immutable.get(filename)
+        if encodings is None:
+            return current_app.send_static_file(filename)
+
+        accepted = request.accept_encodings
+        encoding, suffix = next(((name, suffix) for name, suffix in ENCODINGS
+                                 if name in encodings and accepted[name]), (None, ''))
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(self.static_folder, filename + suffix, mimetype=mimetype,
+                                       max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+static_assets = StaticAssets()
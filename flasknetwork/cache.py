@@ -0,0 +1,187 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for one cache."""
+
+    # Called as observer(name, hit) on every lookup of a named cache (set by flasknetwork/metrics.py)
+    observer = None
+
+    def __init__(self, name=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if self.name and CacheStats.observer is not None:
+            CacheStats.observer(self.name, hit)
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_ratio': round(self.hit_ratio, 4)}
+
+
+class CacheBackend:
+    """
+    Interface of the key/value stores behind the application caches.
+    Values must be picklable for shared backends.
+    """
+
+    name = 'none'
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired."""
+        return None
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, expiring after ttl seconds (None = default_ttl / never)."""
+
+    def delete(self, key):
+        """Remove one key."""
+
+    def delete_prefix(self, prefix):
+        """Remove every key starting with prefix."""
+
+    def clear(self):
+        """Remove everything."""
+
+    def __len__(self):
+        return 0
+
+
+class NullCache(CacheBackend):
+    """Backend that stores nothing, for disabling a cache via config."""
+
+
+class LRUCache(CacheBackend):
+    """
+    Bounded, thread-safe in-process cache with least-recently-used eviction
+    and optional per-entry expiry.
+    """
+
+    name = 'lru'
+
+    def __init__(self, max_entries=1000, default_ttl=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache(CacheBackend):
+    """
+    Shared cache in Redis, so all gunicorn workers (and instances) see the same entries.
+    Requires the optional `redis` package.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, namespace, default_ttl=None):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis cache backend requires the 'redis' package (pip install redis)")
+        self._client = redis.Redis.from_url(url)
+        self.namespace = namespace + ':'
+        self.default_ttl = default_ttl
+
+    def get(self, key):
+        raw = self._client.get(self.namespace + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        self._client.set(self.namespace + key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self._client.delete(self.namespace + key)
+
+    def delete_prefix(self, prefix):
+        keys = list(self._client.scan_iter(match=self.namespace + prefix + '*', count=500))
+        if keys:
+            self._client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix('')
+
+    def __len__(self):
+        return sum(1 for _ in self._client.scan_iter(match=self.namespace + '*', count=500))
+
+
+def create_cache_backend(kind, namespace, max_entries=1000, default_ttl=None, redis_url=None):
+    """
+    Build a cache backend from configuration values.
+
+    Args:
+        kind (str): 'lru' (in-process, default), 'redis' (shared) or 'none'
+        namespace (str): Key prefix separating this cache from others in a shared store
+        max_entries (int): Capacity of the in-process LRU
+        default_ttl (float|None): Seconds until entries expire (None = never)
+        redis_url (str|None): Connection URL for the redis backend
+
+    Returns:
+        CacheBackend: The configured backend
+
+    Raises:
+        ValueError: If kind is unknown or redis is selected without a URL
+    """
+    kind = (kind or 'lru').lower()
+    if kind == 'lru':
+        return LRUCache(max_entries=max_entries, default_ttl=default_ttl)
+    if kind == 'redis':
+        if not redis_url:
+            raise ValueError("CACHE_REDIS_URL must be set to use the redis cache backend")
+        return RedisCache(redis_url, namespace, default_ttl=default_ttl)
+    if kind == 'none':
+        return NullCache()
+    raise ValueError(f"Unknown cache backend '{kind}' (expected lru, redis or none)")
@@ -1,5 +1,35 @@
 import os
 
+
+def engine_options(database_uri):
+    """
+    SQLAlchemy engine/pool settings from the environment.
+
+    Each worker process has its own pool, so the database sees up to
+    workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections; keep that below its limit.
+    gunicorn.conf.py sizes DB_POOL_SIZE to the worker's concurrency when it isn't set.
+    SQLite (dev) keeps Flask-SQLAlchemy's defaults.
+    """
+    if not database_uri or database_uri.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+        # Seconds a request waits for a free connection before failing
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        # Replace connections the server or a proxy closed while they sat idle in the pool
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    if database_uri.startswith('postgresql'):
+        # Abort runaway queries before gunicorn's worker timeout kills the whole worker
+        options['connect_args'] = {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            'options': f"-c statement_timeout={int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))}",
+        }
+    return options
+
+
 class Config:
     SECRET_KEY = os.environ.get('FLASK_SECRET_KEY')
     
@@ -8,9 +38,89 @@ class Config:
     # Render uses postgres:// but SQLAlchemy requires postgresql://
     if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql://', 1)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     
-    MAIL_SERVER = 'smtp.googlemail.com'
-    MAIL_PORT = 587
-    MAIL_USE_TLS = True
+    # Break ties between equally relevant course search results by review count
+    COURSE_SEARCH_WEIGHT_BY_REVIEWS = os.environ.get('COURSE_SEARCH_WEIGHT_BY_REVIEWS', 'true').lower() == 'true'
+    # Seconds between checks of the catalog version / review counts by the in-memory course index
+    COURSE_CATALOG_CHECK_INTERVAL = int(os.environ.get('COURSE_CATALOG_CHECK_INTERVAL', 30))
+    # Seconds between checks of the tag version by the in-memory tag registry
+    TAG_REGISTRY_CHECK_INTERVAL = int(os.environ.get('TAG_REGISTRY_CHECK_INTERVAL', 30))
+
+    # Rendered post card cache: 'lru' (per process), 'redis' (shared, needs CACHE_REDIS_URL) or 'none'
+    POST_CARD_CACHE_BACKEND = os.environ.get('POST_CARD_CACHE_BACKEND', 'lru')
+    POST_CARD_CACHE_SIZE = int(os.environ.get('POST_CARD_CACHE_SIZE', 2000))
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    # Flask-Login user loader cache: 'lru' (per process), 'redis' (shared invalidation) or 'none'
+    USER_CACHE_BACKEND = os.environ.get('USER_CACHE_BACKEND', 'lru')
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 5000))
+    # Seconds a cached user is trusted; bounds staleness across workers with the 'lru' backend
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Serve fingerprinted, precompressed static files when a build exists (scripts/build_assets.py)
+    STATIC_FINGERPRINT = os.environ.get('STATIC_FINGERPRINT', 'true').lower() == 'true'
+
+    # Seconds between checks of the image manifest for new or removed profile pictures
+    AVATAR_MANIFEST_CHECK_INTERVAL = int(os.environ.get('AVATAR_MANIFEST_CHECK_INTERVAL', 60))
+
+    # bcrypt work factor for new password hashes; older hashes are upgraded on login
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Password hashing executor: 'thread' or 'process', with at most PASSWORD_HASH_WORKERS
+    # concurrent hashes per process and PASSWORD_HASH_QUEUE more waiting. Off (0 = inline) by
+    # default: it only keeps pages responsive on gthread/gevent workers, not the sync default
+    PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 8))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Deployed release, part of every ETag so a deploy never revalidates pages rendered by old templates
+    RELEASE = os.environ.get('RELEASE') or os.environ.get('RENDER_GIT_COMMIT')
+    # Seconds browsers and proxies may reuse a course search API response without revalidating
+    COURSE_SEARCH_MAX_AGE = int(os.environ.get('COURSE_SEARCH_MAX_AGE', 30))
+
+    # Token required by internal monitoring endpoints (disabled when unset)
+    STATS_TOKEN = os.environ.get('STATS_TOKEN')
+
+    # Per-request SQL statement counts and timings per endpoint (see flasknetwork/sqlstats.py)
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', 'true').lower() == 'true'
+    # Log statements run this many times in one request with different parameters (likely N+1)
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+    # Statement budgets, e.g. 'courses.course_detail=10,posts.new_post=15'; requests over budget
+    # are logged, or fail with SQL_STRICT (tests, load tests)
+    SQL_QUERY_BUDGETS = os.environ.get('SQL_QUERY_BUDGETS', '')
+    SQL_DEFAULT_QUERY_BUDGET = int(os.environ['SQL_DEFAULT_QUERY_BUDGET']) if os.environ.get('SQL_DEFAULT_QUERY_BUDGET') else None
+    SQL_STRICT = os.environ.get('SQL_STRICT', 'false').lower() == 'true'
+
+    # Server-Timing header with db/render/app/total durations on every response (see
+    # flasknetwork/timing.py); off by default, requests carrying the STATS_TOKEN always get it
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'false').lower() == 'true'
+    # Sampling profiler: a fraction of requests from their start, plus any request still running
+    # after PROFILE_SLOW_MS (0 = off), or one sent with 'X-Profile-Token: <STATS_TOKEN>'
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_SLOW_MS = int(os.environ.get('PROFILE_SLOW_MS', 0))
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+    # Collapsed-stack profiles are kept in PROFILE_DIR (default: a temp dir), newest PROFILE_KEEP only
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 100))
+    # Prometheus metrics on /metrics (needs prometheus-client and STATS_TOKEN; see flasknetwork/metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.googlemail.com')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
     MAIL_USERNAME = os.environ.get('FLASK_EMAIL_USER')
-    MAIL_PASSWORD = os.environ.get('FLASK_EMAIL_PASS')
\ No newline at end of file
+    MAIL_PASSWORD = os.environ.get('FLASK_EMAIL_PASS')
+
+    # Email outbox: 'thread' sends from a background thread in each web process,
+    # 'external' leaves delivery to scripts/outbox.py run
+    OUTBOX_SENDER = os.environ.get('OUTBOX_SENDER', 'thread')
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 20))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 5))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+    OUTBOX_RETRY_BASE = float(os.environ.get('OUTBOX_RETRY_BASE', 30))
+    OUTBOX_RETRY_MAX = float(os.environ.get('OUTBOX_RETRY_MAX', 3600))
+    # Seconds a claimed email stays hidden from other senders (resent if the sender dies)
+    OUTBOX_LEASE = int(os.environ.get('OUTBOX_LEASE', 300))
+    # Close the reused SMTP connection after this many idle seconds
+    OUTBOX_SMTP_IDLE_TIMEOUT = float(os.environ.get('OUTBOX_SMTP_IDLE_TIMEOUT', 30))
@@ -0,0 +1,245 @@
+import copy
+import heapq
+import threading
+import time
+from collections import defaultdict, Counter
+from flask import current_app
+from sqlalchemy import func
+from flasknetwork import db
+from flasknetwork.models import Course, CourseStats, CacheVersion
+from flasknetwork.courses.search import EXACT_CODE, CODE_PREFIX, NAME_PREFIX, FUZZY
+
+
+# Bumped by anything that adds, renames or removes courses (see courses/ingest.py)
+CATALOG_VERSION = 'catalog'
+
+# Minimum trigram similarity for typo-tolerant name matches (same default as pg_trgm)
+SIMILARITY_THRESHOLD = 0.3
+
+
+def _ngrams(text, n):
+    """Return the set of character n-grams of text."""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class CatalogEntry:
+    """One course in the in-memory catalog."""
+
+    __slots__ = ('id', 'code', 'name', 'code_lower', 'name_lower', 'name_trigrams', 'review_count')
+
+    def __init__(self, id, code, name, review_count):
+        self.id = id
+        self.code = code
+        self.name = name
+        self.code_lower = code.lower()
+        self.name_lower = name.lower()
+        self.name_trigrams = len(_ngrams(self.name_lower, 3))
+        self.review_count = review_count
+
+    def with_review_count(self, review_count):
+        """A copy of this entry with another review count."""
+        entry = copy.copy(self)
+        entry.review_count = review_count
+        return entry
+
+    def to_dict(self):
+        """Same shape as Course.to_dict() so the search API contract is unchanged."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'code': self.code,
+            'review_count': self.review_count
+        }
+
+
+class CourseCatalogIndex:
+    """
+    Immutable n-gram index over course codes and names, built from one snapshot of the catalog.
+
+    Bigram and trigram posting lists narrow a query down to candidate courses without a scan;
+    candidates are then ranked with the same tiers as the SQL search backends:
+    exact code, code prefix, name/word prefix, then fuzzy (substring or trigram-similar) matches.
+    """
+
+    def __init__(self, entries, version):
+        self.version = version
+        # Sorted by name so browse pages match Course.get_all()
+        self.entries = sorted(entries, key=lambda e: e.name)
+        self.by_id = {entry.id: entry for entry in self.entries}
+
+        self._code_grams = {2: defaultdict(list), 3: defaultdict(list)}
+        self._name_grams = {2: defaultdict(list), 3: defaultdict(list)}
+        for position, entry in enumerate(self.entries):
+            for n in (2, 3):
+                for gram in _ngrams(entry.code_lower, n):
+                    self._code_grams[n][gram].append(position)
+                for gram in _ngrams(entry.name_lower, n):
+                    self._name_grams[n][gram].append(position)
+        self._update_etag()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def with_review_counts(self, counts):
+        """
+        A new index with the review counts of a {course_id: count} mapping; this one is left
+        untouched for the requests still searching it. Codes and names are unchanged, so the
+        n-gram posting lists (positions in the name-sorted entries) are shared, not rebuilt.
+        """
+        index = copy.copy(self)
+        index.entries = [entry.with_review_count(counts.get(entry.id, 0)) for entry in self.entries]
+        index.by_id = {entry.id: entry for entry in index.entries}
+        index._update_etag()
+        return index
+
+    def _update_etag(self):
+        # Identifies the data search results are built from: the catalog version plus the
+        # review counts. Hashing a tuple of ints is deterministic, so workers that loaded
+        # the same snapshot agree on it.
+        counts = hash(tuple(entry.review_count for entry in self.entries)) & 0xFFFFFFFFFFFF
+        self.etag = f"{self.version}.{counts:x}"
+
+    def search(self, query, limit, weight_by_reviews=True):
+        """
+        Search courses by code or name.
+
+        Args:
+            query (str): Sanitized search term (at least 2 characters)
+            limit (int): Maximum number of results to return
+            weight_by_reviews (bool): Break ties by review count
+
+        Returns:
+            list: Course dictionaries in ranked order
+        """
+        term = query.lower()
+        n = 3 if len(term) >= 3 else 2
+        grams = _ngrams(term, n)
+
+        code_hits = Counter()
+        name_hits = Counter()
+        for gram in grams:
+            code_hits.update(self._code_grams[n].get(gram, ()))
+            name_hits.update(self._name_grams[n].get(gram, ()))
+
+        ranked = []
+        for position in set(code_hits) | set(name_hits):
+            entry = self.entries[position]
+
+            # Substring matches need every n-gram of the term, so only those are verified
+            substring = (
+                (code_hits[position] == len(grams) and term in entry.code_lower) or
+                (name_hits[position] == len(grams) and term in entry.name_lower)
+            )
+            similarity = 0.0
+            if n == 3:
+                shared = name_hits[position]
+                similarity = shared / (len(grams) + entry.name_trigrams - shared)
+            if not substring and similarity < SIMILARITY_THRESHOLD:
+                continue
+
+            if entry.code_lower == term:
+                tier = EXACT_CODE
+            elif entry.code_lower.startswith(term):
+                tier = CODE_PREFIX
+            elif entry.name_lower.startswith(term) or (' ' + term) in entry.name_lower:
+                tier = NAME_PREFIX
+            else:
+                tier = FUZZY
+
+            ranked.append((
+                tier,
+                -similarity if tier == FUZZY else 0,
+                -entry.review_count if weight_by_reviews else 0,
+                entry.name,
+                position,
+            ))
+
+        return [self.entries[key[-1]].to_dict() for key in heapq.nsmallest(limit, ranked)]
+
+    def browse(self, limit, offset):
+        """
+        Page through all courses ordered by name, like Course.get_all().
+
+        Returns:
+            tuple: (list of course dictionaries, has_more boolean)
+        """
+        page = self.entries[offset:offset + limit]
+        return [entry.to_dict() for entry in page], offset + limit < len(self.entries)
+
+
+class CourseCatalog:
+    """
+    Per-process holder of the current CourseCatalogIndex.
+
+    The index is built on first use and then served without touching the database.
+    At most every COURSE_CATALOG_CHECK_INTERVAL seconds one request re-reads the catalog
+    version (rebuilding the index if it moved) and the review counts; other requests keep
+    using the current index meanwhile, so no request ever waits on a refresh.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_index(self):
+        """Return the current index, building or refreshing it when due."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._build()
+                    self._checked_at = time.monotonic()
+            return self._index
+
+        interval = current_app.config.get('COURSE_CATALOG_CHECK_INTERVAL', 30)
+        if time.monotonic() - self._checked_at >= interval and self._lock.acquire(blocking=False):
+            try:
+                self._refresh()
+            finally:
+                self._lock.release()
+        return self._index
+
+    def invalidate(self):
+        """Force a version check on the next lookup (e.g. after this process changed the catalog)."""
+        self._checked_at = 0.0
+
+    def etag(self):
+        """Version marker of the data served by search() and browse()."""
+        return self.get_index().etag
+
+    def search(self, query, limit):
+        """Ranked search, see CourseCatalogIndex.search()."""
+        weight = current_app.config.get('COURSE_SEARCH_WEIGHT_BY_REVIEWS', True)
+        return self.get_index().search(query, limit, weight_by_reviews=weight)
+
+    def browse(self, limit, offset):
+        """Name-ordered browse page, see CourseCatalogIndex.browse()."""
+        return self.get_index().browse(limit, offset)
+
+    def _refresh(self):
+        self._checked_at = time.monotonic()
+        version = CacheVersion.get(CATALOG_VERSION)
+        if version != self._index.version:
+            self._index = self._build(version)
+        else:
+            # Swapped in whole, like a rebuild, so a search never sees half-updated counts
+            self._index = self._index.with_review_counts(self._load_review_counts())
+
+    @staticmethod
+    def _load_review_counts():
+        return dict(db.session.query(CourseStats.course_id, CourseStats.review_count).all())
+
+    @staticmethod
+    def _build(version=None):
+        if version is None:
+            version = CacheVersion.get(CATALOG_VERSION)
+        rows = db.session.query(
+            Course.id, Course.code, Course.name,
+            func.coalesce(CourseStats.review_count, 0)
+        ).outerjoin(CourseStats, Course.id == CourseStats.course_id).all()
+        index = CourseCatalogIndex([CatalogEntry(*row) for row in rows], version)
+        current_app.logger.info(f"Built course catalog index: {len(index)} courses, version {version}")
+        return index
+
+
+course_catalog = CourseCatalog()
@@ -0,0 +1,144 @@
+import re
+from collections import namedtuple
+from sqlalchemy.dialects import postgresql, sqlite
+from flasknetwork import db
+from flasknetwork.models import Course, Course_Program, Program, CacheVersion
+from flasknetwork.courses.catalog import CATALOG_VERSION
+
+COURSE_NAME_LENGTH = Course.__table__.c.name.type.length
+
+ProgrammePage = namedtuple('ProgrammePage', 'source code name program_type courses')
+ProgrammeDiff = namedtuple('ProgrammeDiff', 'code new_program new_courses renamed_courses new_links unlisted_links')
+
+
+def parse_programme_page(source, html):
+    """
+    Extract the programme and its course list from a saved KTH programme page
+    (e.g. https://www.kth.se/student/kurser/program/CDATE/20252/arskurs1?l=en).
+
+    Returns:
+        ProgrammePage: courses is a list of (code, name) in page order, without duplicates
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    title = (soup.title.string or '').strip() if soup.title else ''
+
+    # The programme code is the last "(CODE)" in the title
+    codes = re.findall(r"\(([A-Z0-9]+)\)", title)
+    code = codes[-1] if codes else None
+    name = None
+    program_type = None
+    if code:
+        # The last clause before "(CODE)" names the programme, minus a "... Programme in" prefix
+        raw_name = title.split(f"({code})", 1)[0].rsplit(',', 1)[-1].strip()
+        name = re.sub(r"^(?:.*Programme(?:\s+in)?\s+)", '', raw_name, flags=re.IGNORECASE).strip()
+        if re.search(r"master", title, re.IGNORECASE):
+            program_type = 'master'
+        elif re.search(r"bachelor|degree programme", title, re.IGNORECASE):
+            program_type = 'bachelor'
+
+    courses = {}
+    for row in soup.find_all('tr'):
+        cols = row.find_all('td')
+        if not cols:
+            continue
+        parts = cols[0].get_text(strip=True).split(' ', 1)
+        if len(parts) == 2 and parts[0] not in courses:
+            courses[parts[0]] = parts[1][:COURSE_NAME_LENGTH]
+    return ProgrammePage(source, code, name, program_type, list(courses.items()))
+
+
+def parse_programme_file(path):
+    """parse_programme_page for a file on disk (picklable, for process pools)."""
+    with open(path, encoding='utf-8') as f:
+        return parse_programme_page(path, f.read())
+
+
+def _insert(model):
+    """INSERT supporting ON CONFLICT for the current database."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise RuntimeError(f"Catalog ingestion needs ON CONFLICT support (PostgreSQL or SQLite), not {dialect}")
+
+
+def diff_programme(page, update_names=False):
+    """
+    Compare a parsed page with the database (three queries, no writes).
+    Links the page no longer lists are reported but never removed, since reviews may point at them.
+    """
+    program = Program.query.filter_by(code=page.code).first()
+    existing = dict(db.session.query(Course.code, Course.name)
+                    .filter(Course.code.in_([code for code, _ in page.courses])))
+    linked = set()
+    if program is not None:
+        linked = {code for (code,) in db.session.query(Course.code)
+                  .join(Course_Program, Course_Program.course_id == Course.id)
+                  .filter(Course_Program.program_id == program.id)}
+
+    page_codes = [code for code, _ in page.courses]
+    return ProgrammeDiff(
+        code=page.code,
+        new_program=program is None,
+        new_courses=[(code, name) for code, name in page.courses if code not in existing],
+        renamed_courses=[(code, existing[code], name) for code, name in page.courses
+                         if update_names and code in existing and existing[code] != name],
+        new_links=[code for code in page_codes if code not in linked],
+        unlisted_links=sorted(linked - set(page_codes)),
+    )
+
+
+def ingest_programme(page, program_type=None, update_names=False, dry_run=False):
+    """
+    Upsert a parsed programme, its courses and course-program links in one transaction,
+    with a fixed number of statements however many courses the page lists. Safe to rerun:
+    existing rows are left alone (course names are updated only with update_names).
+
+    Returns:
+        ProgrammeDiff: What changed (or, with dry_run, what would change)
+    """
+    if not page.code:
+        raise ValueError("no programme code found in the page title")
+    program_type = page.program_type or program_type
+    diff = diff_programme(page, update_names)
+    if dry_run:
+        db.session.rollback()
+        return diff
+    if diff.new_program and program_type not in ('bachelor', 'master'):
+        raise ValueError(f"can't tell whether {page.code} is a bachelor or master programme "
+                         "(pass --program-type)")
+
+    try:
+        db.session.execute(
+            _insert(Program).values(code=page.code, name=page.name or page.code, program_type=program_type)
+            .on_conflict_do_nothing(index_elements=['code']))
+        program_id = db.session.query(Program.id).filter_by(code=page.code).scalar()
+
+        if page.courses:
+            statement = _insert(Course).values([{'code': code, 'name': name} for code, name in page.courses])
+            if update_names:
+                statement = statement.on_conflict_do_update(
+                    index_elements=['code'], set_={'name': statement.excluded.name},
+                    where=Course.name != statement.excluded.name)
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=['code'])
+            db.session.execute(statement)
+
+            course_ids = db.session.query(Course.id).filter(Course.code.in_([code for code, _ in page.courses]))
+            db.session.execute(
+                _insert(Course_Program).from_select(
+                    ['course_id', 'program_id'],
+                    course_ids.add_columns(db.literal(program_id)).statement)
+                .on_conflict_do_nothing(index_elements=['course_id', 'program_id']))
+
+        if diff.new_courses or diff.renamed_courses or diff.new_links:
+            # Workers rebuild their in-memory course index and per-program course lists
+            CacheVersion.bump(CATALOG_VERSION)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return diff
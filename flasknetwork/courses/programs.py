@@ -0,0 +1,102 @@
+import threading
+from markupsafe import Markup, escape
+from flasknetwork import db
+from flasknetwork.cache import CacheStats
+from flasknetwork.models import Course, Course_Program
+from flasknetwork.courses.catalog import course_catalog
+
+
+class ProgramCourses:
+    """
+    The courses offered in one program, sorted by name, with their <option> tags rendered once.
+    Immutable; replaced as a whole when the catalog version moves.
+    """
+
+    def __init__(self, program_id, version, rows):
+        self.program_id = program_id
+        self.version = version
+        self.choices = [(course_id, f"{name} ({code})") for course_id, code, name in rows]
+        self.ids = frozenset(course_id for course_id, _ in self.choices)
+        self._labels = dict(self.choices)
+        self._options = {
+            course_id: f'<option value="{course_id}">{escape(label)}</option>'
+            for course_id, label in self.choices
+        }
+        self._block = ''.join(self._options[course_id] for course_id, _ in self.choices)
+
+    def __len__(self):
+        return len(self.choices)
+
+    def partition(self, reviewed_ids):
+        """Split the choices into (not yet reviewed, already reviewed) for one user."""
+        if not reviewed_ids & self.ids:
+            return self.choices, []
+        unreviewed, reviewed = [], []
+        for choice in self.choices:
+            (reviewed if choice[0] in reviewed_ids else unreviewed).append(choice)
+        return unreviewed, reviewed
+
+    def render_options(self, groups, selected=None):
+        """
+        Render [(group label, choices)] as optgroups from the pre-rendered options, marking
+        the option of course id `selected`. The common case, a user who reviewed none of the
+        program's courses and has no course selected, reuses one block.
+        """
+        html = []
+        for label, choices in groups:
+            if not choices:
+                continue
+            if len(choices) == len(self.choices) and selected not in self.ids:
+                options = self._block
+            else:
+                options = ''.join(self._render_option(course_id, selected) for course_id, _ in choices)
+            html.append(f'<optgroup label="{escape(label)}">{options}</optgroup>')
+        return Markup(''.join(html))
+
+    def _render_option(self, course_id, selected):
+        if course_id != selected:
+            return self._options[course_id]
+        return f'<option value="{course_id}" selected>{escape(self._labels[course_id])}</option>'
+
+
+class ProgramCourseCache:
+    """
+    Per-process cache of ProgramCourses, so the review form doesn't query and render
+    every course of the user's program on each request.
+
+    Entries are tied to the version of the in-memory course catalog (courses/catalog.py),
+    which follows CATALOG_VERSION: catalog ingestion bumps it when courses or links change,
+    and each program is reloaded with a single query on its next use.
+    """
+
+    def __init__(self):
+        self.stats = CacheStats('program_courses')
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, program_id):
+        """Return the ProgramCourses of program_id (empty if it offers no courses)."""
+        version = course_catalog.get_index().version
+        entry = self._entries.get(program_id)
+        self.stats.record(entry is not None and entry.version == version)
+        if entry is None or entry.version != version:
+            rows = db.session.query(Course.id, Course.code, Course.name)\
+                .join(Course_Program, Course_Program.course_id == Course.id)\
+                .filter(Course_Program.program_id == program_id)\
+                .order_by(Course.name, Course.code).all()
+            entry = ProgramCourses(program_id, version, rows)
+            with self._lock:
+                self._entries[program_id] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def report(self):
+        report = self.stats.to_dict()
+        report['programs'] = len(self._entries)
+        return report
+
+
+program_courses = ProgramCourseCache()
@@ -1,7 +1,10 @@
 from flask import Blueprint, render_template, request, jsonify, current_app
-from flasknetwork.models import Course, Post
+from flasknetwork import db
+from flasknetwork.models import Course, Post, CourseStats, CourseTagStats
 from sqlalchemy.exc import SQLAlchemyError
 from flask_login import current_user
+from flasknetwork.courses.catalog import course_catalog
+from flasknetwork.main.conditional import ConditionalGet
 
 courses = Blueprint('courses', __name__)
 
@@ -34,10 +37,10 @@ class CourseSearchService:
                 except (ValueError, TypeError):
                     return False, "Invalid limit parameter", 400
             
-            courses = Course.search(query_param, limit)
+            query = Course.sanitize_search_query(query_param)
             
-            # Convert to dictionary format for JSON response
-            courses_data = [course.to_dict() for course in courses]
+            # Answered from the in-memory catalog index, already in JSON-ready format
+            courses_data = course_catalog.search(query, limit)
             
             return True, courses_data, 200
             
@@ -79,7 +82,9 @@ def api_search():
         offset (int): Number of results to skip for pagination (optional, default 0)
         
     Returns:
-        JSON response with courses data and has_more flag
+        JSON response with courses data and has_more flag.
+        Responses are the same for every user and carry an ETag derived from the
+        catalog index, so revalidations are answered with 304 without searching.
     """
     query = request.args.get('q', '').strip()
     limit = request.args.get('limit', 20, type=int)
@@ -90,17 +95,23 @@ def api_search():
     offset = max(0, offset)
     
     try:
+        max_age = current_app.config.get('COURSE_SEARCH_MAX_AGE', 30)
+        conditional = ConditionalGet('course-search', course_catalog.etag(), query, limit, offset,
+                                     cache_control=f'public, max-age={max_age}', per_user=False)
+        not_modified = conditional.not_modified()
+        if not_modified:
+            return not_modified
+
         if not query:
             # Browse mode: return all courses with pagination
-            courses_list, has_more = Course.get_all(limit=limit, offset=offset)
-            courses_data = [course.to_dict() for course in courses_list]
-            return jsonify({'courses': courses_data, 'has_more': has_more}), 200
+            courses_data, has_more = course_catalog.browse(limit=limit, offset=offset)
+            return conditional.apply(jsonify({'courses': courses_data, 'has_more': has_more}))
         
         # Search mode: use existing search logic
         success, data, status_code = CourseSearchService.search_courses(query, limit)
         
         if success:
-            return jsonify({'courses': data, 'has_more': False}), status_code
+            return conditional.apply((jsonify({'courses': data, 'has_more': False}), status_code))
         else:
             return jsonify({'error': data}), status_code
             
@@ -109,7 +120,7 @@ def api_search():
         return jsonify({'error': 'Database error occurred'}), 500
 
 
-from flasknetwork.main.utils import get_sorted_posts
+from flasknetwork.main.utils import load_feed_page, normalize_sort
 
 @courses.route('/course/<int:course_id>')
 def course_detail(course_id):
@@ -120,24 +131,38 @@ def course_detail(course_id):
         course_id (int): The ID of the course to display
         
     Query Parameters:
-        page (int): Page number for pagination (default: 1)
+        cursor (str): Opaque pagination cursor (default: first page)
         sort (str): Sort order for reviews (default: newest)
     """
     try:
-        page = request.args.get('page', 1, type=int)
-        sort_by = request.args.get('sort', 'newest')
+        cursor = request.args.get('cursor')
+        sort_by = normalize_sort(request.args.get('sort', 'newest'))
+
+        # Revalidate against the course's stats row (and the catalog version, for renames)
+        # before loading anything else. Courses without reviews have no row and are always rendered.
+        conditional = None
+        stats = db.session.get(CourseStats, course_id)
+        if stats is not None:
+            conditional = ConditionalGet('course', course_id, course_catalog.get_index().version,
+                                         stats.review_count, stats.last_modified, sort_by, cursor or '',
+                                         last_modified=stats.last_modified)
+            not_modified = conditional.not_modified()
+            if not_modified:
+                return not_modified
+
         course = Course.query.get_or_404(course_id)
         
         # Base Query: Get reviews for this course
         query = Post.query.filter_by(course=course)
         
-        # Apply sorting
-        query = get_sorted_posts(query, sort_by)
-        
-        reviews = query.paginate(page=page, per_page=5)
+        # Apply sorting and keyset pagination
+        reviews = load_feed_page(query, sort_by, cursor=cursor, per_page=5,
+                                 include_course=False)
+        reviews.total = course.get_review_count()
 
         # Get course statistics efficiently
         avg_rating = course.get_average_rating()
+        top_tags = CourseTagStats.top_for_course(course.id) if stats is not None else []
 
         auth_can_review = ( 
             current_user.is_authenticated and current_user.can_review(course)
@@ -153,15 +178,17 @@ def course_detail(course_id):
             and not course.course_is_available_for_program(current_user.program_id)
         )
 
-        return render_template('courses/detail.html', 
+        html = render_template('courses/detail.html', 
                              title=f'{course.code} - {course.name}',
                              course=course,
                              reviews=reviews,
                              avg_rating=avg_rating,
+                             top_tags=top_tags,
                              auth_can_review=auth_can_review,
                              already_reviewed=already_reviewed,
                              not_in_program=not_in_program,
                              sort_by=sort_by)
+        return conditional.apply(html) if conditional else html
 
     except SQLAlchemyError as e:
         current_app.logger.error(f"Database error loading course {course_id}: {str(e)}")
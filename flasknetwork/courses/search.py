@@ -0,0 +1,157 @@
+from flask import current_app
+from sqlalchemy import case, func, or_, text, Float, Integer
+from flasknetwork import db
+from flasknetwork.models import Course, CourseStats
+
+
+# Relevance tiers, best first
+EXACT_CODE, CODE_PREFIX, NAME_PREFIX, FUZZY = 0, 1, 2, 3
+
+
+class CourseSearchBackend:
+    """
+    Portable course search using LIKE, ranked by match tier.
+    Subclasses narrow the candidate set with an index and add a relevance score.
+
+    Results are ordered by:
+        1. exact code match, then code prefix, then name/word prefix, then fuzzy matches
+        2. relevance score within the fuzzy tier (backend specific)
+        3. review count, if weight_by_reviews is enabled
+        4. course name
+    """
+
+    name = 'like'
+
+    def __init__(self, weight_by_reviews=True):
+        self.weight_by_reviews = weight_by_reviews
+
+    def search(self, query, limit):
+        """
+        Search courses by code or name.
+
+        Args:
+            query (str): Sanitized search term (at least 2 characters)
+            limit (int): Maximum number of results to return
+
+        Returns:
+            List[Course]: Ranked Course objects with review_count attached as attribute
+        """
+        term = query.lower()
+        code, name = func.lower(Course.code), func.lower(Course.name)
+
+        tier = case(
+            (code == term, EXACT_CODE),
+            (code.startswith(term, autoescape=True), CODE_PREFIX),
+            (or_(name.startswith(term, autoescape=True),
+                 name.contains(' ' + term, autoescape=True)), NAME_PREFIX),
+            else_=FUZZY
+        )
+        review_count = func.coalesce(CourseStats.review_count, 0)
+
+        stmt = db.select(Course, review_count)\
+            .outerjoin(CourseStats, Course.id == CourseStats.course_id)
+        stmt, relevance = self._candidates(stmt, term)
+
+        order_by = [tier]
+        if relevance is not None:
+            order_by.append(case((tier == FUZZY, relevance), else_=0).desc())
+        if self.weight_by_reviews:
+            order_by.append(review_count.desc())
+        order_by.append(Course.name)
+
+        results = db.session.execute(stmt.order_by(*order_by).limit(limit)).all()
+
+        courses = []
+        for course, count in results:
+            course.review_count = count or 0
+            courses.append(course)
+        return courses
+
+    def _candidates(self, stmt, term):
+        """
+        Restrict stmt to courses matching term.
+
+        Returns:
+            tuple: (filtered statement, relevance expression where higher is better, or None)
+        """
+        code, name = func.lower(Course.code), func.lower(Course.name)
+        return stmt.where(or_(code.contains(term, autoescape=True),
+                              name.contains(term, autoescape=True))), None
+
+
+class PostgresTrigramBackend(CourseSearchBackend):
+    """
+    PostgreSQL search backed by pg_trgm GIN indexes on lower(code) and lower(name).
+    The indexes serve the '%term%' substring filter, and the trigram similarity
+    operator adds typo-tolerant matches ranked by similarity.
+    """
+
+    name = 'postgres_trgm'
+
+    def _candidates(self, stmt, term):
+        code, name = func.lower(Course.code), func.lower(Course.name)
+        stmt = stmt.where(or_(code.contains(term, autoescape=True),
+                              name.contains(term, autoescape=True),
+                              name.op('%')(term)))
+        relevance = func.greatest(func.similarity(name, term), func.similarity(code, term))
+        return stmt, relevance
+
+
+class SqliteFtsBackend(CourseSearchBackend):
+    """
+    SQLite search backed by the course_fts FTS5 trigram index (created by migration
+    d5a4e71f9c38, invisible to the models), ranked by bm25.
+    The trigram tokenizer needs at least 3 characters, so shorter terms use LIKE.
+    """
+
+    name = 'sqlite_fts5'
+
+    def _candidates(self, stmt, term):
+        if len(term) < 3:
+            return super()._candidates(stmt, term)
+
+        # Quote the term as an FTS5 string so operators in user input are literal
+        match = '"' + term.replace('"', '""') + '"'
+        fts = text("SELECT rowid AS course_id, bm25(course_fts) AS score "
+                   "FROM course_fts WHERE course_fts MATCH :match")\
+            .bindparams(match=match)\
+            .columns(course_id=Integer, score=Float)\
+            .subquery('fts')
+        stmt = stmt.join(fts, fts.c.course_id == Course.id)
+        # bm25() is lower for better matches
+        return stmt, -fts.c.score
+
+
+def sqlite_fts_installed(connection):
+    """Return True if the course_fts index exists on this SQLite connection."""
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'course_fts'")
+    ).first() is not None
+
+
+_backend_cache = {}
+
+
+def get_search_backend():
+    """
+    Returns the course search backend for the current database, chosen once per engine:
+    pg_trgm on PostgreSQL, FTS5 on SQLite when course_fts exists, plain LIKE otherwise.
+    """
+    engine = db.engine
+    weight = current_app.config.get('COURSE_SEARCH_WEIGHT_BY_REVIEWS', True)
+    key = (engine.url, weight)
+
+    backend = _backend_cache.get(key)
+    if backend is None:
+        dialect = engine.dialect.name
+        if dialect == 'postgresql':
+            backend = PostgresTrigramBackend(weight)
+        elif dialect == 'sqlite':
+            with engine.connect() as connection:
+                installed = sqlite_fts_installed(connection)
+            backend = SqliteFtsBackend(weight) if installed else CourseSearchBackend(weight)
+        else:
+            backend = CourseSearchBackend(weight)
+        current_app.logger.info(f"Course search backend: {backend.name}")
+        _backend_cache[key] = backend
+    return backend
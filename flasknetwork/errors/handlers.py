@@ -2,6 +2,7 @@
 # maybe it *contains* the blueprints
 
 from flask import Blueprint, render_template
+from flasknetwork.users.hashing import PasswordHasherBusy
 
 errors = Blueprint('errors', __name__)
 
@@ -18,4 +19,10 @@ def error_403(error):
 
 @errors.app_errorhandler(500)
 def error_500(error):
-    return render_template("errors/500.html"), 500
\ No newline at end of file
+    return render_template("errors/500.html"), 500
+
+
+@errors.app_errorhandler(PasswordHasherBusy)
+def error_hasher_busy(error):
+    response = render_template("errors/503.html"), 503, {'Retry-After': '5'}
+    return response
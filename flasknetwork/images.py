@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from flask import g, url_for
+from markupsafe import Markup, escape
+from PIL import Image, features
+
+
+# Output directory (inside the static folder) and manifest written by scripts/build_images.py
+VARIANTS_DIR = 'variants'
+MANIFEST_NAME = 'manifest.json'
+
+# Source directories and the widths generated for them. Avatars are shown at 25-125 CSS px,
+# logos from favicon size up to the landing page; widths above the source are skipped.
+IMAGE_SETS = {
+    'profile_pics': [32, 64, 125, 250],
+    'logo': [32, 64, 192, 512, 1024],
+}
+
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+
+# Output formats, best compression first. The source format is always written as the fallback.
+MODERN_FORMATS = [
+    ('avif', 'image/avif', {'quality': 50, 'speed': 6}),
+    ('webp', 'image/webp', {'quality': 80, 'method': 6}),
+]
+FALLBACK_OPTIONS = {
+    'png': {'optimize': True},
+    'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+}
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _available_formats():
+    """Modern formats this Pillow build can encode."""
+    return [fmt for fmt, _, _ in MODERN_FORMATS if features.check(fmt)]
+
+
+def _generate_variants(task):
+    """
+    Write every size/format variant of one source image. Runs in a worker process.
+
+    Returns:
+        tuple: (source, manifest entry)
+    """
+    static_folder, source, widths, formats, digest = task
+    source_path = os.path.join(static_folder, source)
+    stem, ext = os.path.splitext(source)
+    fallback = 'jpeg' if ext.lower() in ('.jpg', '.jpeg') else 'png'
+
+    with Image.open(source_path) as img:
+        img.load()
+        width, height = img.size
+        if img.mode in ('P', 'LA'):
+            img = img.convert('RGBA')
+        if fallback == 'jpeg' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+
+        targets = sorted({w for w in widths if w < width} | {min(max(widths), width)})
+        variants = []
+        for target_width in targets:
+            target_height = max(1, round(height * target_width / width))
+            resized = img if target_width == width else img.resize(
+                (target_width, target_height), Image.Resampling.LANCZOS)
+            for fmt in formats + [fallback]:
+                options = dict(next((o for f, _, o in MODERN_FORMATS if f == fmt), None)
+                               or FALLBACK_OPTIONS[fmt])
+                extension = 'jpg' if fmt == 'jpeg' else fmt
+                path = f"{VARIANTS_DIR}/{stem}-{target_width}.{extension}"
+                output_path = os.path.join(static_folder, path)
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                resized.save(output_path, fmt.upper(), **options)
+                variants.append({'path': path, 'format': fmt, 'width': target_width,
+                                 'height': target_height, 'bytes': os.path.getsize(output_path)})
+
+    return source, {
+        'hash': digest,
+        'width': width,
+        'height': height,
+        'bytes': os.path.getsize(source_path),
+        'fallback': fallback,
+        'variants': variants,
+    }
+
+
+def build_image_variants(static_folder, workers=None, force=False, log=print):
+    """
+    Generate responsive size/format variants of the images in IMAGE_SETS with a process pool.
+
+    Each image gets AVIF and WebP variants (when Pillow supports them) plus a resized copy in
+    its own format, at every configured width up to its own. Inputs whose hash matches the
+    previous manifest (and whose outputs still exist) are skipped. The result is written to
+    static/variants/manifest.json and outputs of removed sources are deleted.
+
+    Args:
+        static_folder (str): The Flask static folder
+        workers (int|None): Worker processes (default: CPU count)
+        force (bool): Regenerate everything, ignoring the previous manifest
+        log (callable): Progress output
+
+    Returns:
+        dict: The manifest, keyed by source path relative to the static folder
+    """
+    variants_root = os.path.join(static_folder, VARIANTS_DIR)
+    manifest_path = os.path.join(variants_root, MANIFEST_NAME)
+    previous = {}
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+
+    formats = _available_formats()
+    manifest = {}
+    tasks = []
+    for directory, widths in IMAGE_SETS.items():
+        source_dir = os.path.join(static_folder, directory)
+        if not os.path.isdir(source_dir):
+            continue
+        for filename in sorted(os.listdir(source_dir)):
+            if os.path.splitext(filename)[1].lower() not in SOURCE_EXTENSIONS:
+                continue
+            source = f"{directory}/{filename}"
+            digest = _file_hash(os.path.join(static_folder, source))
+            entry = previous.get(source)
+            if (entry and entry['hash'] == digest and
+                    {v['format'] for v in entry['variants']} >= set(formats) and
+                    all(os.path.exists(os.path.join(static_folder, v['path'])) for v in entry['variants'])):
+                manifest[source] = entry
+                continue
+            tasks.append((static_folder, source, widths, formats, digest))
+
+    log(f"{len(manifest)} images unchanged, generating {len(tasks)} "
+        f"({', '.join(formats + ['source format'])})")
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for source, entry in pool.map(_generate_variants, tasks):
+                manifest[source] = entry
+                largest = entry['variants'][-1]['width']
+                smallest = min(v['bytes'] for v in entry['variants'] if v['width'] == largest)
+                log(f" {source}: {len(entry['variants'])} variants, "
+                    f"{entry['bytes']} B -> {smallest} B at {largest}px")
+
+    # Drop variants of sources that were removed or changed size
+    written = {v['path'] for entry in manifest.values() for v in entry['variants']}
+    for directory, _, files in os.walk(variants_root):
+        for filename in files:
+            relative = os.path.relpath(os.path.join(directory, filename), static_folder).replace(os.sep, '/')
+            if relative != f"{VARIANTS_DIR}/{MANIFEST_NAME}" and relative not in written:
+                os.remove(os.path.join(directory, filename))
+
+    os.makedirs(variants_root, exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class ImageVariants:
+    """
+    Template helpers over the manifest written by build_image_variants():
+
+        {{ responsive_image('profile_pics/' + user.image_file, alt=..., width=50, css_class=...) }}
+            <picture> with AVIF/WebP sources and a srcset on the fallback <img>
+        {{ image_variant_url('logo/ratekth-logo.png', 64) }}
+            URL of the smallest fallback-format variant at least that wide (e.g. favicons)
+
+    Images missing from the manifest (or all images, without a build) fall back to the
+    original file. Bytes of the originals versus the variants a browser would pick are
+    tallied per request in g.image_bytes for scripts/build_images.py report.
+    """
+
+    def __init__(self):
+        self.manifest = {}
+
+    def init_app(self, app):
+        self.manifest = {}
+        path = os.path.join(app.static_folder, VARIANTS_DIR, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            app.logger.info("No image variant manifest, serving original images "
+                            "(run scripts/build_images.py)")
+        app.add_template_global(self.responsive_image, 'responsive_image')
+        app.add_template_global(self.variant_url, 'image_variant_url')
+
+    @staticmethod
+    def _pick(variants, width):
+        """Smallest variant at least `width` px wide, or the widest one."""
+        wide_enough = [v for v in variants if v['width'] >= width]
+        return min(wide_enough, key=lambda v: v['width']) if wide_enough else variants[-1]
+
+    def variant_url(self, source, width):
+        entry = self.manifest.get(source)
+        if entry is None:
+            return url_for('static', filename=source)
+        fallback = [v for v in entry['variants'] if v['format'] == entry['fallback']]
+        return url_for('static', filename=self._pick(fallback, width)['path'])
+
+    def responsive_image(self, source, alt='', width=None, css_class='', sizes=None, **attrs):
+        """
+        Render a responsive image.
+
+        Args:
+            source (str): Image path relative to the static folder
+            alt (str): Alternative text
+            width (int|None): Displayed width in CSS px (default: the image's own width)
+            css_class (str): Class of the <img>
+            sizes (str|None): sizes attribute (default: "<width>px")
+            **attrs: Extra <img> attributes (e.g. id, loading)
+        """
+        entry = self.manifest.get(source)
+        img_attrs = {'class': css_class or None, 'alt': alt}
+        img_attrs.update(attrs)
+
+        if entry is None:
+            img_attrs['src'] = url_for('static', filename=source)
+            return Markup(f"<img{self._attributes(img_attrs)}>")
+
+        width = width or entry['width']
+        sizes = sizes or f"{width}px"
+        by_format = {}
+        for variant in entry['variants']:
+            by_format.setdefault(variant['format'], []).append(variant)
+
+        html = ['<picture>']
+        for fmt, mime, _ in MODERN_FORMATS:
+            if fmt in by_format:
+                html.append(f'<source type="{mime}" srcset="{self._srcset(by_format[fmt])}" '
+                            f'sizes="{escape(sizes)}">')
+
+        fallback = by_format[entry['fallback']]
+        chosen = self._pick(fallback, width)
+        img_attrs.update({
+            'src': url_for('static', filename=chosen['path']),
+            'srcset': self._srcset(fallback),
+            'sizes': sizes,
+            'width': width,
+            'height': round(width * entry['height'] / entry['width']),
+        })
+        html.append(f"<img{self._attributes(img_attrs)}>")
+        html.append('</picture>')
+
+        best = min(self._pick(variants, width)['bytes'] for variants in by_format.values())
+        self._tally(entry['bytes'], best)
+        return Markup(''.join(html))
+
+    @staticmethod
+    def _srcset(variants):
+        return ', '.join(f"{url_for('static', filename=v['path'])} {v['width']}w" for v in variants)
+
+    @staticmethod
+    def _attributes(attrs):
+        return ''.join(f' {name}="{escape(value)}"' for name, value in attrs.items() if value is not None)
+
+    @staticmethod
+    def _tally(original, served):
+        totals = g.setdefault('image_bytes', [0, 0])
+        totals[0] += original
+        totals[1] += served
+
+
+image_variants = ImageVariants()
@@ -0,0 +1,88 @@
+import hashlib
+import time
+from datetime import timezone
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+
+
+# CacheVersion bumped by every change to posts shown in the home feed
+FEED_VERSION = 'feed'
+
+# HTML pages differ per viewer and must be revalidated on every use
+PAGE_CACHE_CONTROL = 'private, no-cache'
+
+# Identifies this process when no RELEASE is configured, so template changes never hit stale ETags
+_PROCESS_MARKER = str(time.time())
+
+
+def _viewer_marker():
+    """The parts of the current user that change how pages render for them."""
+    if not current_user.is_authenticated:
+        return 'anon'
+    return f"{current_user.id}.{int(bool(current_user.email_verified))}.{current_user.program_id}"
+
+
+class ConditionalGet:
+    """
+    ETag / Last-Modified validators for a response, computed from cheap version markers
+    (a counter or timestamp) instead of the rendered body, so a matching If-None-Match or
+    If-Modified-Since can be answered with 304 before the page's queries and rendering run.
+
+    Usage in a view:
+        conditional = ConditionalGet('course', stats.review_count, stats.last_modified,
+                                     last_modified=stats.last_modified)
+        not_modified = conditional.not_modified()
+        if not_modified:
+            return not_modified
+        return conditional.apply(render_template(...))
+
+    Args:
+        *parts: Values that together identify the response content (markers, query args)
+        last_modified (datetime|None): Naive UTC time of the last change, if known
+        cache_control (str): Cache-Control header for 200 and 304 responses
+        per_user (bool): Whether the response differs per viewer (adds the viewer to the ETag)
+    """
+
+    def __init__(self, *parts, last_modified=None, cache_control=PAGE_CACHE_CONTROL, per_user=True):
+        release = current_app.config.get('RELEASE') or _PROCESS_MARKER
+        parts = (release,) + parts
+        if per_user:
+            parts += (_viewer_marker(),)
+        self.etag = hashlib.sha1('\x1f'.join(map(str, parts)).encode('utf-8')).hexdigest()[:24]
+        # HTTP dates have second resolution
+        self.last_modified = last_modified.replace(microsecond=0) if last_modified else None
+        self.cache_control = cache_control
+        self.per_user = per_user
+        # Pending flash messages are rendered once, so such a page must not be validated
+        self.enabled = request.method in ('GET', 'HEAD') and not (per_user and session.get('_flashes'))
+
+    def not_modified(self):
+        """Return a 304 response if the client's cached copy is current, otherwise None."""
+        if not self.enabled:
+            return None
+
+        if request.if_none_match:
+            # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+            fresh = request.if_none_match.contains_weak(self.etag)
+        elif request.if_modified_since and self.last_modified:
+            fresh = self.last_modified.replace(tzinfo=timezone.utc) <= request.if_modified_since
+        else:
+            fresh = False
+
+        if not fresh:
+            return None
+        return self.apply(current_app.response_class(status=304))
+
+    def apply(self, response):
+        """Attach the validators and Cache-Control policy to a successful response."""
+        response = make_response(response)
+        if not self.enabled or response.status_code not in (200, 304):
+            return response
+
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        response.headers['Cache-Control'] = self.cache_control
+        if self.per_user:
+            response.vary.add('Cookie')
+        return response
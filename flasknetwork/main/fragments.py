@@ -0,0 +1,91 @@
+import hashlib
+import threading
+import time
+from flask import current_app
+from markupsafe import Markup
+from flasknetwork.cache import CacheStats, create_cache_backend
+
+
+class PostCardCache:
+    """
+    Cache of rendered post card HTML (components/post_card.html).
+
+    Entries are keyed by post id plus a fingerprint of everything the card shows
+    that can change: Post.updated_at, the author's username and avatar, the course
+    (when the badge is shown), the tags' names and sentiments (which change without touching
+    Post.updated_at), the macro arguments and the deployed RELEASE. Editing a post therefore
+    never serves a stale card, even from a shared backend; new_post, update_post
+    and delete_post additionally invalidate the post's entries to free space.
+
+    Configuration:
+        POST_CARD_CACHE_BACKEND: 'lru' (default), 'redis' or 'none'
+        POST_CARD_CACHE_SIZE: capacity of the in-process LRU
+        CACHE_REDIS_URL: connection URL for the redis backend
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.stats = CacheStats('post_card')
+        self._render_lock = threading.Lock()
+        self._render_seconds = 0.0
+
+    def init_app(self, app):
+        self.backend = create_cache_backend(
+            app.config.get('POST_CARD_CACHE_BACKEND', 'lru'),
+            namespace='post_card',
+            max_entries=app.config.get('POST_CARD_CACHE_SIZE', 2000),
+            redis_url=app.config.get('CACHE_REDIS_URL'),
+        )
+        app.add_template_global(self.render, 'cached_post_card')
+
+    @staticmethod
+    def _key(post, is_detail_view, return_to):
+        author = post.author
+        # The release changes the fingerprinted avatar URLs, which a shared backend outlives
+        parts = [current_app.config.get('RELEASE') or '',
+                 post.updated_at.isoformat() if post.updated_at else '',
+                 author.username, author.image_file,
+                 '1' if is_detail_view else '0', return_to or '']
+        if not is_detail_view:
+            parts += [post.course.code, post.course.name]
+        for tag in sorted(post.tags, key=lambda tag: tag.id):
+            parts += [str(tag.id), tag.name, tag.sentiment.value]
+        fingerprint = hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+        return f"{post.id}:{fingerprint}"
+
+    def render(self, post, is_detail_view=False, return_to=None):
+        """Return the card HTML for post, rendering the uncached macro on a miss."""
+        key = self._key(post, is_detail_view, return_to)
+        html = self.backend.get(key)
+        self.stats.record(html is not None)
+        if html is not None:
+            return Markup(html)
+
+        start = time.perf_counter()
+        macros = current_app.jinja_env.get_template('components/post_card.html').module
+        html = str(macros.render_post_card_uncached(post, is_detail_view, return_to))
+        with self._render_lock:
+            self._render_seconds += time.perf_counter() - start
+
+        self.backend.set(key, html)
+        return Markup(html)
+
+    def invalidate(self, post_id):
+        """Drop every cached card of a post."""
+        self.backend.delete_prefix(f"{post_id}:")
+
+    def report(self):
+        """Counters for monitoring, including the estimated template time saved by hits."""
+        misses = self.stats.misses
+        avg_render_ms = (self._render_seconds / misses * 1000) if misses else 0.0
+        report = self.stats.to_dict()
+        report.update({
+            'backend': self.backend.name,
+            'entries': len(self.backend),
+            'avg_render_ms': round(avg_render_ms, 3),
+            'est_saved_ms': round(avg_render_ms * self.stats.hits, 1),
+        })
+        return report
+
+
+post_card_cache = PostCardCache()
@@ -1,28 +1,40 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, jsonify, abort, Response
 from flask_mail import Message
-from flasknetwork.models import Post
+from flasknetwork.models import Post, CacheVersion
 from flasknetwork.main.forms import FeedbackForm
-from flasknetwork import mail
+from flasknetwork import db
+from flasknetwork.outbox import enqueue
 
 main = Blueprint('main', __name__)
 
 
-from flasknetwork.main.utils import get_sorted_posts
+from flasknetwork.main.utils import load_feed_page, normalize_sort, require_stats_token
+from flasknetwork.main.fragments import post_card_cache
+from flasknetwork.users.loader import user_cache
+from flasknetwork.courses.programs import program_courses
+from flasknetwork.sqlstats import sql_stats
+from flasknetwork.metrics import metrics
+from flasknetwork.main.conditional import ConditionalGet, FEED_VERSION
 
 @main.route('/')
 @main.route('/home')
 def home():
-    page = request.args.get('page', 1, type=int)
-    sort_by = request.args.get('sort', 'newest')
+    cursor = request.args.get('cursor')
+    sort_by = normalize_sort(request.args.get('sort', 'newest'))
+
+    # Answer revalidations from the feed version alone, before querying posts
+    version, updated_at = CacheVersion.get_marker(FEED_VERSION)
+    conditional = ConditionalGet('home', version, sort_by, cursor or '', last_modified=updated_at)
+    not_modified = conditional.not_modified()
+    if not_modified:
+        return not_modified
     
     # Base query
     query = Post.query
     
-    # Apply sorting using our separated concern utility
-    query = get_sorted_posts(query, sort_by)
-    
-    posts = query.paginate(page=page, per_page=5)
-    return render_template('home.html', title='Home Page', posts=posts, sort_by=sort_by)
+    # Apply sorting, keyset pagination and eager loading using our separated concern utility
+    posts = load_feed_page(query, sort_by, cursor=cursor, per_page=5)
+    return conditional.apply(render_template('home.html', title='Home Page', posts=posts, sort_by=sort_by))
 
 
 @main.route('/feedback', methods=['GET', 'POST'])
@@ -38,11 +50,41 @@ def feedback():
                 recipients=[current_app.config['MAIL_USERNAME']]
             )
             msg.body = f"Feedback from rateKTH:\n\n{form.message.data}"
-            mail.send(msg)
+            enqueue(msg)
+            db.session.commit()
             flash('Thanks for your feedback!', 'success')
             return redirect(redirect_url)
         except Exception as e:
-            current_app.logger.error(f"Failed to send feedback email: {e}")
+            db.session.rollback()
+            current_app.logger.error(f"Failed to queue feedback email: {e}")
             flash('Failed to send feedback. Please try again later.', 'danger')
     
-    return render_template('feedback.html', title='Feedback', form=form, redirect_url=redirect_url)
\ No newline at end of file
+    return render_template('feedback.html', title='Feedback', form=form, redirect_url=redirect_url)
+
+
+@main.route('/internal/cache-stats')
+def cache_stats():
+    """Hit/miss counters of this worker's caches (requires STATS_TOKEN)."""
+    require_stats_token(request)
+    return jsonify({
+        'post_card': post_card_cache.report(),
+        'user_loader': user_cache.report(),
+        'program_courses': program_courses.report(),
+    })
+
+
+@main.route('/internal/sql-stats')
+def sql_stats_report():
+    """SQL statements and database time per endpoint in this worker (requires STATS_TOKEN)."""
+    require_stats_token(request)
+    return jsonify(sql_stats.report())
+
+
+@main.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metrics aggregated over all workers (requires STATS_TOKEN as a bearer token)."""
+    require_stats_token(request)
+    if not metrics.enabled:
+        abort(404)
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
\ No newline at end of file
@@ -1,57 +1,266 @@
-from flask import current_app
-from sqlalchemy import case, desc, asc
-from flasknetwork.models import Post, WorkloadLevel
+import base64
+import binascii
+import hmac
+import json
+from datetime import datetime
+from flask import current_app, abort
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+from flasknetwork.models import Post
 
-def get_sorted_posts(query, sort_by):
+# Whitelist of allowed sort options to prevent SQL injection and logic errors
+SORT_OPTIONS = ('newest', 'top', 'professor', 'material', 'peers', 'workload')
+
+
+def _sort_keys(sort_by):
     """
-    Applies sorting to a SQLAlchemy query for Posts based on the sort_by parameter.
-    
-    Args:
-        query: Base SQLAlchemy query object (e.g., Post.query)
-        sort_by (str): The sort criterion ('newest', 'overall', 'professor', 'workload', etc.)
-        
-    Returns:
-        Query: The query object with order_by applied.
+    Returns the ordered list of (expression, descending) sort keys for a sort option.
+    Every ordering ends with date_posted and Post.id so that it is total,
+    which is what lets a cursor point at exactly one row.
     """
-    # Whitelist of allowed sort options to prevent SQL injection and logic errors
-    # Maps safe strings to actual sort logic
-    
-    # Default sort (Newest)
-    if not sort_by or sort_by == 'newest':
-        return query.order_by(Post.date_posted.desc())
-
-    # Robust handling for other options
     if sort_by == 'top':
         # Overall Rating: Average of Professor, Material, Peers
-        # We compute this on the fly in the DB.
-        # (Prof + Mat + Peers) / 3
-        # We assume these columns are not null (nullable=False in model).
-        overall_score = (Post.rating_professor + Post.rating_material + Post.rating_peers) / 3
-        return query.order_by(overall_score.desc(), Post.date_posted.desc())
-        
+        # Ordering by the stored, indexed sum (Prof + Mat + Peers) is the same as
+        # ordering by the average, and keeps the key an exact integer for cursors.
+        keys = [(Post.rating_sum, True)]
     elif sort_by == 'professor':
-        return query.order_by(Post.rating_professor.desc(), Post.date_posted.desc())
-        
+        keys = [(Post.rating_professor, True)]
     elif sort_by == 'material':
-        return query.order_by(Post.rating_material.desc(), Post.date_posted.desc())
-        
+        keys = [(Post.rating_material, True)]
     elif sort_by == 'peers':
-        return query.order_by(Post.rating_peers.desc(), Post.date_posted.desc())
-        
+        keys = [(Post.rating_peers, True)]
     elif sort_by == 'workload':
         # Workload: Light at the top.
-        # Enum values: 'light', 'medium', 'heavy'.
-        # We want order: Light (1) -> Medium (2) -> Heavy (3).
-        # We use a CASE statement to assign numeric values for sorting.
-        workload_order = case(
-            {
-                WorkloadLevel.light: 1,
-                WorkloadLevel.medium: 2,
-                WorkloadLevel.heavy: 3
-            },
-            value=Post.rating_workload
-        )
-        return query.order_by(workload_order.asc(), Post.date_posted.desc())
-    
+        # We want order: Light (1) -> Medium (2) -> Heavy (3), stored as workload_rank.
+        keys = [(Post.workload_rank, False)]
+    else:
+        # Default sort (Newest)
+        keys = []
+
+    return keys + [(Post.date_posted, True), (Post.id, True)]
+
+
+def normalize_sort(sort_by):
+    """Returns sort_by if it is a known sort option, otherwise 'newest'."""
+    return sort_by if sort_by in SORT_OPTIONS else 'newest'
+
+
+def get_sorted_posts(query, sort_by):
+    """
+    Applies sorting to a SQLAlchemy query for Posts based on the sort_by parameter.
+
+    Args:
+        query: Base SQLAlchemy query object (e.g., Post.query)
+        sort_by (str): The sort criterion ('newest', 'top', 'professor', 'workload', etc.)
+
+    Returns:
+        Query: The query object with order_by applied.
+    """
     # Fallback for any undefined/invalid sort param -> Default to Newest
-    return query.order_by(Post.date_posted.desc())
+    keys = _sort_keys(normalize_sort(sort_by))
+    return query.order_by(*[expr.desc() if descending else expr.asc() for expr, descending in keys])
+
+
+def with_feed_relations(query, include_course=True):
+    """
+    Adds eager-loading options for everything a post card renders.
+
+    Authors and courses are many-to-one, so they are JOINed into the page query.
+    Tags are loaded with one extra SELECT ... WHERE post_id IN (...) for the whole page,
+    which overrides the lazy='subquery' default that would re-run the page query.
+
+    Args:
+        query: Base SQLAlchemy query object for Posts
+        include_course (bool): Whether to load courses too (not needed on course detail)
+
+    Returns:
+        Query: The query object with loader options applied.
+    """
+    options = [joinedload(Post.author), selectinload(Post.tags)]
+    if include_course:
+        options.append(joinedload(Post.course))
+    return query.options(*options)
+
+
+class CursorPage:
+    """
+    A page of posts fetched with keyset (cursor) pagination.
+
+    Instead of OFFSET/COUNT, each page remembers the sort key of its first and
+    last post. The next page continues strictly after the last post and the
+    previous page strictly before the first one, so every page costs the same
+    as page 1 regardless of how deep it is.
+
+    Attributes:
+        items (list): Posts on this page
+        has_next (bool): Whether there are posts after this page
+        has_prev (bool): Whether there are posts before this page
+        next_cursor (str|None): Opaque cursor for the next page
+        prev_cursor (str|None): Opaque cursor for the previous page
+        total (int|None): Total number of posts, if the caller knows it
+    """
+
+    def __init__(self, items, sort_by, first_key=None, last_key=None,
+                 has_next=False, has_prev=False, total=None):
+        self.items = items
+        self.sort_by = sort_by
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = encode_cursor(sort_by, last_key, 'next') if has_next else None
+        self.prev_cursor = encode_cursor(sort_by, first_key, 'prev') if has_prev else None
+        self.total = total
+
+
+def encode_cursor(sort_by, key, direction='next'):
+    """
+    Encodes a sort key into an opaque, URL-safe cursor string.
+
+    Args:
+        sort_by (str): The sort option the key belongs to
+        key (tuple): Sort key values of a post, ending with (date_posted, id)
+        direction (str): 'next' to continue after the key, 'prev' to continue before it
+
+    Returns:
+        str: URL-safe cursor
+    """
+    values = list(key)
+    values[-2] = values[-2].isoformat()
+    payload = json.dumps({'s': sort_by, 'k': values, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_by):
+    """
+    Decodes a cursor created by encode_cursor().
+
+    Args:
+        cursor (str): Opaque cursor from the request
+        sort_by (str): The sort option of the current request
+
+    Returns:
+        tuple: (key values, direction)
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another sort option
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values, direction = data['k'], data['d']
+        if data['s'] != sort_by or direction not in ('next', 'prev'):
+            raise ValueError("Cursor does not match the requested sort")
+        if not isinstance(values, list) or len(values) != len(_sort_keys(sort_by)):
+            raise ValueError("Cursor has the wrong number of sort keys")
+        # Every key before date_posted is an integer column (rating sums, ranks)
+        if any(type(value) is not int for value in values[:-2]):
+            raise ValueError("Cursor has a non-integer sort key")
+        values[-2] = datetime.fromisoformat(values[-2])
+        values[-1] = int(values[-1])
+    except (binascii.Error, UnicodeError, TypeError, KeyError, AttributeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed cursor: {e}")
+    return tuple(values), direction
+
+
+def _keyset_filter(keys, values, forward):
+    """
+    Builds the WHERE clause selecting rows strictly after (forward) or before
+    the given key in the sort order, as an OR-chain so mixed asc/desc keys work:
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+    When all keys sort the same way, a row-value comparison is used instead,
+    which the database can turn into a single index range scan.
+    """
+    if len({descending for _, descending in keys}) == 1:
+        row, key = tuple_(*[expr for expr, _ in keys]), tuple_(*values)
+        return (row < key) if keys[0][1] == forward else (row > key)
+
+    clauses = []
+    for i, (expr, descending) in enumerate(keys):
+        after = (expr < values[i]) if descending == forward else (expr > values[i])
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, after))
+    return or_(*clauses)
+
+
+def paginate_posts(query, sort_by, cursor=None, per_page=5):
+    """
+    Keyset-paginates a Post query for any sort option.
+
+    Args:
+        query: Base SQLAlchemy query object (e.g., Post.query.filter_by(course=course))
+        sort_by (str): The sort criterion ('newest', 'top', 'professor', 'workload', etc.)
+        cursor (str): Opaque cursor from a previous page, or None for the first page
+        per_page (int): Number of posts per page
+
+    Returns:
+        CursorPage: The requested page
+    """
+    sort_by = normalize_sort(sort_by)
+    keys = _sort_keys(sort_by)
+
+    direction = 'next'
+    if cursor:
+        try:
+            values, direction = decode_cursor(cursor, sort_by)
+            query = query.filter(_keyset_filter(keys, values, forward=(direction == 'next')))
+        except ValueError as e:
+            # A stale or tampered cursor just starts over from the first page
+            current_app.logger.info(f"Ignoring invalid pagination cursor: {e}")
+            cursor, direction = None, 'next'
+
+    forward = direction == 'next'
+    order_by = [expr.desc() if descending == forward else expr.asc() for expr, descending in keys]
+
+    # Select the sort keys alongside each post so the cursors use exactly what the DB compared.
+    # Fetch one extra row to know whether there is another page.
+    rows = query.add_columns(*[expr for expr, _ in keys])\
+                .order_by(None).order_by(*order_by)\
+                .limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    first_key = tuple(rows[0][1:]) if rows else None
+    last_key = tuple(rows[-1][1:]) if rows else None
+
+    if forward:
+        has_next, has_prev = has_more, bool(cursor)
+    else:
+        has_next, has_prev = True, has_more
+
+    return CursorPage(items, sort_by, first_key=first_key, last_key=last_key,
+                      has_next=has_next and bool(rows), has_prev=has_prev and bool(rows))
+
+
+def load_feed_page(query, sort_by, cursor=None, per_page=5, include_course=True):
+    """
+    Loads one page of post cards in a fixed number of queries:
+    the page itself (with authors and courses joined) plus one for its tags.
+
+    Args:
+        query: Base SQLAlchemy query object (e.g., Post.query.filter_by(author=user))
+        sort_by (str): The sort criterion ('newest', 'top', 'professor', 'workload', etc.)
+        cursor (str): Opaque cursor from a previous page, or None for the first page
+        per_page (int): Number of posts per page
+        include_course (bool): Whether the cards show the course badge
+
+    Returns:
+        CursorPage: The requested page with relationships already loaded
+    """
+    return paginate_posts(with_feed_relations(query, include_course=include_course),
+                          sort_by, cursor=cursor, per_page=per_page)
+
+
+def require_stats_token(request_obj):
+    """
+    Guard for internal monitoring endpoints: aborts with 404 unless STATS_TOKEN is
+    configured and sent as 'Authorization: Bearer <STATS_TOKEN>'. Never in the query
+    string, which ends up in access logs.
+    """
+    expected = current_app.config.get('STATS_TOKEN')
+    auth = request_obj.headers.get('Authorization', '')
+    supplied = auth[len('Bearer '):] if auth.startswith('Bearer ') else ''
+    if not expected or not hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8')):
+        abort(404)
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from flask import current_app, request
+from sqlalchemy import event
+from flasknetwork import db
+from flasknetwork.cache import CacheStats
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # /metrics answers 404 without it
+    prometheus_client = None
+
+
+_ENVIRON_KEY = 'flasknetwork.metrics_started'
+
+# Request latency buckets in seconds; most pages are well under 100 ms, logins take ~1 s (bcrypt)
+LATENCY_BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 10.0)
+
+
+def multiprocess_dir():
+    """Directory shared by the gunicorn workers' metric files, or None in a single process."""
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+class _ScrapeTimeCollector:
+    """
+    Values computed when /metrics is scraped: the email outbox depth (one query, the same for
+    every worker) and cache hit ratios derived from the lookup counters already collected.
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        from flasknetwork.outbox import queue_depth
+
+        depth = GaugeMetricFamily('flasknetwork_email_queue_depth', 'Emails in the outbox by status',
+                                  labels=['status'])
+        try:
+            for status, count in queue_depth().items():
+                depth.add_metric([status], count)
+        except Exception as e:
+            # A scrape should still return the other metrics when the database is unavailable
+            current_app.logger.error(f"Failed to read the outbox depth for /metrics: {e}")
+        yield depth
+
+        lookups = {}
+        for family in self.source.collect():
+            if family.name == 'flasknetwork_cache_lookups':
+                for sample in family.samples:
+                    if sample.name.endswith('_total'):
+                        key = (sample.labels['cache'], sample.labels['result'])
+                        lookups[key] = lookups.get(key, 0) + sample.value
+        ratio = GaugeMetricFamily('flasknetwork_cache_hit_ratio',
+                                  'Cache hits / lookups since the workers started', labels=['cache'])
+        for cache in sorted({cache for cache, _ in lookups}):
+            hits, misses = lookups.get((cache, 'hit'), 0), lookups.get((cache, 'miss'), 0)
+            ratio.add_metric([cache], hits / (hits + misses) if hits + misses else 0.0)
+        yield ratio
+
+
+class Metrics:
+    """
+    Prometheus metrics for /metrics (see main/routes.py, guarded by STATS_TOKEN):
+    request latency histograms per endpoint and status, SQLAlchemy pool gauges, cache lookups
+    and hit ratios, and the email outbox depth.
+
+    Under gunicorn every worker writes its values to PROMETHEUS_MULTIPROC_DIR (set up by
+    gunicorn.conf.py) and a scrape, whichever worker serves it, aggregates all of them, so the
+    numbers don't depend on how many workers there are. Without that variable (flask run)
+    the metrics cover the single process.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.request_latency = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True) and prometheus_client is not None
+        if not self.enabled:
+            return
+        if self.request_latency is None:
+            self._create_metrics()
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        with app.app_context():
+            self._watch_pool(db.engine)
+
+    def _create_metrics(self):
+        self.request_latency = prometheus_client.Histogram(
+            'flasknetwork_http_request_duration_seconds', 'Request latency by endpoint and status',
+            ['method', 'endpoint', 'status'], buckets=LATENCY_BUCKETS)
+        self.cache_lookups = prometheus_client.Counter(
+            'flasknetwork_cache_lookups', 'Cache lookups by cache and result', ['cache', 'result'])
+        # Summed over the live worker processes
+        self.pool_checked_out = prometheus_client.Gauge(
+            'flasknetwork_db_pool_checked_out', 'Database connections in use',
+            multiprocess_mode='livesum')
+        self.pool_overflow = prometheus_client.Gauge(
+            'flasknetwork_db_pool_overflow', 'Connections in use beyond DB_POOL_SIZE (max_overflow)',
+            multiprocess_mode='livesum')
+        self.pool_size = prometheus_client.Gauge(
+            'flasknetwork_db_pool_size', 'Pool size (DB_POOL_SIZE) of the workers that used the database',
+            multiprocess_mode='livesum')
+        CacheStats.observer = self._record_cache_lookup
+
+    def _record_cache_lookup(self, name, hit):
+        self.cache_lookups.labels(name, 'hit' if hit else 'miss').inc()
+
+    def _watch_pool(self, engine):
+        # Counted here rather than read from the pool: its count only drops after the checkin event
+        checked_out = [0]
+        lock = threading.Lock()
+
+        def update(delta):
+            # engine.pool is looked up each time: gunicorn workers replace it after forking
+            size = engine.pool.size() if hasattr(engine.pool, 'size') else 0
+            with lock:
+                checked_out[0] += delta
+                self.pool_checked_out.set(checked_out[0])
+                self.pool_overflow.set(max(checked_out[0] - size, 0) if size else 0)
+                self.pool_size.set(size)
+
+        event.listen(engine, 'checkout', lambda *args: update(1))
+        event.listen(engine, 'checkin', lambda *args: update(-1))
+
+    def _before_request(self):
+        request.environ[_ENVIRON_KEY] = time.perf_counter()
+
+    def _after_request(self, response):
+        started = request.environ.get(_ENVIRON_KEY)
+        if started is not None:
+            self.request_latency.labels(request.method, request.endpoint or 'unmatched',
+                                        str(response.status_code)).observe(time.perf_counter() - started)
+        return response
+
+    def render(self):
+        """Return (body, content type) of the Prometheus text exposition for all workers."""
+        if multiprocess_dir():
+            source = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(source)
+        else:
+            source = prometheus_client.REGISTRY
+        scraped = prometheus_client.CollectorRegistry()
+        scraped.register(_ScrapeTimeCollector(source))
+        body = prometheus_client.generate_latest(source) + prometheus_client.generate_latest(scraped)
+        return body, prometheus_client.CONTENT_TYPE_LATEST
+
+
+metrics = Metrics()
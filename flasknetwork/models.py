@@ -1,12 +1,26 @@
 from flasknetwork import db, login_manager
 from itsdangerous import URLSafeTimedSerializer as Serializer
-from flask import current_app
+from flask import current_app, request, has_request_context
 from datetime import datetime
 from flask_login import UserMixin # 4 default methods for user authentication
 from sqlalchemy import func
 import enum
 
 
+def _request_memo(key, compute):
+    """
+    Return compute(), cached for the rest of the current request. The memo lives in the
+    WSGI environ rather than flask.g, which is shared by every request of an app context
+    pushed outside them (shell, tests). Outside a request the value is computed every call.
+    """
+    if not has_request_context():
+        return compute()
+    memo = request.environ.setdefault('flasknetwork.model_memo', {})
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
 class WorkloadLevel(enum.Enum):
     """Enum for workload levels in course reviews."""
     light = 'light'
@@ -18,6 +32,11 @@ class WorkloadLevel(enum.Enum):
         """Returns list of (value, label) tuples for form fields."""
         return [(level.value, level.value.capitalize()) for level in cls]
 
+    @property
+    def rank(self):
+        """Numeric ordering for sorting: light (1) -> medium (2) -> heavy (3)."""
+        return {'light': 1, 'medium': 2, 'heavy': 3}[self.value]
+
 
 class TagSentiment(enum.Enum):
     """Enum for tag sentiment classification."""
@@ -33,7 +52,9 @@ class TagSentiment(enum.Enum):
 # @login_manager.user_loader is the decorator so Flask-Login recognizes the function
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Served from the user cache (see users/loader.py) on most requests
+    from flasknetwork.users.loader import user_cache
+    return user_cache.load(int(user_id))
 
 class User(db.Model, UserMixin): # the *table* name is 'user' by default, not 'User'
     id = db.Column(db.Integer, primary_key=True)
@@ -168,6 +189,8 @@ class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
     date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    # Last modification (ratings, content or tags); part of the post card cache key
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     year_taken = db.Column(db.Integer, nullable=False)
     
     # Rating categories (professor, material, peers: 1-5 scale; workload: enum)
@@ -176,6 +199,11 @@ class Post(db.Model):
     rating_material = db.Column(db.Integer, nullable=False)     # Material & interestingness
     rating_workload = db.Column(db.Enum(WorkloadLevel), nullable=False)  # Workload level
     rating_peers = db.Column(db.Integer, nullable=False)        # Students/peers experience
+
+    # Stored sort keys so "top" and "workload" orderings can use indexes.
+    # Kept in sync with the ratings above by the before_insert/before_update listener below.
+    rating_sum = db.Column(db.Integer, nullable=False)      # professor + material + peers (orders like Post.rating)
+    workload_rank = db.Column(db.Integer, nullable=False)   # WorkloadLevel.rank
     
     # Single general comment field
     content = db.Column(db.Text, nullable=True)
@@ -248,11 +276,57 @@ class Post(db.Model):
         
         return " ".join(words[:max_words]) + "..."
 
+    def touch(self):
+        """
+        Mark the post as modified. Needed when only its tags change,
+        since that doesn't UPDATE the post row itself.
+        """
+        self.updated_at = datetime.utcnow()
+
+    def sync_sort_keys(self):
+        """Recompute the stored sort keys from the rating columns."""
+        if None not in (self.rating_professor, self.rating_material, self.rating_peers):
+            self.rating_sum = self.rating_professor + self.rating_material + self.rating_peers
+        if self.rating_workload is not None:
+            self.workload_rank = WorkloadLevel(self.rating_workload).rank
+
     def __repr__(self):
         author = self.author.username if self.author else "None"
         course = self.course.name if self.course else "None"
         return f"Post(id={self.id}, author='{author}', course='{course}', rating={self.rating})"
 
+
+@db.event.listens_for(Post, 'before_insert')
+@db.event.listens_for(Post, 'before_update')
+def _sync_post_sort_keys(mapper, connection, post):
+    post.sync_sort_keys()
+
+
+def _create_post_sort_indexes():
+    """
+    Composite indexes backing every sort option of get_sorted_posts on every listing:
+    the home feed (no filter), course detail (course_id) and user pages (user_id).
+    Each ends with date_posted, the tiebreaker of every ordering; workload sorts
+    ascending with newest first, so its indexes store date_posted descending.
+    """
+    for scope in (None, 'course_id', 'user_id'):
+        for key in ('date_posted', 'rating_sum', 'rating_professor', 'rating_material',
+                    'rating_peers', 'workload_rank'):
+            if scope is None and key == 'date_posted':
+                continue  # already covered by ix_post_date_posted
+            columns = [getattr(Post, scope)] if scope else []
+            if key == 'date_posted':
+                columns.append(Post.date_posted)
+            elif key == 'workload_rank':
+                columns += [Post.workload_rank, Post.date_posted.desc()]
+            else:
+                columns += [getattr(Post, key), Post.date_posted]
+            name = '_'.join(['ix_post', scope[:-len('_id')] if scope else 'all', key])
+            db.Index(name, *columns)
+
+
+_create_post_sort_indexes()
+
 class Program(db.Model):
     id = db.Column(db.Integer, primary_key=True) # or int??
     name = db.Column(db.String(100), nullable=False)
@@ -272,7 +346,8 @@ class Course(db.Model):
     @classmethod
     def search(cls, query, limit=50):
         """
-        Search courses by name or code with case-insensitive matching.
+        Search courses by name or code with case-insensitive matching, ranked by relevance:
+        exact code matches first, then prefix matches, then fuzzy matches.
         Returns courses with review_count attached as attribute.
         
         Args:
@@ -282,6 +357,27 @@ class Course(db.Model):
         Returns:
             List[Course]: List of Course objects with review_count attribute
             
+        Raises:
+            ValueError: If query is invalid
+        """
+        from flasknetwork.courses.search import get_search_backend
+
+        sanitized_query = cls.sanitize_search_query(query)
+        
+        # Index-backed search on PostgreSQL (pg_trgm) and SQLite (FTS5), see courses/search.py
+        return get_search_backend().search(sanitized_query, max(1, min(limit, 100)))
+    
+    @staticmethod
+    def sanitize_search_query(query):
+        """
+        Validate and normalize a course search query.
+        
+        Args:
+            query (str): Raw search term from the request
+            
+        Returns:
+            str: Stripped query, at most 100 characters
+            
         Raises:
             ValueError: If query is invalid
         """
@@ -294,29 +390,7 @@ class Course(db.Model):
         if len(sanitized_query) < 2:
             raise ValueError("Search query must be at least 2 characters long")
         
-        # Use ilike for case-insensitive search with wildcards
-        search_filter = db.or_(
-            cls.name.ilike(f'%{sanitized_query}%'),
-            cls.code.ilike(f'%{sanitized_query}%')
-        )
-        
-        # Batch review counts using LEFT JOIN and GROUP BY
-        results = db.session.query(
-            cls,
-            func.count(Post.id).label('review_count')
-        ).outerjoin(Post, cls.id == Post.course_id)\
-         .filter(search_filter)\
-         .group_by(cls.id)\
-         .order_by(cls.name)\
-         .limit(max(1, min(limit, 100))).all()
-        
-        # Attach review_count to each course object
-        courses = []
-        for course, count in results:
-            course.review_count = count or 0
-            courses.append(course)
-        
-        return courses
+        return sanitized_query
     
     @classmethod
     def get_all(cls, limit=20, offset=0):
@@ -334,13 +408,12 @@ class Course(db.Model):
         limit = max(1, min(limit, 100))
         offset = max(0, offset)
         
-        # Batch review counts using LEFT JOIN and GROUP BY
+        # Review counts come from the course_stats rollup (one row per course)
         # Fetch one extra to check if there are more results
         results = db.session.query(
             cls,
-            func.count(Post.id).label('review_count')
-        ).outerjoin(Post, cls.id == Post.course_id)\
-         .group_by(cls.id)\
+            CourseStats.review_count
+        ).outerjoin(CourseStats, cls.id == CourseStats.course_id)\
          .order_by(cls.name)\
          .offset(offset)\
          .limit(limit + 1).all()
@@ -360,13 +433,13 @@ class Course(db.Model):
     def to_dict(self):
         """
         Convert Course instance to dictionary for JSON serialization.
-        Uses pre-attached review_count if available, otherwise queries database.
+        Uses pre-attached review_count if available, otherwise reads course_stats.
         
         Returns:
             dict: Course data as dictionary
         """
         # Use pre-attached review_count if available (from batched queries)
-        # Otherwise fall back to querying database
+        # Otherwise fall back to the course_stats row
         review_count = getattr(self, 'review_count', None)
         if review_count is None:
             review_count = self.get_review_count()
@@ -380,50 +453,246 @@ class Course(db.Model):
 
     def get_review_count(self):
         """
-        Get the total number of reviews for this course efficiently.
+        Get the total number of reviews for this course from the course_stats rollup.
         
         Returns:
             int: Number of reviews for this course
         """
-        return Post.query.filter_by(course_id=self.id).count()
+        return self.stats.review_count if self.stats else 0
 
     def get_average_rating(self):
         """
-        Calculate the average overall rating for this course.
+        Get the average overall rating for this course from the course_stats rollup.
         Computes from 3 rating categories (professor, material, peers).
         Excludes workload since it's a categorical enum, not a numeric scale.
         
         Returns:
             float: Average rating, or None if no reviews exist
         """
-        result = db.session.query(
-            db.func.avg(
-                (Post.rating_professor + Post.rating_material + Post.rating_peers) / 3.0
-            )
-        ).filter_by(course_id=self.id).scalar()
-        return result if result is not None else None
+        return self.stats.average_rating if self.stats else None
 
     def is_reviewed_by(self, user):
-        """Return True if `user` has already reviewed this course."""
+        """
+        Return True if `user` has already reviewed this course.
+        One EXISTS lookup on the one_review_per_course index, memoized for the request.
+        """
         if not user or user.is_anonymous:
             return False
-        return any(r.user_id == user.id for r in self.reviews)
+        return _request_memo(('reviewed', self.id, user.id), lambda: db.session.query(
+            Post.query.filter_by(user_id=user.id, course_id=self.id).exists()).scalar())
 
     def course_is_available_for_program(self, program_id):
         """
         Return True if this course is available for the given program_id.
+        One EXISTS lookup on the uq_course_program index, memoized for the request.
         """
-        return any(cp.program_id == program_id for cp in self.course_programs)
+        if program_id is None:
+            return False
+        return _request_memo(('in_program', self.id, program_id), lambda: db.session.query(
+            Course_Program.query.filter_by(course_id=self.id, program_id=program_id).exists()).scalar())
 
     def __repr__(self):
         return f"Course('{self.id}', '{self.name}', '{self.code}')"
     
 
+class CourseStats(db.Model):
+    """
+    Per-course rollup of review aggregates, maintained incrementally whenever a
+    Post is created, updated or deleted so that browse, search and course detail
+    read one row instead of aggregating the post table.
+    Rebuild from scratch with scripts/course_stats.py if it ever drifts.
+    """
+    __tablename__ = 'course_stats'
+
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    sum_professor = db.Column(db.Integer, nullable=False, default=0)
+    sum_material = db.Column(db.Integer, nullable=False, default=0)
+    sum_peers = db.Column(db.Integer, nullable=False, default=0)
+    workload_light = db.Column(db.Integer, nullable=False, default=0)
+    workload_medium = db.Column(db.Integer, nullable=False, default=0)
+    workload_heavy = db.Column(db.Integer, nullable=False, default=0)
+    # Last time anything shown on the course page changed; validator for conditional GETs
+    last_modified = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    course = db.relationship('Course', backref=db.backref('stats', uselist=False))
+
+    @property
+    def average_rating(self):
+        """Average overall rating (professor, material, peers), or None without reviews."""
+        if not self.review_count:
+            return None
+        return (self.sum_professor + self.sum_material + self.sum_peers) / (3.0 * self.review_count)
+
+    def category_averages(self):
+        """Returns dict of average rating per numeric category, or None without reviews."""
+        if not self.review_count:
+            return None
+        return {
+            'professor': self.sum_professor / self.review_count,
+            'material': self.sum_material / self.review_count,
+            'peers': self.sum_peers / self.review_count,
+        }
+
+    def workload_counts(self):
+        """Returns dict of review count per workload level."""
+        return {
+            WorkloadLevel.light: self.workload_light,
+            WorkloadLevel.medium: self.workload_medium,
+            WorkloadLevel.heavy: self.workload_heavy,
+        }
+
+    @staticmethod
+    def snapshot(post):
+        """
+        Capture the values of a post that feed into the rollup.
+        Take it *before* modifying a post so the old contribution can be removed.
+
+        Returns:
+            tuple: (course_id, rating_professor, rating_material, rating_peers, rating_workload)
+        """
+        return (post.course_id, post.rating_professor, post.rating_material,
+                post.rating_peers, post.rating_workload)
+
+    @classmethod
+    def apply(cls, snapshot, delta):
+        """
+        Add (delta=1) or remove (delta=-1) one post's contribution in the current transaction.
+        Uses a relative UPDATE so concurrent reviews of the same course don't lose increments.
+        If the course has no stats row yet, it is rebuilt from the post table instead,
+        which already includes any flushed changes.
+
+        Args:
+            snapshot (tuple): Values from CourseStats.snapshot()
+            delta (int): 1 to add the post, -1 to remove it
+
+        Returns:
+            bool: True if the course had to be rebuilt
+        """
+        course_id, professor, material, peers, workload = snapshot
+        workload_column = {
+            WorkloadLevel.light: cls.workload_light,
+            WorkloadLevel.medium: cls.workload_medium,
+            WorkloadLevel.heavy: cls.workload_heavy,
+        }[WorkloadLevel(workload)]
+
+        db.session.flush()
+        result = db.session.execute(
+            db.update(cls)
+            .where(cls.course_id == course_id)
+            .values({
+                cls.review_count: cls.review_count + delta,
+                cls.sum_professor: cls.sum_professor + delta * professor,
+                cls.sum_material: cls.sum_material + delta * material,
+                cls.sum_peers: cls.sum_peers + delta * peers,
+                workload_column: workload_column + delta,
+                cls.last_modified: datetime.utcnow(),
+            })
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            cls.rebuild(course_id)
+            return True
+        # Don't serve a stale stats row loaded earlier in this session
+        stats = db.session.identity_map.get(db.session.identity_key(cls, course_id))
+        if stats is not None:
+            db.session.expire(stats)
+        return False
+
+    @classmethod
+    def post_added(cls, post):
+        """Count a newly created post. Call after adding it to the session."""
+        cls.apply(cls.snapshot(post), 1)
+
+    @classmethod
+    def post_removed(cls, post):
+        """Discount a deleted post. Call after db.session.delete(post), before committing."""
+        cls.apply(cls.snapshot(post), -1)
+
+    @classmethod
+    def post_changed(cls, old_snapshot, post):
+        """Move a post's contribution from its old values to its current ones."""
+        new_snapshot = cls.snapshot(post)
+        if new_snapshot == old_snapshot:
+            cls.touch(post.course_id)
+            return
+        rebuilt = cls.apply(old_snapshot, -1)
+        if not (rebuilt and old_snapshot[0] == new_snapshot[0]):
+            # Unless the course rebuild already counted the post's new values
+            cls.apply(new_snapshot, 1)
+
+    @classmethod
+    def touch(cls, course_id):
+        """Mark a course page as modified without changing its aggregates (e.g. a review text edit)."""
+        cls._touch(cls.course_id == course_id)
+
+    @classmethod
+    def touch_courses_of_user(cls, user_id):
+        """Mark every course a user reviewed as modified, e.g. after they changed their avatar."""
+        reviewed = db.select(Post.course_id).where(Post.user_id == user_id)
+        cls._touch(cls.course_id.in_(reviewed))
+
+    @classmethod
+    def _touch(cls, condition):
+        db.session.execute(
+            db.update(cls).where(condition)
+            .values(last_modified=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def _aggregate_query(cls):
+        """SELECT producing one stats row per course that has posts."""
+        def workload_count(level):
+            return func.coalesce(func.sum(db.case((Post.rating_workload == level, 1), else_=0)), 0)
+
+        return db.select(
+            Post.course_id,
+            func.count(Post.id),
+            func.coalesce(func.sum(Post.rating_professor), 0),
+            func.coalesce(func.sum(Post.rating_material), 0),
+            func.coalesce(func.sum(Post.rating_peers), 0),
+            workload_count(WorkloadLevel.light),
+            workload_count(WorkloadLevel.medium),
+            workload_count(WorkloadLevel.heavy),
+        ).group_by(Post.course_id)
+
+    @classmethod
+    def rebuild(cls, course_id=None):
+        """
+        Recompute stats from the post table, for one course or (course_id=None) all of them.
+        Runs in the current transaction; the caller commits.
+
+        Returns:
+            int: Number of stats rows written
+        """
+        columns = ['course_id', 'review_count', 'sum_professor', 'sum_material', 'sum_peers',
+                   'workload_light', 'workload_medium', 'workload_heavy', 'last_modified']
+        # A rebuilt course page last changed when its most recent review did
+        aggregate = cls._aggregate_query().add_columns(func.max(Post.updated_at))
+        delete = db.delete(cls)
+        if course_id is not None:
+            aggregate = aggregate.where(Post.course_id == course_id)
+            delete = delete.where(cls.course_id == course_id)
+
+        db.session.flush()
+        db.session.execute(delete.execution_options(synchronize_session=False))
+        result = db.session.execute(db.insert(cls).from_select(columns, aggregate))
+        db.session.expire_all()
+        return result.rowcount
+
+    def __repr__(self):
+        return f"CourseStats(course_id={self.course_id}, reviews={self.review_count})"
+
+
 class Course_Program(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     program_id = db.Column(db.Integer, db.ForeignKey('program.id'), nullable=False)
 
+    # Lets catalog ingestion upsert links with ON CONFLICT DO NOTHING
+    __table_args__ = (db.UniqueConstraint('course_id', 'program_id', name='uq_course_program'),)
+
     course = db.relationship('Course', backref='course_programs')
     program = db.relationship('Program', backref='course_programs')
 
@@ -435,6 +704,240 @@ class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False, unique=True)
     sentiment = db.Column(db.Enum(TagSentiment), nullable=False)
+    # Number of posts carrying the tag, maintained together with CourseTagStats
+    post_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f"Tag('{self.name}', sentiment='{self.sentiment.value}')"
+
+
+class CourseTagStats(db.Model):
+    """
+    Per-(course, tag) rollup of how many reviews of a course carry a tag, plus the global
+    Tag.post_count. Maintained incrementally whenever a post's tags change (like CourseStats),
+    so a course's top tags are one primary-key range read instead of a post_tags scan.
+    Rebuild from scratch with scripts/course_stats.py if it ever drifts.
+    """
+    __tablename__ = 'course_tag_stats'
+
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+    post_count = db.Column(db.Integer, nullable=False, default=0)
+
+    tag = db.relationship('Tag')
+
+    @staticmethod
+    def snapshot(post):
+        """
+        Capture the course and tags of a post. Take it *before* changing the post's
+        course or tags so the old contribution can be removed.
+
+        Returns:
+            tuple: (course_id, frozenset of tag ids)
+        """
+        return (post.course_id, frozenset(tag.id for tag in post.tags))
+
+    @classmethod
+    def apply(cls, snapshot, delta):
+        """
+        Add (delta=1) or remove (delta=-1) one post's tags in the current transaction,
+        with relative UPDATEs so concurrent reviews don't lose increments. If a
+        (course, tag) row doesn't exist yet the course is rebuilt from post_tags instead,
+        which already includes any flushed changes.
+
+        Args:
+            snapshot (tuple): Values from CourseTagStats.snapshot()
+            delta (int): 1 to add the post, -1 to remove it
+
+        Returns:
+            bool: True if the course had to be rebuilt
+        """
+        course_id, tag_ids = snapshot
+        if not tag_ids:
+            return False
+
+        db.session.flush()
+        cls._count_tags(tag_ids, delta)
+        result = db.session.execute(
+            db.update(cls)
+            .where(cls.course_id == course_id, cls.tag_id.in_(tag_ids))
+            .values(post_count=cls.post_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(tag_ids):
+            cls.rebuild(course_id, tag_counts=False)
+            return True
+
+        # Don't serve a stale count loaded earlier in this session
+        for tag_id in tag_ids:
+            stats = db.session.identity_map.get(db.session.identity_key(cls, (course_id, tag_id)))
+            if stats is not None:
+                db.session.expire(stats, ['post_count'])
+        return False
+
+    @staticmethod
+    def _count_tags(tag_ids, delta):
+        """Adjust the global Tag.post_count of tag_ids by delta."""
+        if not tag_ids:
+            return
+        db.session.execute(
+            db.update(Tag).where(Tag.id.in_(tag_ids))
+            .values(post_count=Tag.post_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+        for tag_id in tag_ids:
+            tag = db.session.identity_map.get(db.session.identity_key(Tag, tag_id))
+            if tag is not None:
+                db.session.expire(tag, ['post_count'])
+
+    @classmethod
+    def post_added(cls, post):
+        """Count the tags of a newly created post. Call after assigning its tags."""
+        cls.apply(cls.snapshot(post), 1)
+
+    @classmethod
+    def post_removed(cls, post):
+        """Discount a deleted post. Call after db.session.delete(post), before committing."""
+        cls.apply(cls.snapshot(post), -1)
+
+    @classmethod
+    def post_changed(cls, old_snapshot, post):
+        """Move a post's contribution from its old course and tags to its current ones."""
+        new_snapshot = cls.snapshot(post)
+        if new_snapshot == old_snapshot:
+            return
+        old_course, old_tags = old_snapshot
+        new_course, new_tags = new_snapshot
+        if old_course == new_course:
+            # Only the tags that were removed or added change
+            removed, added = old_tags - new_tags, new_tags - old_tags
+            if cls.apply((old_course, removed), -1):
+                # The course rebuild already counted the added tags
+                cls._count_tags(added, 1)
+            else:
+                cls.apply((new_course, added), 1)
+        else:
+            cls.apply(old_snapshot, -1)
+            cls.apply(new_snapshot, 1)
+
+    @classmethod
+    def top_for_course(cls, course_id, limit=5):
+        """
+        Return the course's most used tags as [(Tag, count)], most used first.
+        One read on the (course_id, tag_id) primary key joined to the tag table.
+        """
+        rows = db.session.query(Tag, cls.post_count)\
+            .join(cls, cls.tag_id == Tag.id)\
+            .filter(cls.course_id == course_id, cls.post_count > 0)\
+            .order_by(cls.post_count.desc(), Tag.name)\
+            .limit(limit).all()
+        return [(tag, count) for tag, count in rows]
+
+    @classmethod
+    def _aggregate_query(cls):
+        """SELECT producing one (course_id, tag_id, count) row per tag used on a course."""
+        return db.select(Post.course_id, post_tags.c.tag_id, func.count())\
+            .join(post_tags, post_tags.c.post_id == Post.id)\
+            .group_by(Post.course_id, post_tags.c.tag_id)
+
+    @classmethod
+    def rebuild(cls, course_id=None, tag_counts=True):
+        """
+        Recompute the rollup from post_tags, for one course or (course_id=None) all of them,
+        and with tag_counts the global Tag.post_count as well.
+        Runs in the current transaction; the caller commits.
+
+        Returns:
+            int: Number of (course, tag) rows written
+        """
+        aggregate = cls._aggregate_query()
+        delete = db.delete(cls)
+        if course_id is not None:
+            aggregate = aggregate.where(Post.course_id == course_id)
+            delete = delete.where(cls.course_id == course_id)
+
+        db.session.flush()
+        db.session.execute(delete.execution_options(synchronize_session=False))
+        result = db.session.execute(
+            db.insert(cls).from_select(['course_id', 'tag_id', 'post_count'], aggregate))
+        if tag_counts:
+            usage = db.select(func.count()).where(post_tags.c.tag_id == Tag.id).scalar_subquery()
+            db.session.execute(db.update(Tag).values(post_count=usage)
+                               .execution_options(synchronize_session=False))
+        db.session.expire_all()
+        return result.rowcount
+
+    def __repr__(self):
+        return f"CourseTagStats(course_id={self.course_id}, tag_id={self.tag_id}, posts={self.post_count})"
+
+
+class CacheVersion(db.Model):
+    """
+    Version counters for data that worker processes cache in memory (e.g. the course catalog).
+    Whoever changes the underlying data bumps the counter in the same transaction;
+    caches compare it with the version they were built from and rebuild when it moved.
+    """
+    __tablename__ = 'cache_version'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @classmethod
+    def get(cls, name):
+        """Return the current version of `name` (0 if it was never bumped)."""
+        version = db.session.query(cls.version).filter_by(name=name).scalar()
+        return version or 0
+
+    @classmethod
+    def get_marker(cls, name):
+        """Return (version, updated_at) of `name`, or (0, None) if it was never bumped."""
+        row = db.session.query(cls.version, cls.updated_at).filter_by(name=name).first()
+        return tuple(row) if row else (0, None)
+
+    @classmethod
+    def bump(cls, name):
+        """Increment the version of `name` in the current transaction; the caller commits."""
+        result = db.session.execute(
+            db.update(cls).where(cls.name == name)
+            .values(version=cls.version + 1, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            db.session.add(cls(name=name, version=1))
+
+    def __repr__(self):
+        return f"CacheVersion('{self.name}', {self.version})"
+
+class OutboxEmail(db.Model):
+    """
+    Email waiting to be delivered by the outbox sender (see flasknetwork/outbox.py).
+    Routes only insert rows; delivery, retries and dead-lettering happen in the background.
+    """
+    __tablename__ = 'email_outbox'
+
+    PENDING, SENT, DEAD = 'pending', 'sent', 'dead'
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.Text, nullable=False)  # comma separated
+    body = db.Column(db.Text)
+    html = db.Column(db.Text)
+    status = db.Column(db.String(10), nullable=False, default=PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # When a pending email is next due; also pushed forward while a sender holds it
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    @property
+    def recipient_list(self):
+        return [address for address in self.recipients.split(',') if address]
 
     def __repr__(self):
-        return f"Tag('{self.name}', sentiment='{self.sentiment.value}')"
\ No newline at end of file
+        return f"OutboxEmail({self.id}, '{self.subject}', {self.status}, attempts={self.attempts})"
@@ -0,0 +1,276 @@
+import random
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, func
+from flasknetwork import db
+from flasknetwork.models import OutboxEmail
+
+
+def enqueue(message):
+    """
+    Queue a flask_mail.Message for background delivery.
+    Adds the row to the current session; the caller commits, so the email is only sent
+    if the change that triggered it is committed too.
+    """
+    email = OutboxEmail(
+        subject=message.subject,
+        sender=message.sender if isinstance(message.sender, str) else '{} <{}>'.format(*message.sender),
+        recipients=','.join(message.recipients),
+        body=message.body,
+        html=message.html,
+    )
+    db.session.add(email)
+    # Wake the sender once the email is committed
+    event.listen(db.session(), 'after_commit', lambda session: outbox_sender.notify(), once=True)
+    return email
+
+
+def queue_depth():
+    """Return {status: count} for the outbox."""
+    counts = dict(db.session.query(OutboxEmail.status, func.count(OutboxEmail.id))
+                  .group_by(OutboxEmail.status).all())
+    return {status: counts.get(status, 0) for status in (OutboxEmail.PENDING, OutboxEmail.SENT, OutboxEmail.DEAD)}
+
+
+class SmtpUnavailable(Exception):
+    """
+    The SMTP session itself failed (connect, STARTTLS, login, HELO or a refused sender),
+    so no email can be sent until the server or the credentials are fixed.
+    """
+
+
+class SmtpConnection:
+    """
+    One SMTP connection, opened on first use and kept open across batches
+    until it has been idle for OUTBOX_SMTP_IDLE_TIMEOUT seconds.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.host = None
+        self.last_used = 0.0
+
+    def send(self, email):
+        from flask_mail import Message
+
+        message = Message(email.subject, sender=email.sender, recipients=email.recipient_list,
+                          body=email.body, html=email.html)
+        try:
+            try:
+                self._connection().sendmail(message.sender, message.send_to, message.as_bytes())
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle connection: reconnect once
+                self.close()
+                self._connection().sendmail(message.sender, message.send_to, message.as_bytes())
+        except (smtplib.SMTPHeloError, smtplib.SMTPSenderRefused) as e:
+            # Replies to the session's first commands, the same for every email
+            raise SmtpUnavailable(f"{type(e).__name__}: {e}") from e
+        self.last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self.host and time.monotonic() - self.last_used > self.config.get('OUTBOX_SMTP_IDLE_TIMEOUT', 30):
+            self.close()
+
+    def close(self):
+        if self.host:
+            try:
+                self.host.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.host = None
+
+    def _connection(self):
+        if self.host is None:
+            config = self.config
+            smtp_class = smtplib.SMTP_SSL if config.get('MAIL_USE_SSL') else smtplib.SMTP
+            host = None
+            try:
+                host = smtp_class(config['MAIL_SERVER'], config['MAIL_PORT'],
+                                  timeout=config.get('OUTBOX_SMTP_TIMEOUT', 30))
+                if config.get('MAIL_USE_TLS'):
+                    host.starttls()
+                if config.get('MAIL_USERNAME') and config.get('MAIL_PASSWORD'):
+                    host.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+            except (smtplib.SMTPException, OSError) as e:
+                if host is not None:
+                    host.close()
+                raise SmtpUnavailable(f"{type(e).__name__}: {e}") from e
+            self.host = host
+            self.last_used = time.monotonic()
+        return self.host
+
+
+class OutboxSender:
+    """
+    Delivers queued emails over one reused SMTP connection, with retries and dead-lettering.
+
+    Due emails are claimed in batches (FOR UPDATE SKIP LOCKED on PostgreSQL, so several
+    senders can run at once) by pushing their next_attempt_at forward by a lease, then sent
+    one by one. Temporary failures are retried with exponential backoff and jitter; emails
+    the server rejects for good (5xx replies to their recipients or data) and emails that
+    used up OUTBOX_MAX_ATTEMPTS are marked dead, for inspection and requeueing with
+    scripts/outbox.py. When the SMTP session itself fails (connect, STARTTLS, login, refused
+    sender) the rest of the batch is put back without using up attempts, and the sender backs
+    off exponentially until a send succeeds. Delivery is at least once: an email whose sender
+    died mid-send is retried once its lease expires.
+
+    OUTBOX_SENDER selects where the sender runs:
+        'thread'   (default) a daemon thread in each web process, started on the first request
+        'external' only scripts/outbox.py run (e.g. a separate worker service)
+    With MAIL_SUPPRESS_SEND set (as in testing), emails are marked sent without connecting.
+
+    Configuration:
+        OUTBOX_BATCH_SIZE: emails claimed per batch
+        OUTBOX_POLL_INTERVAL: seconds between checks when the queue is empty
+        OUTBOX_MAX_ATTEMPTS: attempts before an email is dead-lettered
+        OUTBOX_RETRY_BASE / OUTBOX_RETRY_MAX: backoff in seconds (base * 2^attempt, capped)
+        OUTBOX_LEASE: seconds a claimed email is hidden from other senders
+    """
+
+    def __init__(self):
+        self.app = None
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        # Consecutive batches stopped by SmtpUnavailable, for the backoff
+        self._session_failures = 0
+
+    def init_app(self, app):
+        self.app = app
+        if app.config.get('OUTBOX_SENDER', 'thread') == 'thread':
+            app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        """Start the sender thread in this process if it isn't running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run, name='outbox-sender', daemon=True)
+                self._thread.start()
+
+    def notify(self):
+        """Wake the sender thread, e.g. after queueing an email."""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def run(self):
+        """Deliver emails until stop() is called."""
+        connection = SmtpConnection(self.app.config)
+        poll_interval = self.app.config.get('OUTBOX_POLL_INTERVAL', 5)
+        try:
+            while not self._stop.is_set():
+                with self.app.app_context():
+                    try:
+                        sent = self.process_batch(connection)
+                    except Exception as e:
+                        self.app.logger.error(f"Outbox sender error: {e}")
+                        db.session.rollback()
+                        sent = 0
+                    finally:
+                        db.session.remove()
+                if not sent:
+                    connection.close_if_idle()
+                    self._wakeup.wait(poll_interval)
+                    self._wakeup.clear()
+        finally:
+            connection.close()
+
+    def process_batch(self, connection=None):
+        """
+        Claim and send one batch of due emails. Requires an app context.
+
+        Returns:
+            int: Number of emails handled (sent, rescheduled or dead-lettered)
+        """
+        config = current_app.config
+        own_connection = connection is None
+        connection = connection or SmtpConnection(config)
+
+        batch = self._claim(config.get('OUTBOX_BATCH_SIZE', 20), config.get('OUTBOX_LEASE', 300))
+        try:
+            for i, email in enumerate(batch):
+                try:
+                    if not config.get('MAIL_SUPPRESS_SEND', current_app.testing):
+                        connection.send(email)
+                except SmtpUnavailable as e:
+                    connection.close()
+                    self._defer(batch[i:], e, config)
+                    db.session.commit()
+                    break
+                except (smtplib.SMTPException, OSError) as e:
+                    connection.close()
+                    self._failed(email, e, config)
+                else:
+                    email.status = OutboxEmail.SENT
+                    email.sent_at = datetime.utcnow()
+                    email.attempts += 1
+                    email.last_error = None
+                    self._session_failures = 0
+                # Record each outcome right away so a crash never resends delivered emails
+                db.session.commit()
+        finally:
+            if own_connection:
+                connection.close()
+        return len(batch)
+
+    @staticmethod
+    def _claim(batch_size, lease):
+        now = datetime.utcnow()
+        batch = db.session.execute(
+            db.select(OutboxEmail)
+            .where(OutboxEmail.status == OutboxEmail.PENDING, OutboxEmail.next_attempt_at <= now)
+            .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        for email in batch:
+            email.next_attempt_at = now + timedelta(seconds=lease)
+        db.session.commit()
+        return batch
+
+    def _defer(self, emails, error, config):
+        """Put emails back without counting an attempt, after the SMTP session failed."""
+        self._session_failures += 1
+        delay = min(config.get('OUTBOX_RETRY_BASE', 30) * 2 ** (self._session_failures - 1),
+                    config.get('OUTBOX_RETRY_MAX', 3600))
+        delay *= random.uniform(0.8, 1.2)
+        next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        for email in emails:
+            email.next_attempt_at = next_attempt_at
+            email.last_error = str(error)[:2000]
+        current_app.logger.error(f"SMTP server unavailable ({self._session_failures} times in a row), "
+                                 f"deferring {len(emails)} emails by {delay:.0f}s: {error}")
+
+    @staticmethod
+    def _failed(email, error, config):
+        email.attempts += 1
+        email.last_error = f"{type(error).__name__}: {error}"[:2000]
+        # Only the server's verdict on this email's recipients or content is final
+        permanent = isinstance(error, smtplib.SMTPDataError) and error.smtp_code >= 500
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            permanent = all(code >= 500 for code, _ in error.recipients.values())
+
+        if permanent or email.attempts >= config.get('OUTBOX_MAX_ATTEMPTS', 8):
+            email.status = OutboxEmail.DEAD
+            current_app.logger.error(f"Outbox email {email.id} dead-lettered after "
+                                     f"{email.attempts} attempts: {email.last_error}")
+            return
+
+        delay = min(config.get('OUTBOX_RETRY_BASE', 30) * 2 ** (email.attempts - 1),
+                    config.get('OUTBOX_RETRY_MAX', 3600))
+        delay *= random.uniform(0.8, 1.2)
+        email.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        current_app.logger.warning(f"Outbox email {email.id} failed (attempt {email.attempts}), "
+                                   f"retrying in {delay:.0f}s: {email.last_error}")
+
+
+outbox_sender = OutboxSender()
@@ -3,7 +3,10 @@ from wtforms import StringField, TextAreaField, SubmitField, SelectField, Intege
 from wtforms.validators import DataRequired, Length, NumberRange, ValidationError, Optional
 from wtforms.widgets import Select as BaseSelectWidget, html_params, ListWidget, CheckboxInput
 from markupsafe import escape, Markup
-from flasknetwork.models import Course_Program, Post, WorkloadLevel, Tag
+from flasknetwork import db
+from flasknetwork.models import Post, WorkloadLevel
+from flasknetwork.courses.programs import program_courses
+from flasknetwork.posts.tags import tag_registry
 from flask_login import current_user
 
 
@@ -27,7 +30,14 @@ class SelectOptGroupWidget(BaseSelectWidget):
     def __call__(self, field, **kwargs):
         kwargs.setdefault('id', field.id)
         html = ['<select %s>' % html_params(name=field.name, **kwargs)]
-        
+
+        # Choices taken from a cached program course list reuse its pre-rendered options
+        program = getattr(field, 'program_courses', None)
+        if program is not None:
+            html.append(program.render_options(field.choices, field.data))
+            html.append('</select>')
+            return Markup(''.join(html))
+
         for item in field.choices:
             if isinstance(item, (list, tuple)) and len(item) == 2:
                 group_label, choices = item
@@ -118,17 +128,16 @@ class PostForm(FlaskForm):
         self.tags.choices = self.build_tag_choices()
 
     def build_tag_choices(self):
-        """Returns the choices list for the tags field."""
+        """Returns the choices list for the tags field (from the in-memory tag registry)."""
         try:
-            tags = Tag.query.order_by(Tag.name).all()
-            return [(tag.id, tag.name) for tag in tags]
+            return tag_registry.choices()
         except Exception:
             return []
 
     def get_tags_with_sentiment(self):
-        """Returns list of Tag objects with sentiment for template rendering."""
+        """Returns tags (id, name, sentiment) sorted by name for template rendering."""
         try:
-            return Tag.query.order_by(Tag.name).all()
+            return tag_registry.all()
         except Exception:
             return []
 
@@ -142,33 +151,23 @@ class PostForm(FlaskForm):
         if not current_user.is_authenticated:
             return []
         try:
-            user_program_id = current_user.program_id
-            available_courses = [
-                cp.course for cp in 
-                Course_Program.query.filter_by(program_id=user_program_id).all()
-            ]
-            if not available_courses:
+            # The program's courses come from a per-process cache (one query after a catalog
+            # change); only the user's reviewed course ids are read per request
+            program = program_courses.get(current_user.program_id)
+            if not program:
                 return [('', 'No courses available in your program')]
             reviewed_course_ids = {
-                post.course_id for post in 
-                Post.query.filter_by(user_id=current_user.id).all()
+                course_id for (course_id,) in
+                db.session.query(Post.course_id).filter_by(user_id=current_user.id)
             }
-            unreviewed_courses = []
-            reviewed_courses = []
-            for course in available_courses:
-                course_choice = (course.id, f"{course.name} ({course.code})")
-                if course.id in reviewed_course_ids:
-                    reviewed_courses.append(course_choice)
-                else:
-                    unreviewed_courses.append(course_choice)
+            unreviewed_courses, reviewed_courses = program.partition(reviewed_course_ids)
+            self.course.program_courses = program
             choices = []
             if unreviewed_courses:
                 choices.append(('Courses to Review', unreviewed_courses))
             if reviewed_courses:
                 choices.append(('Already Reviewed Courses', reviewed_courses))
-            if not unreviewed_courses and not reviewed_courses:
-                choices = [('', 'No courses available')]
-            elif not unreviewed_courses:
+            if not unreviewed_courses:
                 choices = [('All Courses Reviewed', reviewed_courses)]
             return choices
         except Exception:
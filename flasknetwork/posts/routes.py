@@ -1,9 +1,13 @@
 from urllib.parse import urlparse
 from flask import (render_template, url_for, flash, redirect, request, abort, Blueprint)
 from flask_login import current_user, login_required
+from sqlalchemy.exc import IntegrityError
 from flasknetwork import db
-from flasknetwork.models import Post, WorkloadLevel, Tag
+from flasknetwork.models import Post, WorkloadLevel, CourseStats, CourseTagStats, CacheVersion
 from flasknetwork.posts.forms import PostForm
+from flasknetwork.posts.tags import tag_registry
+from flasknetwork.main.fragments import post_card_cache
+from flasknetwork.main.conditional import FEED_VERSION
 
 posts = Blueprint('posts', __name__)
 
@@ -33,6 +37,24 @@ class BackLinkResolver:
         return target.startswith('/') and not parsed.netloc
 
 
+def reject_deleted_tags(form):
+    """
+    After a review failed to save (and was rolled back): if it used tags that were deleted
+    while this worker's tag registry still offered them, drop them from the form and ask the
+    user to submit again.
+
+    Returns:
+        bool: True if deleted tags were the problem
+    """
+    deleted = tag_registry.stale(form.tags.data or [])
+    if not deleted:
+        return False
+    form.tags.choices = form.build_tag_choices()
+    form.tags.data = [tag_id for tag_id in form.tags.data if tag_id not in deleted]
+    form.tags.errors.append('A tag you selected no longer exists. Please check your tags and submit again.')
+    return True
+
+
 @posts.route('/post/new', methods=['GET', 'POST'])
 @login_required
 def new_post():
@@ -55,18 +77,29 @@ def new_post():
                 rating_material=form.rating_material.data,
                 rating_workload=WorkloadLevel(form.rating_workload.data),
                 rating_peers=form.rating_peers.data,
-                content=form.content.data.strip() if form.content.data else None
+                content=form.content.data.strip() if form.content.data else None,
+                # Tags come from the in-memory registry; set before the first flush so the
+                # (empty) collection of the new post is never loaded
+                tags=tag_registry.resolve(form.tags.data or [])
             )
-            db.session.add(post)
-            db.session.flush()  # Flush to get post.id before assigning tags
-            
-            # Assign tags if provided
-            if form.tags.data:
-                post.tags = Tag.query.filter(Tag.id.in_(form.tags.data)).all()
-            
-            db.session.commit()
-            flash('Thank you for sharing your review! Your feedback helps fellow students <33', 'success')
-            return redirect(url_for('main.home'))
+            try:
+                db.session.add(post)
+
+                # Keep the per-course rollups in the same transaction
+                CourseStats.post_added(post)
+                CourseTagStats.post_added(post)
+                CacheVersion.bump(FEED_VERSION)
+                # Read before the commit expires the post (reloading it would reload its tags)
+                post_id = post.id
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                if not reject_deleted_tags(form):
+                    raise
+            else:
+                post_card_cache.invalidate(post_id)
+                flash('Thank you for sharing your review! Your feedback helps fellow students <33', 'success')
+                return redirect(url_for('main.home'))
     elif request.method == 'GET':
         course_id = request.args.get('course_id', type=int)
         if course_id:
@@ -105,6 +138,8 @@ def update_post(post_id):
         if dup and dup.id != post.id:
             form.course.errors.append("You've already reviewed this course.")
         else:
+            old_stats = CourseStats.snapshot(post)
+            old_tags = CourseTagStats.snapshot(post)
             post.course_id = form.course.data
 
             post.year_taken = form.year_taken.data
@@ -117,13 +152,24 @@ def update_post(post_id):
             
             # Update tags
             if form.tags.data:
-                post.tags = Tag.query.filter(Tag.id.in_(form.tags.data)).all()
+                post.tags = tag_registry.resolve(form.tags.data)
             else:
                 post.tags = []
             
-            db.session.commit()
-            flash('Your post has been updated!', 'success')
-            return redirect(url_for('posts.post', post_id=post.id))
+            try:
+                post.touch()
+                CourseStats.post_changed(old_stats, post)
+                CourseTagStats.post_changed(old_tags, post)
+                CacheVersion.bump(FEED_VERSION)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                if not reject_deleted_tags(form):
+                    raise
+            else:
+                post_card_cache.invalidate(post_id)
+                flash('Your post has been updated!', 'success')
+                return redirect(url_for('posts.post', post_id=post_id))
     elif request.method == 'GET':
         form.course.data = post.course_id
 
@@ -146,6 +192,10 @@ def delete_post(post_id):
     if post.author != current_user:
         abort(403)
     db.session.delete(post)
+    CourseTagStats.post_removed(post)
+    CourseStats.post_removed(post)
+    CacheVersion.bump(FEED_VERSION)
     db.session.commit()
+    post_card_cache.invalidate(post_id)
     flash('Your post has been deleted!', 'success')
     return redirect(url_for('main.home'))
\ No newline at end of file
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+from flasknetwork import db
+from flasknetwork.models import Tag, CacheVersion
+
+
+# Bumped by anything that adds, renames or deletes tags (scripts/tags.py, scripts/manage_tags.py)
+TAG_VERSION = 'tags'
+
+TagEntry = namedtuple('TagEntry', 'id name sentiment')
+
+
+class TagRegistryIndex:
+    """Immutable snapshot of the tag table, sorted by name."""
+
+    def __init__(self, entries, version):
+        self.version = version
+        self.entries = tuple(sorted(entries, key=lambda e: e.name))
+        self.by_id = {entry.id: entry for entry in self.entries}
+        self.choices = [(entry.id, entry.name) for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TagRegistry:
+    """
+    Per-process holder of the current TagRegistryIndex, so building a review form and
+    assigning tags to a post don't query the tag table.
+
+    Like the course catalog (courses/catalog.py), the snapshot is built on first use and
+    at most every TAG_REGISTRY_CHECK_INTERVAL seconds one request re-reads TAG_VERSION,
+    rebuilding the snapshot if it moved.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_index(self):
+        """Return the current snapshot, building or refreshing it when due."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._build()
+                    self._checked_at = time.monotonic()
+            return self._index
+
+        interval = current_app.config.get('TAG_REGISTRY_CHECK_INTERVAL', 30)
+        if time.monotonic() - self._checked_at >= interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked_at = time.monotonic()
+                version = CacheVersion.get(TAG_VERSION)
+                if version != self._index.version:
+                    self._index = self._build(version)
+            finally:
+                self._lock.release()
+        return self._index
+
+    def invalidate(self):
+        """Force a version check on the next lookup (e.g. after this process changed the tags)."""
+        self._checked_at = 0.0
+
+    def stale(self, tag_ids):
+        """
+        Of tag_ids, the ones whose row is gone: tags deleted (scripts/manage_tags.py) while
+        this worker still had them in its snapshot. Queries the tag table, so it is only meant
+        for a commit that failed on the post_tags foreign key; rebuilds the snapshot when
+        any are found.
+
+        Returns:
+            set: The deleted tag ids
+        """
+        tag_ids = set(tag_ids)
+        if not tag_ids:
+            return set()
+        existing = {tag_id for (tag_id,) in db.session.query(Tag.id).filter(Tag.id.in_(tag_ids))}
+        stale = tag_ids - existing
+        if stale:
+            with self._lock:
+                self._index = self._build()
+                self._checked_at = time.monotonic()
+        return stale
+
+    def all(self):
+        """All tags as TagEntry tuples, sorted by name."""
+        return self.get_index().entries
+
+    def choices(self):
+        """(id, name) choices for a tags field."""
+        return self.get_index().choices
+
+    def resolve(self, tag_ids):
+        """
+        Return Tag instances attached to the current session for tag_ids (unknown ids are
+        skipped), without querying: each is merged into the session from the snapshot.
+        A tag deleted since the snapshot was taken fails the commit instead (see stale()).
+        """
+        by_id = self.get_index().by_id
+        tags = []
+        for tag_id in dict.fromkeys(tag_ids):
+            entry = by_id.get(tag_id)
+            if entry is None:
+                continue
+            tag = Tag(id=entry.id, name=entry.name, sentiment=entry.sentiment)
+            make_transient_to_detached(tag)
+            tags.append(db.session.merge(tag, load=False))
+        return tags
+
+    @staticmethod
+    def _build(version=None):
+        if version is None:
+            version = CacheVersion.get(TAG_VERSION)
+        rows = db.session.query(Tag.id, Tag.name, Tag.sentiment).all()
+        index = TagRegistryIndex([TagEntry(*row) for row in rows], version)
+        current_app.logger.info(f"Built tag registry: {len(index)} tags, version {version}")
+        return index
+
+
+tag_registry = TagRegistry()
@@ -0,0 +1,226 @@
+import os
+import sys
+import threading
+import time
+from flask import current_app, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_ENVIRON_KEY = 'flasknetwork.sql_stats'
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a request issues more statements than its endpoint's budget."""
+
+
+def parse_budgets(value):
+    """
+    Parse per-endpoint query budgets from 'endpoint=max,endpoint=max' (or pass a dict through).
+
+    Returns:
+        dict: {endpoint: max statements per request}
+    """
+    if isinstance(value, dict):
+        return dict(value)
+    budgets = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            endpoint, limit = item.rsplit('=', 1)
+            budgets[endpoint.strip()] = int(limit)
+    return budgets
+
+
+def _origin():
+    """
+    Where the current statement was issued from: the innermost template line and the
+    innermost line of application code on the stack (either may be None).
+    """
+    template = code = None
+    frame = sys._getframe(1)
+    while frame is not None and (template is None or code is None):
+        if '__jinja_template__' in frame.f_globals:
+            if template is None:
+                compiled = frame.f_globals['__jinja_template__']
+                template = f"{compiled.name or '<string>'}:{compiled.get_corresponding_lineno(frame.f_lineno)}"
+        elif code is None:
+            filename = os.path.abspath(frame.f_code.co_filename)
+            if filename.startswith(_PACKAGE_DIR) and filename != os.path.abspath(__file__):
+                code = f"{os.path.relpath(filename, os.path.dirname(_PACKAGE_DIR))}:{frame.f_lineno} " \
+                       f"in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return template, code
+
+
+class RequestQueries:
+    """Statements issued while handling one request."""
+
+    __slots__ = ('count', 'seconds', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # statement text -> [executions, set of parameter reprs, origin of the first repeat]
+        self.statements = {}
+
+    def record(self, statement, parameters, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, {repr(parameters)}, None]
+            return
+        entry[0] += 1
+        entry[1].add(repr(parameters))
+        if entry[2] is None:
+            # Only repeated statements pay for the stack walk
+            entry[2] = _origin()
+
+    def repeated(self, threshold):
+        """Statements run at least `threshold` times with different parameters (the N+1 signature)."""
+        return [(statement, count, len(params), origin)
+                for statement, (count, params, origin) in self.statements.items()
+                if len(params) >= threshold]
+
+
+class EndpointStats:
+    """Running totals of the statements issued by one endpoint."""
+
+    __slots__ = ('requests', 'statements', 'seconds', 'max_statements', 'n_plus_one')
+
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.seconds = 0.0
+        self.max_statements = 0
+        self.n_plus_one = 0
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'statements': self.statements,
+            'statements_per_request': round(self.statements / self.requests, 2) if self.requests else 0.0,
+            'max_statements': self.max_statements,
+            'db_seconds': round(self.seconds, 4),
+            'n_plus_one': self.n_plus_one,
+        }
+
+
+class SqlInstrumentation:
+    """
+    Request-scoped SQL instrumentation on SQLAlchemy engine events.
+
+    Counts the statements and database time of every request and keeps running totals per
+    endpoint (see report(), served on /internal/sql-stats). Statements executed at least
+    SQL_N_PLUS_ONE_THRESHOLD times in one request with different parameters are logged as
+    likely N+1 queries, with the template line and application code that issued them.
+
+    With SQL_STRICT (for tests and load tests), a request that issues more statements than
+    its endpoint's budget (SQL_QUERY_BUDGETS, falling back to SQL_DEFAULT_QUERY_BUDGET)
+    fails with QueryBudgetExceeded instead of only logging a warning.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.strict = False
+        self.n_plus_one_threshold = 5
+        self.budgets = {}
+        self.default_budget = None
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_INSTRUMENTATION', True)
+        if not self.enabled:
+            return
+        self.strict = app.config.get('SQL_STRICT', False)
+        self.n_plus_one_threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)
+        self.budgets = parse_budgets(app.config.get('SQL_QUERY_BUDGETS'))
+        self.default_budget = app.config.get('SQL_DEFAULT_QUERY_BUDGET')
+
+        if not self._listening:
+            # Listening on the Engine class also covers engines created after this call
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            event.listen(Engine, 'handle_error', self._handle_error)
+            self._listening = True
+        app.after_request(self._after_request)
+
+    @staticmethod
+    def current():
+        """RequestQueries of the current request, or None outside requests."""
+        if not has_request_context():
+            return None
+        return request.environ.get(_ENVIRON_KEY)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled and has_request_context():
+            # Keyed by cursor, so a statement that fails can't be matched with the next one's end
+            conn.info.setdefault('sql_stats_started', {})[id(cursor)] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('sql_stats_started')
+        if not started or id(cursor) not in started or not has_request_context():
+            return
+        seconds = time.perf_counter() - started.pop(id(cursor))
+        queries = request.environ.get(_ENVIRON_KEY)
+        if queries is None:
+            queries = request.environ[_ENVIRON_KEY] = RequestQueries()
+        queries.record(statement, parameters, seconds)
+
+    def _handle_error(self, exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its start time here
+        connection, context = exception_context.connection, exception_context.execution_context
+        # SQLAlchemy 2.1 leaves ExceptionContext.cursor unset, the execution context has it
+        cursor = getattr(exception_context, 'cursor', None) or getattr(context, 'cursor', None)
+        if connection is not None and cursor is not None:
+            connection.info.get('sql_stats_started', {}).pop(id(cursor), None)
+
+    def budget_for(self, endpoint):
+        return self.budgets.get(endpoint, self.default_budget)
+
+    def _after_request(self, response):
+        queries = request.environ.get(_ENVIRON_KEY)
+        if queries is None:
+            return response
+        endpoint = f"{request.method} {request.endpoint or 'unmatched'}"
+        repeated = queries.repeated(self.n_plus_one_threshold)
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.requests += 1
+            stats.statements += queries.count
+            stats.seconds += queries.seconds
+            stats.max_statements = max(stats.max_statements, queries.count)
+            stats.n_plus_one += len(repeated)
+
+        for statement, count, distinct, (template, code) in repeated:
+            current_app.logger.warning(
+                f"Possible N+1 on {endpoint}: {count} executions ({distinct} distinct parameter sets) of "
+                f"{' '.join(statement.split())[:160]!r} from {template or 'no template'}, {code or 'unknown code'}")
+
+        budget = self.budget_for(request.endpoint)
+        if budget is not None and queries.count > budget:
+            message = (f"{endpoint} issued {queries.count} SQL statements "
+                       f"({queries.seconds * 1000:.1f} ms), over its budget of {budget}")
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            current_app.logger.warning(message)
+        return response
+
+    def report(self):
+        """Per-endpoint totals since the process started, busiest endpoints first."""
+        with self._lock:
+            items = sorted(self._endpoints.items(), key=lambda item: -item[1].statements)
+            return {endpoint: stats.to_dict() for endpoint, stats in items}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+
+sql_stats = SqlInstrumentation()
@@ -0,0 +1,279 @@
+import hmac
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app, request, before_render_template, template_rendered
+from flasknetwork.sqlstats import SqlInstrumentation
+
+
+_ENVIRON_KEY = 'flasknetwork.timing'
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_SUFFIX = '.collapsed'
+
+
+class RequestTimes:
+    """Phase timings of one request; registered with the sampler while it runs."""
+
+    __slots__ = ('started', 'thread_id', 'render', 'render_db', 'render_depth', 'render_started',
+                 'render_db_started', 'profile', 'samples', 'server_timing')
+
+    def __init__(self, profile, server_timing):
+        self.started = time.perf_counter()
+        self.thread_id = threading.get_ident()
+        self.render = 0.0
+        # Database time spent inside templates, so it isn't counted twice
+        self.render_db = 0.0
+        self.render_depth = 0
+        self.render_started = 0.0
+        self.render_db_started = 0.0
+        # 'sampled' or 'forced' to profile from the start; None until the request turns slow
+        self.profile = profile
+        self.samples = Counter()
+        # Whether the response reports these timings in a Server-Timing header
+        self.server_timing = server_timing
+
+
+def _frame_name(frame):
+    """'function (file:line)', with project files (incl. templates) relative to the project root."""
+    filename = frame.f_code.co_filename
+    if filename.startswith(_PROJECT_DIR):
+        filename = os.path.relpath(filename, _PROJECT_DIR)
+    else:
+        filename = os.path.basename(filename)
+    lineno = frame.f_lineno
+    template = frame.f_globals.get('__jinja_template__')
+    if template is not None:
+        lineno = template.get_corresponding_lineno(lineno)
+    return f"{frame.f_code.co_name} ({filename}:{lineno})"
+
+
+def _collapse(frame):
+    """Render a stack as 'outermost;...;innermost' in the collapsed format of flamegraph tools."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for requests handled by real threads (sync/gthread workers).
+
+    One daemon thread per process wakes every PROFILE_INTERVAL_MS while requests are running
+    and records the current stack of each request that is being profiled: a PROFILE_SAMPLE_RATE
+    fraction of requests from their start, requests forced with the X-Profile-Token header,
+    and any request once it has run longer than PROFILE_SLOW_MS. Greenlets (gevent workers)
+    are not visible to it.
+    """
+
+    def __init__(self, interval, slow_after):
+        self.interval = interval
+        self.slow_after = slow_after
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def register(self, times):
+        if times.profile is None and not self.slow_after:
+            return
+        with self._lock:
+            self._active[times.thread_id] = times
+            if self._thread is None or self._pid != os.getpid():
+                # Threads don't survive fork, so each (gunicorn) worker starts its own
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def unregister(self, times):
+        """Stop sampling a request; its samples are complete once this returns."""
+        with self._lock:
+            if self._active.get(times.thread_id) is times:
+                del self._active[times.thread_id]
+
+    def _run(self):
+        while True:
+            if not self._active:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                frames = None
+                for times in self._active.values():
+                    if times.profile is None:
+                        if now - times.started < self.slow_after:
+                            continue
+                        times.profile = 'slow'
+                    if frames is None:
+                        frames = sys._current_frames()
+                    frame = frames.get(times.thread_id)
+                    if frame is not None:
+                        times.samples[_collapse(frame)] += 1
+
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of collapsed-stack profiles; the oldest files are removed."""
+
+    def __init__(self, directory, keep):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def paths(self):
+        """Stored profiles, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(PROFILE_SUFFIX))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def save(self, endpoint, reason, seconds, samples):
+        """Write one profile and trim the buffer. Returns the file name."""
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S.%f')
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", '-', endpoint).strip('-')
+        name = f"{stamp}-{os.getpid()}-{slug}-{reason}-{seconds * 1000:.0f}ms{PROFILE_SUFFIX}"
+        lines = [f"{stack} {count}" for stack, count in samples.most_common()]
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            for path in self.paths()[:-self.keep]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return name
+
+
+class RequestTiming:
+    """
+    Times the phases of every request and reports them in a Server-Timing header:
+    db (SQL, from flasknetwork/sqlstats.py), render (Jinja templates, minus their SQL),
+    app (the remaining Python in the handler) and total. The header goes to every client
+    only with SERVER_TIMING; otherwise only to requests carrying the STATS_TOKEN, as
+    'Authorization: Bearer' or X-Profile-Token. Also drives the SamplingProfiler and stores
+    its profiles in a ProfileStore (see scripts/profiles.py).
+    """
+
+    def __init__(self):
+        self.server_timing = False
+        self.sample_rate = 0.0
+        self.profiler = None
+        self.store = None
+
+    def init_app(self, app):
+        self.server_timing = app.config.get('SERVER_TIMING', False)
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        slow_ms = app.config.get('PROFILE_SLOW_MS', 0)
+        self.store = ProfileStore(
+            app.config.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'flasknetwork-profiles'),
+            app.config.get('PROFILE_KEEP', 100))
+        if self.sample_rate or slow_ms or app.config.get('STATS_TOKEN'):
+            self.profiler = SamplingProfiler(app.config.get('PROFILE_INTERVAL_MS', 5) / 1000.0,
+                                             slow_ms / 1000.0)
+        # The profiler also exists whenever STATS_TOKEN is set, for token-carrying requests
+        if not (self.server_timing or self.profiler):
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+    @staticmethod
+    def _db_seconds():
+        queries = SqlInstrumentation.current()
+        return queries.seconds if queries is not None else 0.0
+
+    @staticmethod
+    def _is_stats_token(supplied):
+        token = current_app.config.get('STATS_TOKEN')
+        return bool(token and supplied) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+    def _profile_reason(self):
+        if self._is_stats_token(request.headers.get('X-Profile-Token')):
+            return 'forced'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def _before_request(self):
+        profile = self._profile_reason() if self.profiler else None
+        auth = request.headers.get('Authorization', '')
+        server_timing = self.server_timing or profile == 'forced' or \
+            (auth.startswith('Bearer ') and self._is_stats_token(auth[len('Bearer '):]))
+        times = RequestTimes(profile, server_timing)
+        request.environ[_ENVIRON_KEY] = times
+        if self.profiler:
+            self.profiler.register(times)
+
+    def _before_render(self, app, template, context, **extra):
+        times = request.environ.get(_ENVIRON_KEY)
+        if times is None:
+            return
+        times.render_depth += 1
+        if times.render_depth == 1:
+            times.render_started = time.perf_counter()
+            times.render_db_started = self._db_seconds()
+
+    def _after_render(self, app, template, context, **extra):
+        times = request.environ.get(_ENVIRON_KEY)
+        if times is None or not times.render_depth:
+            return
+        times.render_depth -= 1
+        if times.render_depth == 0:
+            times.render += time.perf_counter() - times.render_started
+            times.render_db += self._db_seconds() - times.render_db_started
+
+    def _after_request(self, response):
+        times = request.environ.get(_ENVIRON_KEY)
+        if times is None:
+            return response
+        total = time.perf_counter() - times.started
+        if self.profiler:
+            self.profiler.unregister(times)
+
+        entries = []
+        if times.server_timing:
+            queries = SqlInstrumentation.current()
+            db_seconds = queries.seconds if queries is not None else 0.0
+            render = max(times.render - times.render_db, 0.0)
+            app_seconds = max(total - db_seconds - render, 0.0)
+            if queries is not None:
+                entries.append(f'db;dur={db_seconds * 1000:.1f};desc="{queries.count} queries"')
+            entries.append(f'render;dur={render * 1000:.1f}')
+            entries.append(f'app;dur={app_seconds * 1000:.1f}')
+            entries.append(f'total;dur={total * 1000:.1f}')
+
+        if times.profile and times.samples:
+            endpoint = f"{request.method} {request.endpoint or 'unmatched'}"
+            try:
+                name = self.store.save(endpoint, times.profile, total, times.samples)
+                if times.server_timing:
+                    entries.append(f'profile;desc="{name}"')
+            except OSError as e:
+                current_app.logger.error(f"Failed to save request profile: {e}")
+
+        if entries:
+            response.headers.add('Server-Timing', ', '.join(entries))
+        return response
+
+    def _teardown_request(self, exc):
+        # Requests that failed before after_request still have to leave the sampler
+        times = request.environ.pop(_ENVIRON_KEY, None)
+        if times is not None and self.profiler:
+            self.profiler.unregister(times)
+
+
+request_timing = RequestTiming()
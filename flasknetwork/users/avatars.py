@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+import time
+from flask import current_app
+from flasknetwork.images import VARIANTS_DIR, MANIFEST_NAME
+
+
+AVATAR_DIR = 'profile_pics'
+ALLOWED_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+DEFAULT_AVATAR = 'default1.png'
+
+
+class AvatarRegistry:
+    """
+    In-memory list of the selectable profile pictures, loaded once per worker.
+
+    The list comes from the image variant manifest (scripts/build_images.py), or from one
+    scan of static/profile_pics when no build exists. Lookups never touch the filesystem;
+    at most every AVATAR_MANIFEST_CHECK_INTERVAL seconds one request stats the manifest
+    and reloads the registry if it changed.
+    """
+
+    def __init__(self):
+        self._choices = [(DEFAULT_AVATAR, 'Default Avatar')]
+        self._available = frozenset()
+        self._manifest_mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.manifest_path = os.path.join(app.static_folder, VARIANTS_DIR, MANIFEST_NAME)
+        self._load(app.logger)
+
+    def choices(self):
+        """(filename, display name) pairs for the account form, sorted by filename."""
+        self._maybe_reload()
+        return list(self._choices)
+
+    def is_available(self, filename):
+        """Return True if filename is a selectable profile picture."""
+        self._maybe_reload()
+        return bool(filename) and filename in self._available
+
+    @property
+    def default(self):
+        return DEFAULT_AVATAR if DEFAULT_AVATAR in self._available else self._choices[0][0]
+
+    def _maybe_reload(self):
+        interval = current_app.config.get('AVATAR_MANIFEST_CHECK_INTERVAL', 60)
+        if time.monotonic() - self._checked_at < interval or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = time.monotonic()
+            if self._stat_manifest() != self._manifest_mtime:
+                self._load(current_app.logger)
+        finally:
+            self._lock.release()
+
+    def _stat_manifest(self):
+        try:
+            return os.stat(self.manifest_path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _load(self, logger):
+        mtime = self._stat_manifest()
+        filenames = None
+        if mtime is not None:
+            try:
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+                prefix = AVATAR_DIR + '/'
+                filenames = [source[len(prefix):] for source in manifest if source.startswith(prefix)]
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading image manifest {self.manifest_path}: {e}")
+
+        if filenames is None:
+            try:
+                filenames = os.listdir(os.path.join(self.static_folder, AVATAR_DIR))
+            except OSError as e:
+                # Fallback in case of filesystem issues
+                logger.error(f"Error accessing profile pictures directory: {e}")
+                filenames = []
+
+        filenames = sorted(name for name in filenames if name.lower().endswith(ALLOWED_EXTENSIONS))
+        choices = [(name, os.path.splitext(name)[0].replace('_', ' ')) for name in filenames]
+        # Ensure we always have at least a default option
+        self._choices = choices or [(DEFAULT_AVATAR, 'Default Avatar')]
+        self._available = frozenset(filenames)
+        self._manifest_mtime = mtime
+        self._checked_at = time.monotonic()
+        logger.info(f"Loaded {len(filenames)} profile pictures"
+                    + (" from the image manifest" if mtime is not None else ""))
+
+
+avatar_registry = AvatarRegistry()
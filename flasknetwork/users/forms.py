@@ -3,7 +3,8 @@ from wtforms import StringField, PasswordField, SubmitField, BooleanField, Selec
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError
 from flask_login import current_user
 from flasknetwork.models import User, Program
-from flasknetwork.users.utils import is_kth_domain, get_available_profile_pictures, validate_profile_picture
+from flasknetwork.users.utils import is_kth_domain
+from flasknetwork.users.avatars import avatar_registry
 
 
 class RegistrationForm(FlaskForm):
@@ -48,12 +49,12 @@ class UpdateAccountForm(FlaskForm):
     
     def __init__(self, *args, **kwargs):
         super(UpdateAccountForm, self).__init__(*args, **kwargs)
-        # Populate picture choices from available images
-        self.picture.choices = get_available_profile_pictures()
+        # Populate picture choices from the in-memory avatar registry
+        self.picture.choices = avatar_registry.choices()
 
     def validate_picture(self, picture):
         """Validate that the selected picture exists"""
-        if picture.data and not validate_profile_picture(picture.data):
+        if picture.data and not avatar_registry.is_available(picture.data):
             raise ValidationError('Selected profile picture is not available.')
 
     def validate_email(self, email):
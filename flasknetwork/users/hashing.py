@@ -0,0 +1,140 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt as _bcrypt
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when too many password hashes are already running or queued."""
+
+
+def _hash_password(password, rounds):
+    return _bcrypt.hashpw(password, _bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _check_password(pw_hash, password):
+    return _bcrypt.checkpw(password, pw_hash)
+
+
+def _thread_pool_class():
+    # Under gevent, patched threads are greenlets and would run bcrypt on the event loop;
+    # gevent's own pool uses real threads
+    try:
+        from gevent import monkey
+    except ImportError:
+        return ThreadPoolExecutor
+    if monkey.is_module_patched('threading'):
+        from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+        return GeventThreadPoolExecutor
+    return ThreadPoolExecutor
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing, inline by default or on a small bounded executor.
+
+    With PASSWORD_HASH_WORKERS set, every request that hashes (login, registration, password
+    reset) runs its bcrypt call on one of that many workers, so a burst of logins can keep
+    at most that many cores busy per process and the process's other request threads stay
+    responsive. Up to PASSWORD_HASH_QUEUE more hashes may wait; beyond that hash()/verify()
+    raise PasswordHasherBusy immediately instead of piling up requests, and routes answer 503.
+
+    That only helps workers that serve several requests at once (gthread, gevent; compare
+    with scripts/bench_hashing.py, which serves from threads too). A sync worker handles one
+    request at a time and would only block on the executor, so the default hashes inline.
+
+    bcrypt releases the GIL, so the thread executor runs hashes in parallel with request
+    threads; 'process' moves them out of the worker process entirely.
+
+    Configuration:
+        BCRYPT_LOG_ROUNDS: bcrypt work factor for new hashes (default 12). Users whose hash
+            has a different factor are rehashed on their next successful login.
+        PASSWORD_HASH_EXECUTOR: 'thread' (default) or 'process'
+        PASSWORD_HASH_WORKERS: concurrent hashes per process (default 0 = hash inline, unbounded)
+        PASSWORD_HASH_QUEUE: hashes allowed to wait for a worker
+        PASSWORD_HASH_TIMEOUT: seconds a request waits for its hash
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 0
+        self._executor = None
+        self._executor_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.kind = app.config.get('PASSWORD_HASH_EXECUTOR', 'thread')
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        self.queue = app.config.get('PASSWORD_HASH_QUEUE', 8)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        if self.kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown PASSWORD_HASH_EXECUTOR '{self.kind}' (expected thread or process)")
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue) if self.workers else None
+        self._shutdown()
+
+    def hash(self, password):
+        """Return the bcrypt hash of password as a string, at the configured work factor."""
+        return self._run(_hash_password, password.encode('utf-8'), self.rounds)
+
+    def verify(self, pw_hash, password):
+        """Return True if password matches pw_hash."""
+        return self._run(_check_password, pw_hash.encode('utf-8'), password.encode('utf-8'))
+
+    def needs_rehash(self, pw_hash):
+        """Return True if pw_hash was made with a different work factor than configured."""
+        try:
+            return int(pw_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def verify_and_update(self, user, password):
+        """
+        Check a login attempt. On success, upgrade the user's hash if the work factor changed;
+        the caller commits.
+
+        Returns:
+            bool: True if password is correct
+        """
+        if not self.verify(user.password, password):
+            return False
+        if self.needs_rehash(user.password):
+            user.password = self.hash(password)
+        return True
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many password hashes in progress")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Hold the slot until the hash finishes, even if this request stops waiting for it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PasswordHasherBusy("Timed out waiting for a password hash")
+
+    def _get_executor(self):
+        # Executors don't survive fork, so gunicorn workers (e.g. with preload) create their own
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    pool = ProcessPoolExecutor if self.kind == 'process' else _thread_pool_class()
+                    self._executor = pool(max_workers=self.workers)
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def _shutdown(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=False)
+        self._executor = None
+
+
+password_hasher = PasswordHasher()
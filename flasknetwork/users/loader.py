@@ -0,0 +1,86 @@
+from sqlalchemy.orm import make_transient_to_detached
+from flasknetwork import db
+from flasknetwork.cache import CacheStats, create_cache_backend
+
+
+class UserCache:
+    """
+    Cache behind the Flask-Login user loader, so authenticated requests don't start
+    with a SELECT on the user table.
+
+    Entries hold the user's column values (except the password hash, which is loaded
+    on access where it's needed). On a hit they are merged into the session without
+    a query, giving a normal persistent User whose changes are flushed as usual and
+    whose relationships (program, posts) load lazily.
+
+    Routes that modify a user call invalidate(user.id) after committing. With the
+    per-process 'lru' backend other workers may serve the old values until the TTL
+    expires; the 'redis' backend shares invalidations across workers.
+
+    Configuration:
+        USER_CACHE_BACKEND: 'lru' (default), 'redis' or 'none'
+        USER_CACHE_SIZE: capacity of the in-process LRU
+        USER_CACHE_TTL: seconds an entry is trusted
+        CACHE_REDIS_URL: connection URL for the redis backend
+    """
+
+    # Not cached: only login and password reset read it, and it shouldn't sit in a shared store
+    EXCLUDED_COLUMNS = ('password',)
+
+    def __init__(self):
+        self.backend = None
+        self.stats = CacheStats('user_loader')
+        self._columns = None
+
+    def init_app(self, app):
+        self.backend = create_cache_backend(
+            app.config.get('USER_CACHE_BACKEND', 'lru'),
+            namespace='user',
+            max_entries=app.config.get('USER_CACHE_SIZE', 5000),
+            default_ttl=app.config.get('USER_CACHE_TTL', 60),
+            redis_url=app.config.get('CACHE_REDIS_URL'),
+        )
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            from flasknetwork.models import User
+            self._columns = [column.key for column in User.__table__.columns
+                             if column.key not in self.EXCLUDED_COLUMNS]
+        return self._columns
+
+    def load(self, user_id):
+        """Return the User with this id (or None), from the cache when possible."""
+        from flasknetwork.models import User
+
+        key = str(user_id)
+        values = self.backend.get(key)
+        self.stats.record(values is not None)
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self.backend.set(key, {name: getattr(user, name) for name in self.columns})
+        return user
+
+    def invalidate(self, user_id):
+        """Forget a user's cached values. Call after committing changes to the user."""
+        self.backend.delete(str(user_id))
+
+    def report(self):
+        """Counters for monitoring; every hit is one user query saved."""
+        requests = self.stats.hits + self.stats.misses
+        report = self.stats.to_dict()
+        report.update({
+            'backend': self.backend.name,
+            'entries': len(self.backend),
+            'queries_saved': self.stats.hits,
+            'queries_saved_per_request': round(self.stats.hits / requests, 4) if requests else 0.0,
+        })
+        return report
+
+
+user_cache = UserCache()
@@ -1,9 +1,13 @@
 from flask import render_template, url_for, flash, redirect, request, Blueprint
 from flask_login import login_user, current_user, logout_user, login_required
-from flasknetwork import db, bcrypt
-from flasknetwork.models import User, Post, Program
+from flasknetwork import db
+from flasknetwork.models import User, Post, Program, CourseStats, CacheVersion
 from flasknetwork.users.forms import RegistrationForm, LoginForm, UpdateAccountForm, RequestResetForm, ResetPasswordForm, RequestVerificationForm
-from flasknetwork.users.utils import send_reset_email, send_verification_email, validate_profile_picture, send_email_change_email
+from flasknetwork.users.utils import send_reset_email, send_verification_email, send_email_change_email
+from flasknetwork.users.avatars import avatar_registry
+from flasknetwork.users.loader import user_cache
+from flasknetwork.users.hashing import password_hasher, PasswordHasherBusy
+from flasknetwork.main.conditional import FEED_VERSION
 
 users = Blueprint('users', __name__)
 
@@ -25,7 +29,7 @@ def register():
             
             # Create user with temporary username (required for NOT NULL constraint)
             # Will be replaced with generated username after flush
-            hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+            hashed_password = password_hasher.hash(form.password.data)
             user = User(username='TEMP', email=form.email.data, password=hashed_password, program_id=form.program.data)
             db.session.add(user)
             
@@ -47,6 +51,9 @@ def register():
             send_verification_email(user)
             flash('Verification email sent! Check your KTH email to activate your account.', 'info')
             return redirect(url_for('users.login'))
+        except PasswordHasherBusy:
+            # Answered with 503 by the error handler
+            raise
         except Exception as e:
             # Rollback on any unexpected error
             db.session.rollback()
@@ -63,7 +70,9 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
-        if user and bcrypt.check_password_hash(user.password, form.password.data):
+        if user and password_hasher.verify_and_update(user, form.password.data):
+            # Persist a hash upgraded to the current work factor
+            db.session.commit()
             if not user.email_verified:
                 flash('Please verify your email before logging in.', 'warning')
                 return redirect(url_for('users.login', show_verification='true'))
@@ -87,54 +96,66 @@ def logout():
 def account():
     form = UpdateAccountForm()
     if form.validate_on_submit():
+        old_image = current_user.image_file
+
         # Handle picture selection with validation
-        if form.picture.data and validate_profile_picture(form.picture.data):
+        if form.picture.data and avatar_registry.is_available(form.picture.data):
             current_user.image_file = form.picture.data
         elif form.picture.data:
             # Invalid picture selected, use default
-            current_user.image_file = 'default1.png'
+            current_user.image_file = avatar_registry.default
             flash('Selected profile picture was not available. Using default.', 'warning')
         
+        if current_user.image_file != old_image:
+            # The avatar is shown on every review card, so cached pages showing them are stale
+            CourseStats.touch_courses_of_user(current_user.id)
+            CacheVersion.bump(FEED_VERSION)
+
         if form.email.data != current_user.email:
+            # Queues the email and commits, together with any picture change
             send_email_change_email(current_user, form.email.data)
+            user_cache.invalidate(current_user.id)
             flash('A verification email has been sent to your new email. Your email will be updated once you click the link.', 'info')
             return redirect(url_for('users.account'))
 
         db.session.commit()
+        user_cache.invalidate(current_user.id)
         flash('Your account has been updated!', 'success')
         return redirect(url_for('users.account')) # post-get-redirect pattern
     elif request.method == 'GET':
         form.email.data = current_user.email
         
         # Ensure current user's image file is valid, fallback to default if not
-        if validate_profile_picture(current_user.image_file):
+        if avatar_registry.is_available(current_user.image_file):
             form.picture.data = current_user.image_file
         else:
-            current_user.image_file = 'default1.png'
+            current_user.image_file = avatar_registry.default
             db.session.commit()
-            form.picture.data = 'default1.png'
+            user_cache.invalidate(current_user.id)
+            form.picture.data = current_user.image_file
 
     image_file = url_for('static', filename='profile_pics/' + current_user.image_file)
     return render_template('account.html', title='Account', image_file=image_file, form=form)
 
 
 
-from flasknetwork.main.utils import get_sorted_posts
+from flasknetwork.main.utils import load_feed_page, normalize_sort
 
 @users.route('/user/<string:username>')
 def user_posts(username):
-    page=request.args.get('page', 1, type=int)
-    sort_by = request.args.get('sort', 'newest')
+    cursor = request.args.get('cursor')
+    sort_by = normalize_sort(request.args.get('sort', 'newest'))
     
     user = User.query.filter_by(username=username).first_or_404()
     
     # Filter by author first
     query = Post.query.filter_by(author=user)
     
-    # Apply sorting
-    query = get_sorted_posts(query, sort_by)
-    
-    posts = query.paginate(page=page, per_page=5)
+    # Apply sorting and keyset pagination
+    posts = load_feed_page(query, sort_by, cursor=cursor, per_page=5)
+    if not cursor:
+        # Only the first page shows the total, so later pages don't pay for a COUNT
+        posts.total = query.count() if posts.has_next else len(posts.items)
     return render_template('user_posts.html', posts=posts, user=user, sort_by=sort_by)
 
 
@@ -162,9 +183,9 @@ def reset_token(token):
         return redirect(url_for('users.reset_request'))
     form = ResetPasswordForm()
     if form.validate_on_submit():
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
-        user.password = hashed_password
+        user.password = password_hasher.hash(form.password.data)
         db.session.commit()
+        user_cache.invalidate(user.id)
         flash('Your password has been updated! You can now log in', 'success')
         return redirect(url_for('users.login'))
     return render_template('reset_token.html', title='Reset Password', form=form, user=user)
@@ -181,6 +202,7 @@ def verify_email(token):
         return redirect(url_for('users.login'))
     user.email_verified = True
     db.session.commit()
+    user_cache.invalidate(user.id)
     flash('Your account has been verified! You can now log in.', 'success')
     return redirect(url_for('users.login'))
 
@@ -208,6 +230,7 @@ def verify_change_email(token):
     user.email = new_email
     user.email_verified = True
     db.session.commit()
+    user_cache.invalidate(user.id)
     flash('Your email has been updated and verified!', 'success')
     return redirect(url_for('users.account'))
 
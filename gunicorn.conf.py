@@ -0,0 +1,111 @@
+"""
+gunicorn settings for production (picked up automatically by `gunicorn run:app`).
+
+Worker model, selected with GUNICORN_WORKER_CLASS:
+    sync (default)     one request at a time per process, WEB_CONCURRENCY processes.
+    gthread            WEB_CONCURRENCY processes x GUNICORN_THREADS threads. Threads can overlap
+                       Postgres and bcrypt waits (both release the GIL) at a fraction of the
+                       memory of extra processes, but only measure better where requests
+                       actually wait on the network; see the load test below.
+    gevent             GUNICORN_WORKER_CONNECTIONS greenlets per process; needs gevent and
+                       psycogreen installed (see requirements.txt).
+
+The app is loaded once in the master and forked (GUNICORN_PRELOAD, default on), which saves
+memory and startup time per worker. Each worker then drops the pool inherited from the master
+so no two processes ever share a database connection.
+
+DB_POOL_SIZE defaults to the number of requests a worker can run at once (+1 for the email
+outbox thread); see flasknetwork.config.engine_options for the other pool settings.
+
+Load test: scripts/bench_gunicorn.py starts each profile and drives 16 closed-loop clients over a
+mix of feed, course, autocomplete and profile pages. Two 20s runs on a 1 vCPU box against SQLite:
+
+    profile                            req/s        p50          p99
+    baseline (1 sync worker)         206-274    57-77ms     89-110ms
+    sync, 3 workers                  202-260    60-79ms    104-117ms
+    gthread, 3 workers x 4 threads   199-233    65-75ms    180-224ms
+    gevent, 3 workers                183-186    86-87ms    124-132ms
+
+With one core and a local database every request is CPU-bound, so no profile can beat a single
+worker there and the extra threads only lengthen the tail. The profiles pay off when requests
+wait on the network (Postgres round trips, SMTP, bcrypt on its own cores), which this setup can't
+reproduce. sync stays the default until a run of the script on the target instance against
+Postgres shows gthread (or gevent) ahead, tail latency included.
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+if worker_class not in ('sync', 'gthread', 'gevent'):
+    raise ValueError(f"Unknown GUNICORN_WORKER_CLASS '{worker_class}' (expected sync, gthread or gevent)")
+
+if worker_class == 'gevent':
+    # Patch before the app (and its locks, sockets and psycopg2) is imported by preload
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Render's proxy reuses connections to the app
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Recycle workers now and then to bound memory growth; jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+
+# Read by flasknetwork.config when the app is imported, after this file
+if worker_class == 'gevent':
+    concurrency = min(worker_connections, 10)
+else:
+    concurrency = threads
+os.environ.setdefault('DB_POOL_SIZE', str(concurrency + 1))
+
+# Workers write their Prometheus metrics here so /metrics can sum them (flasknetwork/metrics.py).
+# Must be set before prometheus_client is imported. Unless it is set explicitly (then it's up to
+# the deployment to give each instance its own, empty directory), every master gets a private
+# temp directory, removed again in on_exit, so other gunicorn instances never share or wipe it.
+METRICS_DIR_PREFIX = 'flasknetwork-prometheus-'
+config_only = '--check-config' in sys.argv or '--print-config' in sys.argv
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR') and not config_only:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix=METRICS_DIR_PREFIX)
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    from flasknetwork import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        # close=False: leave the master's connections alone, just stop this worker using them
+        db.engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Drop the live gauges (pool connections) of a worker that exited or was recycled
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    # Only the directories created above (this file is re-read on reload, so check by name)
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR', '')
+    if os.path.dirname(metrics_dir) == tempfile.gettempdir() \
+            and os.path.basename(metrics_dir).startswith(METRICS_DIR_PREFIX):
+        shutil.rmtree(metrics_dir, ignore_errors=True)
@@ -0,0 +1,46 @@
+"""add last_modified to course_stats and updated_at to cache_version
+
+Revision ID: 0b7d3e5a91c4
+Revises: f47c9a1e0b25
+Create Date: 2026-10-18 17:02:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7d3e5a91c4'
+down_revision = 'f47c9a1e0b25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('course_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_modified', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('cache_version', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # A course page last changed when its most recent review did
+    op.execute(
+        "UPDATE course_stats SET last_modified = "
+        "(SELECT max(post.updated_at) FROM post WHERE post.course_id = course_stats.course_id)"
+    )
+    op.execute("UPDATE course_stats SET last_modified = CURRENT_TIMESTAMP WHERE last_modified IS NULL")
+    op.execute("UPDATE cache_version SET updated_at = CURRENT_TIMESTAMP")
+
+    with op.batch_alter_table('course_stats', schema=None) as batch_op:
+        batch_op.alter_column('last_modified', existing_type=sa.DateTime(), nullable=False)
+
+    with op.batch_alter_table('cache_version', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cache_version', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('course_stats', schema=None) as batch_op:
+        batch_op.drop_column('last_modified')
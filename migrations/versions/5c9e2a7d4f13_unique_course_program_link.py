@@ -0,0 +1,31 @@
+"""unique course_program link
+
+Revision ID: 5c9e2a7d4f13
+Revises: 1d2e8f3a6b70
+Create Date: 2026-10-18 21:05:12.418203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c9e2a7d4f13'
+down_revision = '1d2e8f3a6b70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicate links (keeping the oldest) so the constraint can be created
+    op.execute(
+        "DELETE FROM course__program WHERE id NOT IN ("
+        "SELECT MIN(id) FROM course__program GROUP BY course_id, program_id)"
+    )
+    with op.batch_alter_table('course__program', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_course_program', ['course_id', 'program_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('course__program', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_course_program', type_='unique')
@@ -0,0 +1,48 @@
+"""add course_tag_stats rollup and tag post counts
+
+Revision ID: 7a4c1e9b2d58
+Revises: 5c9e2a7d4f13
+Create Date: 2026-10-18 22:14:37.502916
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4c1e9b2d58'
+down_revision = '5c9e2a7d4f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('course_tag_stats',
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('post_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['course.id'], ),
+    sa.ForeignKeyConstraint(['tag_id'], ['tag.id'], ),
+    sa.PrimaryKeyConstraint('course_id', 'tag_id')
+    )
+    with op.batch_alter_table('tag', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('post_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from existing post tags
+    op.execute("""
+        INSERT INTO course_tag_stats (course_id, tag_id, post_count)
+        SELECT post.course_id, post_tags.tag_id, COUNT(*)
+        FROM post_tags
+        JOIN post ON post.id = post_tags.post_id
+        GROUP BY post.course_id, post_tags.tag_id
+    """)
+    op.execute("""
+        UPDATE tag SET post_count = (SELECT COUNT(*) FROM post_tags WHERE post_tags.tag_id = tag.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('tag', schema=None) as batch_op:
+        batch_op.drop_column('post_count')
+
+    op.drop_table('course_tag_stats')
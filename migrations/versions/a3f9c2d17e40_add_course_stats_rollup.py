@@ -0,0 +1,51 @@
+"""add course_stats rollup
+
+Revision ID: a3f9c2d17e40
+Revises: 1ccf85d09951
+Create Date: 2026-10-18 10:12:05.118214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f9c2d17e40'
+down_revision = '1ccf85d09951'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('course_stats',
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('review_count', sa.Integer(), nullable=False),
+    sa.Column('sum_professor', sa.Integer(), nullable=False),
+    sa.Column('sum_material', sa.Integer(), nullable=False),
+    sa.Column('sum_peers', sa.Integer(), nullable=False),
+    sa.Column('workload_light', sa.Integer(), nullable=False),
+    sa.Column('workload_medium', sa.Integer(), nullable=False),
+    sa.Column('workload_heavy', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['course.id'], ),
+    sa.PrimaryKeyConstraint('course_id')
+    )
+
+    # Backfill from existing posts
+    op.execute("""
+        INSERT INTO course_stats (course_id, review_count, sum_professor, sum_material, sum_peers,
+                                  workload_light, workload_medium, workload_heavy)
+        SELECT course_id,
+               COUNT(id),
+               SUM(rating_professor),
+               SUM(rating_material),
+               SUM(rating_peers),
+               SUM(CASE WHEN rating_workload = 'light' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating_workload = 'medium' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating_workload = 'heavy' THEN 1 ELSE 0 END)
+        FROM post
+        GROUP BY course_id
+    """)
+
+
+def downgrade():
+    op.drop_table('course_stats')
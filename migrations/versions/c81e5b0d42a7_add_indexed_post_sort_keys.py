@@ -0,0 +1,71 @@
+"""add indexed post sort keys
+
+Revision ID: c81e5b0d42a7
+Revises: a3f9c2d17e40
+Create Date: 2026-10-18 11:40:52.604417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81e5b0d42a7'
+down_revision = 'a3f9c2d17e40'
+branch_labels = None
+depends_on = None
+
+
+SORT_KEYS = ['date_posted', 'rating_sum', 'rating_professor', 'rating_material', 'rating_peers', 'workload_rank']
+
+
+def _sort_indexes():
+    """(name, columns) for every composite sort index, mirroring models._create_post_sort_indexes."""
+    indexes = []
+    for scope in (None, 'course_id', 'user_id'):
+        for key in SORT_KEYS:
+            if scope is None and key == 'date_posted':
+                continue
+            columns = [scope] if scope else []
+            if key == 'date_posted':
+                columns.append('date_posted')
+            elif key == 'workload_rank':
+                columns += ['workload_rank', sa.text('date_posted DESC')]
+            else:
+                columns += [key, 'date_posted']
+            name = '_'.join(['ix_post', scope[:-len('_id')] if scope else 'all', key])
+            indexes.append((name, columns))
+    return indexes
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('workload_rank', sa.Integer(), nullable=True))
+
+    # Backfill existing rows
+    op.execute("""
+        UPDATE post SET
+            rating_sum = rating_professor + rating_material + rating_peers,
+            workload_rank = CASE rating_workload
+                WHEN 'light' THEN 1
+                WHEN 'medium' THEN 2
+                ELSE 3
+            END
+    """)
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.alter_column('rating_sum', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('workload_rank', existing_type=sa.Integer(), nullable=False)
+
+    for name, columns in _sort_indexes():
+        op.create_index(name, 'post', columns, unique=False)
+
+
+def downgrade():
+    for name, _ in reversed(_sort_indexes()):
+        op.drop_index(name, table_name='post')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('workload_rank')
+        batch_op.drop_column('rating_sum')
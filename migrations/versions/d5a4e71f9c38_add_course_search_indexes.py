@@ -0,0 +1,53 @@
+"""add course search indexes
+
+Revision ID: d5a4e71f9c38
+Revises: c81e5b0d42a7
+Create Date: 2026-10-18 13:05:17.902381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a4e71f9c38'
+down_revision = 'c81e5b0d42a7'
+branch_labels = None
+depends_on = None
+
+
+# The only copy of the FTS5 index DDL; no model maps course_fts (see migrations/env.py)
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS course_fts USING fts5("
+    "code, name, content='course', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS course_fts_ai AFTER INSERT ON course BEGIN "
+    "INSERT INTO course_fts(rowid, code, name) VALUES (new.id, new.code, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS course_fts_ad AFTER DELETE ON course BEGIN "
+    "INSERT INTO course_fts(course_fts, rowid, code, name) VALUES ('delete', old.id, old.code, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS course_fts_au AFTER UPDATE ON course BEGIN "
+    "INSERT INTO course_fts(course_fts, rowid, code, name) VALUES ('delete', old.id, old.code, old.name); "
+    "INSERT INTO course_fts(rowid, code, name) VALUES (new.id, new.code, new.name); END",
+    "INSERT INTO course_fts(course_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_course_code_trgm ON course USING gin (lower(code) gin_trgm_ops)")
+        op.execute("CREATE INDEX ix_course_name_trgm ON course USING gin (lower(name) gin_trgm_ops)")
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_course_name_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_course_code_trgm")
+    elif dialect == 'sqlite':
+        for trigger in ('course_fts_au', 'course_fts_ad', 'course_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS course_fts")
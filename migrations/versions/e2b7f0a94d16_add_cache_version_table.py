@@ -0,0 +1,28 @@
+"""add cache_version table
+
+Revision ID: e2b7f0a94d16
+Revises: d5a4e71f9c38
+Create Date: 2026-10-18 14:22:40.331965
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7f0a94d16'
+down_revision = 'd5a4e71f9c38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_version',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_version')
@@ -0,0 +1,32 @@
+"""add post updated_at
+
+Revision ID: f47c9a1e0b25
+Revises: e2b7f0a94d16
+Create Date: 2026-10-18 15:48:09.552730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f47c9a1e0b25'
+down_revision = 'e2b7f0a94d16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Existing posts were last modified at the latest when they were posted
+    op.execute("UPDATE post SET updated_at = date_posted")
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,92 @@
+import argparse
+import random
+import sys
+import os
+import time
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from sqlalchemy import event
+from flasknetwork import create_app, db
+from flasknetwork.models import Course
+from flasknetwork.courses.catalog import course_catalog
+from flasknetwork.courses.search import get_search_backend
+
+
+def build_keystrokes(courses, count, seed):
+    """
+    Simulate autocomplete traffic: users typing a course code or a word of its name,
+    one request per keystroke from the 2nd character on.
+    """
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        course = rng.choice(courses)
+        target = course.code if rng.random() < 0.5 else rng.choice(course.name.split() or [course.code])
+        for length in range(2, len(target) + 1):
+            queries.append(target[:length])
+    return queries[:count]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(label, search, queries, limit):
+    """Time every query and count the SQL statements it issued."""
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            search(query, limit)
+            timings.append((time.perf_counter() - start) * 1000)
+            db.session.remove()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    print(f"{label:<10} p50={percentile(timings, 50):8.3f}ms  p95={percentile(timings, 95):8.3f}ms  "
+          f"p99={percentile(timings, 99):8.3f}ms  max={max(timings):8.3f}ms  "
+          f"queries/request={statements[0] / len(queries):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare SQL and in-memory course search latency')
+    parser.add_argument('--requests', type=int, default=2000, help='Number of autocomplete requests')
+    parser.add_argument('--limit', type=int, default=20, help='Results per request')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the query mix')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        courses = Course.query.all()
+        if not courses:
+            print("No courses in the database. Seed it first (see scripts/scrape.py).")
+            return
+        queries = build_keystrokes(courses, args.requests, args.seed)
+
+        backend = get_search_backend()
+        index = course_catalog.get_index()
+        print(f"{len(courses)} courses, {len(queries)} requests, SQL backend: {backend.name}")
+        print(f"catalog index built from version {index.version}\n")
+
+        run('sql', backend.search, queries, args.limit)
+        run('catalog', course_catalog.search, queries, args.limit)
+
+if __name__ == '__main__':
+    main()
+
+
+# ./venv/bin/python scripts/bench_course_search.py
+# ./venv/bin/python scripts/bench_course_search.py --requests 10000 --limit 50
@@ -0,0 +1,161 @@
+import argparse
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import sys
+import os
+import time
+import urllib.error
+import urllib.request
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from flasknetwork import create_app
+from flasknetwork.models import Course, User
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# name: (use gunicorn.conf.py, environment overrides)
+PROFILES = {
+    'baseline': (False, {}),
+    'sync': (True, {'GUNICORN_WORKER_CLASS': 'sync'}),
+    'gthread': (True, {'GUNICORN_WORKER_CLASS': 'gthread'}),
+    'gevent': (True, {'GUNICORN_WORKER_CLASS': 'gevent'}),
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def build_paths(count, seed):
+    """A browse mix over the seeded data: feed, course pages, autocomplete and profiles."""
+    rng = random.Random(seed)
+    app = create_app()
+    with app.app_context():
+        course_ids = [course_id for (course_id,) in Course.query.with_entities(Course.id)]
+        usernames = [username for (username,) in User.query.with_entities(User.username).limit(500)]
+        codes = [code for (code,) in Course.query.with_entities(Course.code)]
+    if not course_ids or not usernames:
+        raise SystemExit("The database has no courses or users. Seed it first (see scripts/dummyusers.py).")
+
+    paths = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            paths.append('/home')
+        elif roll < 0.6:
+            paths.append(f"/courses/course/{rng.choice(course_ids)}")
+        elif roll < 0.85:
+            code = rng.choice(codes)
+            paths.append(f"/courses/api/search?q={code[:rng.randint(2, len(code))]}")
+        else:
+            paths.append(f"/user/{rng.choice(usernames)}")
+    return paths
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(profile, port):
+    use_config, overrides = PROFILES[profile]
+    env = dict(os.environ, **overrides)
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f"127.0.0.1:{port}"]
+    if use_config:
+        command += ['--config', os.path.join(ROOT, 'gunicorn.conf.py')]
+    else:
+        # What render.yaml ran before: gunicorn's defaults (one sync worker, no preload)
+        empty = tempfile.NamedTemporaryFile('w', suffix='.py', delete=False)
+        empty.close()
+        command += ['--config', empty.name]
+    server = subprocess.Popen(command + ['run:app'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/home", timeout=5).read()
+            return server
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            if server.poll() is not None:
+                raise SystemExit(f"gunicorn exited while starting the {profile} profile")
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"gunicorn did not start the {profile} profile within 30s")
+
+
+def client(base_url, paths, offset, stop, results):
+    i = offset
+    while not stop.is_set():
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + path, timeout=60) as response:
+                response.read()
+                ok = True
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            ok = False
+        results.append((ok, (time.perf_counter() - start) * 1000))
+
+
+def run_load(base_url, paths, clients, duration):
+    stop = threading.Event()
+    results = []
+    threads = [threading.Thread(target=client, args=(base_url, paths, i * 97, stop, results))
+               for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare gunicorn worker profiles (see gunicorn.conf.py) under a browse load')
+    parser.add_argument('--profiles', default='baseline,sync,gthread,gevent',
+                        help=f"Comma-separated profiles to run ({', '.join(PROFILES)})")
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent closed-loop clients')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds measured per profile')
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds of unmeasured load first')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the request mix')
+    args = parser.parse_args()
+
+    paths = build_paths(5000, args.seed)
+    print(f"{args.clients} clients, {args.duration:.0f}s per profile\n")
+    print(f"{'profile':<12} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for profile in args.profiles.split(','):
+        port = free_port()
+        server = start_server(profile, port)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            run_load(base_url, paths, args.clients, args.warmup)
+            results = run_load(base_url, paths, args.clients, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        timings = [ms for ok, ms in results if ok]
+        errors = sum(1 for ok, _ in results if not ok)
+        print(f"{profile:<12} {len(timings) / args.duration:8.1f} {percentile(timings, 50):7.1f}ms "
+              f"{percentile(timings, 95):7.1f}ms {percentile(timings, 99):7.1f}ms {errors:7d}")
+
+if __name__ == '__main__':
+    main()
+
+
+# ./venv/bin/python scripts/bench_gunicorn.py
+# WEB_CONCURRENCY=4 GUNICORN_THREADS=8 ./venv/bin/python scripts/bench_gunicorn.py --profiles baseline,gthread --clients 32
@@ -0,0 +1,125 @@
+import argparse
+import threading
+import sys
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from werkzeug.serving import make_server
+from flasknetwork import create_app
+from flasknetwork.models import User
+from flasknetwork.users.hashing import password_hasher
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def request(url, data=None):
+    """Issue one request and return (status, milliseconds)."""
+    body = urllib.parse.urlencode(data).encode() if data is not None else None
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body), timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, (time.perf_counter() - start) * 1000
+
+
+def hammer(stop, url, data, results):
+    while not stop.is_set():
+        results.append(request(url, data))
+
+
+def run_phase(base_url, args, storm):
+    """Probe args.probe_path for args.duration seconds, optionally during a login storm."""
+    stop = threading.Event()
+    probes, logins = [], []
+    threads = [threading.Thread(target=hammer, args=(stop, base_url + args.probe_path, None, probes))
+               for _ in range(args.probe_threads)]
+    if storm:
+        login = {'email': args.email, 'password': args.password}
+        threads += [threading.Thread(target=hammer, args=(stop, base_url + '/login', login, logins))
+                    for _ in range(args.storm)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return probes, logins
+
+
+def report(label, probes, logins, duration):
+    timings = [ms for status, ms in probes]
+    line = (f"{label:<28} probe p50={percentile(timings, 50):7.1f}ms p95={percentile(timings, 95):7.1f}ms "
+            f"p99={percentile(timings, 99):7.1f}ms ({len(timings) / duration:6.1f} req/s)")
+    if logins:
+        busy = sum(1 for status, _ in logins if status == 503)
+        login_timings = [ms for status, ms in logins if status != 503]
+        line += (f" | logins {len(logins) / duration:5.1f}/s, p95={percentile(login_timings, 95):7.1f}ms, "
+                 f"503s={busy}")
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure page latency for other endpoints while a login storm is running')
+    parser.add_argument('--workers', default='0,2',
+                        help='Comma-separated PASSWORD_HASH_WORKERS settings to compare (0 = inline)')
+    parser.add_argument('--storm', type=int, default=16, help='Concurrent login clients')
+    parser.add_argument('--probe-threads', type=int, default=2, help='Concurrent clients on the probe page')
+    parser.add_argument('--probe-path', default='/courses/api/search?q=da', help='Page measured during the storm')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per phase')
+    parser.add_argument('--email', help='Existing account to log in as (default: first user)')
+    parser.add_argument('--password', default='not-the-password',
+                        help='Password sent by the storm (a wrong one still costs a full bcrypt check)')
+    args = parser.parse_args()
+
+    app = create_app()
+    # The storm posts the login form directly
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        if not args.email:
+            user = User.query.order_by(User.id).first()
+            if user is None:
+                print("No users in the database. Seed it first (see scripts/dummyusers.py).")
+                return
+            args.email = user.email
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"Storm of {args.storm} login clients as {args.email}, probing {args.probe_path}, "
+          f"bcrypt rounds {app.config.get('BCRYPT_LOG_ROUNDS', 12)}\n")
+
+    try:
+        for workers in [int(w) for w in args.workers.split(',')]:
+            app.config['PASSWORD_HASH_WORKERS'] = workers
+            password_hasher.init_app(app)
+            label = 'inline' if workers == 0 else f"{workers} hash workers"
+            report(f"{label}, idle", *run_phase(base_url, args, storm=False), args.duration)
+            report(f"{label}, login storm", *run_phase(base_url, args, storm=True), args.duration)
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
+
+
+# The server below runs a thread per request, like GUNICORN_WORKER_CLASS=gthread; sync workers
+# serve one request at a time and gain nothing from PASSWORD_HASH_WORKERS
+# ./venv/bin/python scripts/bench_hashing.py
+# ./venv/bin/python scripts/bench_hashing.py --workers 0,1,4 --storm 32 --probe-path /home
@@ -0,0 +1,39 @@
+import argparse
+import sys
+import os
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flasknetwork.assets import build_assets, clean_assets, brotli
+
+STATIC_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '../flasknetwork/static'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets')
+    subparsers = parser.add_subparsers(dest='command', help='Command to run')
+
+    build_parser = subparsers.add_parser('build', help='Write flasknetwork/static/dist and its manifest')
+    build_parser.add_argument('--no-brotli', action='store_true', help='Only write gzip variants')
+
+    subparsers.add_parser('clean', help='Remove the build output')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if brotli is None and not args.no_brotli:
+            print("Warning: the brotli package is not installed, writing gzip variants only.")
+        build_assets(STATIC_FOLDER, use_brotli=not args.no_brotli)
+    elif args.command == 'clean':
+        clean_assets(STATIC_FOLDER)
+        print("Removed static build output.")
+    else:
+        parser.print_help()
+
+if __name__ == '__main__':
+    main()
+
+
+# Run after changing anything under flasknetwork/static (the app reads the manifest at startup):
+# ./venv/bin/python scripts/build_assets.py build
+# ./venv/bin/python scripts/build_assets.py clean
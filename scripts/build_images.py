@@ -0,0 +1,71 @@
+import argparse
+import sys
+import os
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from flasknetwork.images import build_image_variants
+
+STATIC_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '../flasknetwork/static'))
+
+
+def report(paths):
+    """Render pages and print the image bytes of the originals versus the variants served."""
+    from flask import g, request_finished
+    from flasknetwork import create_app
+    from flasknetwork.cache import NullCache
+    from flasknetwork.main.fragments import post_card_cache
+
+    app = create_app()
+    # Render every card, so each page's images are counted
+    post_card_cache.backend = NullCache()
+
+    results = []
+
+    def record(sender, response, **extra):
+        original, served = g.get('image_bytes', (0, 0))
+        results.append((response.status_code, original, served))
+
+    request_finished.connect(record, app)
+    client = app.test_client()
+    print(f"{'page':<40} {'status':>6} {'original':>10} {'variants':>10} {'saved':>10}")
+    for path in paths:
+        results.clear()
+        client.get(path)
+        status, original, served = results[-1] if results else (0, 0, 0)
+        print(f"{path:<40} {status:>6} {original:>10} {served:>10} {original - served:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate responsive image variants')
+    subparsers = parser.add_subparsers(dest='command', help='Command to run')
+
+    build_parser = subparsers.add_parser('build', help='Write flasknetwork/static/variants and its manifest')
+    build_parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    build_parser.add_argument('--force', action='store_true', help='Regenerate unchanged images too')
+
+    report_parser = subparsers.add_parser('report', help='Bytes saved per page by the variants')
+    report_parser.add_argument('paths', nargs='*', default=['/home', '/courses/search', '/login'],
+                               help='Pages to render (default: /home /courses/search /login)')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_image_variants(STATIC_FOLDER, workers=args.workers, force=args.force)
+    elif args.command == 'report':
+        report(args.paths)
+    else:
+        parser.print_help()
+
+if __name__ == '__main__':
+    main()
+
+
+# Run before scripts/build_assets.py, which fingerprints the variants too:
+# ./venv/bin/python scripts/build_images.py build
+# ./venv/bin/python scripts/build_images.py report /home /courses/course/1 /post/1
@@ -0,0 +1,105 @@
+import argparse
+import sys
+import os
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from flasknetwork import create_app, db
+from flasknetwork.models import Course, CourseStats, CourseTagStats, Tag, post_tags
+
+
+def rebuild(course_code=None):
+    """Recomputes course_stats and course_tag_stats from the post table, for one course or all of them."""
+    course_id = None
+    if course_code:
+        course = Course.query.filter_by(code=course_code).first()
+        if not course:
+            print(f"Error: Course '{course_code}' not found!")
+            return
+        course_id = course.id
+
+    rows = CourseStats.rebuild(course_id)
+    # Tag.post_count is global, so it is only recomputed by a full rebuild
+    tag_rows = CourseTagStats.rebuild(course_id, tag_counts=course_id is None)
+    db.session.commit()
+    print(f"Success! Rebuilt stats for {rows} course(s) and {tag_rows} course tag(s).")
+
+
+def check():
+    """Compares the stored rollup with a fresh aggregate and reports drifted courses."""
+    stored = {s.course_id: s for s in CourseStats.query.all()}
+    fresh = db.session.execute(CourseStats._aggregate_query()).all()
+
+    drifted = 0
+    for row in fresh:
+        course_id, values = row[0], tuple(row[1:])
+        stats = stored.pop(course_id, None)
+        current = None if stats is None else (
+            stats.review_count, stats.sum_professor, stats.sum_material, stats.sum_peers,
+            stats.workload_light, stats.workload_medium, stats.workload_heavy)
+        if current != values:
+            drifted += 1
+            print(f" -> Course {course_id}: stored {current}, actual {values}")
+
+    # Rows left over belong to courses that no longer have any posts
+    for course_id, stats in stored.items():
+        if stats.review_count:
+            drifted += 1
+            print(f" -> Course {course_id}: stored {stats.review_count} reviews, actual 0")
+
+    drifted += check_tags()
+    print("Stats are consistent." if not drifted else f"{drifted} row(s) drifted. Run 'rebuild' to fix.")
+
+
+def check_tags():
+    """Compares course_tag_stats and Tag.post_count with post_tags; returns the number of drifted rows."""
+    stored = {(s.course_id, s.tag_id): s.post_count for s in CourseTagStats.query.all() if s.post_count}
+    fresh = {(course_id, tag_id): count for course_id, tag_id, count
+             in db.session.execute(CourseTagStats._aggregate_query())}
+
+    drifted = 0
+    for key in sorted(set(stored) | set(fresh)):
+        if stored.get(key, 0) != fresh.get(key, 0):
+            drifted += 1
+            print(f" -> Course {key[0]}, tag {key[1]}: stored {stored.get(key, 0)}, actual {fresh.get(key, 0)}")
+
+    usage = dict(db.session.query(post_tags.c.tag_id, db.func.count()).group_by(post_tags.c.tag_id))
+    for tag in Tag.query.order_by(Tag.name):
+        if tag.post_count != usage.get(tag.id, 0):
+            drifted += 1
+            print(f" -> Tag '{tag.name}': stored {tag.post_count} posts, actual {usage.get(tag.id, 0)}")
+    return drifted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain the course_stats and course_tag_stats rollups')
+    subparsers = parser.add_subparsers(dest='command', help='Command to run')
+
+    rebuild_parser = subparsers.add_parser('rebuild', help='Recompute stats from the post table')
+    rebuild_parser.add_argument('--course', help='Only rebuild this course code')
+
+    subparsers.add_parser('check', help='Report courses whose stats have drifted')
+
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'rebuild':
+            rebuild(args.course)
+        elif args.command == 'check':
+            check()
+        else:
+            parser.print_help()
+
+if __name__ == '__main__':
+    main()
+
+
+# ./venv/bin/python scripts/course_stats.py rebuild
+# ./venv/bin/python scripts/course_stats.py rebuild --course SF1624
+# ./venv/bin/python scripts/course_stats.py check
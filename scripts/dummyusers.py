@@ -1,3 +1,4 @@
+# A handful of dummy users with two reviews each; for large datasets use scripts/generate_data.py
 from dotenv import load_dotenv
 import sys
 import os
@@ -7,8 +8,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '../.env')) # Load environment variables from .env
 
-from flasknetwork import create_app, db, bcrypt
-from flasknetwork.models import User, Post, Program, Course, WorkloadLevel
+from flasknetwork import create_app, db
+from flasknetwork.models import User, Post, Program, Course, WorkloadLevel, CourseStats, CourseTagStats
+from flasknetwork.users.hashing import password_hasher
 
 app = create_app()
 app.app_context().push()
@@ -19,13 +21,15 @@ prog = Program.query.filter_by(name="Computer Science and Engineering").first()
 # pick two distinct courses (e.g. the first two, or you can randomize)
 courses = Course.query.order_by(Course.id).limit(2).all()
 
+# every dummy user shares the password "password", so hash it once
+hashed_password = password_hasher.hash("password")
+
 for i in range(1, 6):
     email = f"dummy{i}@kth.se"
     if User.query.filter_by(email=email).first():
         continue
 
     # create dummy user with temporary username (required for NOT NULL constraint)
-    hashed_password = bcrypt.generate_password_hash("password").decode('utf-8')
     user = User(username='TEMP', email=email, password=hashed_password, program=prog)
     db.session.add(user)
     db.session.flush()  # so user.id is available
@@ -37,7 +41,6 @@ for i in range(1, 6):
     # now create one post per course in our list
     for course in courses:
         post = Post(
-            title=f"{course.name} Review by {username}",
             year_taken=2025,
             # rating is computed from professor, material, and peers ratings
             rating_professor=4,
@@ -50,4 +53,9 @@ for i in range(1, 6):
         )
         db.session.add(post)
 
+db.session.commit()
+
+# posts were inserted directly, so recompute the per-course rollups
+CourseStats.rebuild()
+CourseTagStats.rebuild()
 db.session.commit()
\ No newline at end of file
@@ -0,0 +1,371 @@
+import argparse
+import csv
+import io
+import math
+import random
+import sys
+import os
+import time
+from datetime import date, datetime, timedelta
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from sqlalchemy import func, or_, text
+from flasknetwork import create_app, db
+from flasknetwork.models import (User, Post, Program, Course, Course_Program, Tag, CourseStats,
+                                 CourseTagStats, CacheVersion, WorkloadLevel, TagSentiment, post_tags)
+from flasknetwork.courses.catalog import CATALOG_VERSION
+from flasknetwork.main.conditional import FEED_VERSION
+from flasknetwork.posts.tags import TAG_VERSION
+from flasknetwork.users.avatars import avatar_registry
+from flasknetwork.users.hashing import password_hasher
+
+# Everything generated is recognisable by these markers, so `clear` can remove it again
+PROGRAM_PREFIX = 'SYN'
+COURSE_PREFIX = 'SYN'
+EMAIL_DOMAIN = 'synthetic.example.com'
+PASSWORD = 'password'
+
+SUBJECTS = ['Algebra', 'Analysis', 'Algorithms', 'Mechanics', 'Thermodynamics', 'Databases', 'Networks',
+            'Signals', 'Statistics', 'Optimization', 'Electromagnetism', 'Compilers', 'Chemistry',
+            'Machine Learning', 'Control Theory', 'Economics', 'Materials', 'Quantum Physics',
+            'Operating Systems', 'Probability', 'Logic', 'Graphics', 'Robotics', 'Security']
+QUALIFIERS = ['Introduction to', 'Applied', 'Advanced', 'Fundamentals of', 'Project Course in',
+              'Numerical', 'Theory of', 'Topics in', '']
+PROGRAM_NAMES = ['Engineering Physics', 'Computer Science', 'Electrical Engineering', 'Mechanical Engineering',
+                 'Industrial Management', 'Chemical Engineering', 'Biotechnology', 'Media Technology',
+                 'Civil Engineering', 'Mathematics', 'Energy and Environment', 'Design and Product Realisation']
+
+DEFAULT_TAGS = [
+    ('Engaging lectures', TagSentiment.positive), ('Clear structure', TagSentiment.positive),
+    ('Helpful TAs', TagSentiment.positive), ('Useful in practice', TagSentiment.positive),
+    ('Fair exam', TagSentiment.positive), ('Great labs', TagSentiment.positive),
+    ('Disorganized', TagSentiment.negative), ('Hard exam', TagSentiment.negative),
+    ('Outdated material', TagSentiment.negative), ('Too much workload', TagSentiment.negative),
+    ('Unclear grading', TagSentiment.negative), ('Boring lectures', TagSentiment.negative),
+]
+
+PRAISE = ['The lectures were engaging and well prepared.', 'Labs tied the theory together nicely.',
+          'The professor clearly cares about the students.', 'Exercises were relevant for the exam.',
+          'I use what I learned here all the time.', 'Great study group atmosphere.']
+CRITICISM = ['The course material felt outdated.', 'Deadlines piled up at the end of the period.',
+             'The exam had little to do with the lectures.', 'Hard to get help outside the sessions.',
+             'Slides were dense and hard to follow.', 'Grading criteria were never made clear.']
+NEUTRAL = ['Attend the exercise sessions.', 'Start the assignments early.', 'The book is worth buying.',
+           'Old exams are the best preparation.', 'Expect a lot of self study.',
+           'It builds directly on the first year math courses.']
+
+
+def zipf_weights(count, skew):
+    """Weights 1/rank^skew: a few items get most of the traffic, like real course popularity."""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+class BulkWriter:
+    """
+    Buffers rows per table and writes them in batches: COPY on PostgreSQL,
+    executemany (multi-row INSERTs) elsewhere. Primary keys are assigned here,
+    so related rows can be generated without reading anything back.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+        self.next_ids = {}
+        self.postgres = db.engine.dialect.name == 'postgresql'
+        if db.engine.dialect.name == 'sqlite':
+            db.session.execute(text('PRAGMA synchronous = OFF'))
+
+    def next_id(self, model):
+        table = model.__table__
+        if table.name not in self.next_ids:
+            self.next_ids[table.name] = (db.session.query(func.max(table.c.id)).scalar() or 0) + 1
+        value = self.next_ids[table.name]
+        self.next_ids[table.name] += 1
+        return value
+
+    def add(self, table, row):
+        rows = self.buffers.setdefault(table, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            # All tables, in the order they were first used, so no row is written before a row it references
+            self.flush()
+
+    def flush(self, table=None):
+        """Write buffered rows of one table, or of all tables in insertion order."""
+        for current in ([table] if table is not None else list(self.buffers)):
+            rows = self.buffers.get(current)
+            if not rows:
+                continue
+            if self.postgres:
+                self._copy(current, rows)
+            else:
+                db.session.execute(current.insert(), rows)
+            self.counts[current.name] = self.counts.get(current.name, 0) + len(rows)
+            self.buffers[current] = []
+
+    def _copy(self, table, rows):
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['' if row[c] is None else row[c].name if hasattr(row[c], 'name') else row[c]
+                             for c in columns])
+        buffer.seek(0)
+        preparer = db.engine.dialect.identifier_preparer
+        statement = (f"COPY {preparer.format_table(table)} ({', '.join(preparer.quote(c) for c in columns)}) "
+                     "FROM STDIN WITH (FORMAT csv)")
+        cursor = db.session.connection().connection.cursor()
+        cursor.copy_expert(statement, buffer)
+
+    def reset_sequences(self):
+        """Move PostgreSQL id sequences past the ids assigned here."""
+        if not self.postgres:
+            return
+        for name in self.next_ids:
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('\"{name}\"', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM \"{name}\"))"))
+
+
+def generate_catalog(writer, rng, args):
+    """Programs, courses (each offered in 1-3 programs) and, if there are none yet, tags."""
+    programs = []
+    start = db.session.query(func.count(Program.id)).filter(Program.code.like(f"{PROGRAM_PREFIX}%")).scalar()
+    for i in range(start, start + args.programs):
+        program_id = writer.next_id(Program)
+        writer.add(Program.__table__, {
+            'id': program_id, 'code': f"{PROGRAM_PREFIX}{i:03d}",
+            'name': f"{rng.choice(PROGRAM_NAMES)} (synthetic {i})",
+            'program_type': 'master' if rng.random() < 0.3 else 'bachelor',
+        })
+        programs.append(program_id)
+
+    courses = []
+    offered = {program_id: [] for program_id in programs}
+    start = db.session.query(func.count(Course.id)).filter(Course.code.like(f"{COURSE_PREFIX}%")).scalar()
+    for i in range(start, start + args.courses):
+        course_id = writer.next_id(Course)
+        writer.add(Course.__table__, {
+            'id': course_id, 'code': f"{COURSE_PREFIX}{i:05d}",
+            'name': f"{rng.choice(QUALIFIERS)} {rng.choice(SUBJECTS)} {rng.choice(['', 'I', 'II', 'III'])}".strip(),
+        })
+        courses.append(course_id)
+        for program_id in rng.sample(programs, min(len(programs), rng.choice([1, 1, 2, 3]))):
+            offered[program_id].append(course_id)
+            writer.add(Course_Program.__table__, {
+                'id': writer.next_id(Course_Program), 'course_id': course_id, 'program_id': program_id})
+
+    tags = [(tag.id, tag.sentiment) for tag in Tag.query.all()]
+    if not tags:
+        for name, sentiment in DEFAULT_TAGS:
+            tag_id = writer.next_id(Tag)
+            writer.add(Tag.__table__, {'id': tag_id, 'name': name, 'sentiment': sentiment})
+            tags.append((tag_id, sentiment))
+    writer.flush()
+    return offered, courses, tags
+
+
+def course_profiles(rng, args, offered, courses):
+    """
+    Popularity and 'personality' per course. Popularity is Zipf-distributed over a shuffled
+    course list, so a handful of courses collect thousands of reviews and most get a few.
+    """
+    ranked = courses[:]
+    rng.shuffle(ranked)
+    popularity = dict(zip(ranked, zipf_weights(len(ranked), args.skew)))
+    quality = {course_id: min(4.6, max(1.8, rng.gauss(3.5, 0.6))) for course_id in courses}
+    heaviness = {course_id: rng.random() for course_id in courses}
+
+    catalog = {}
+    for program_id, course_ids in offered.items():
+        if course_ids:
+            cumulative, total = [], 0.0
+            for course_id in course_ids:
+                total += popularity[course_id]
+                cumulative.append(total)
+            catalog[program_id] = (course_ids, cumulative)
+    return catalog, quality, heaviness
+
+
+def rating(rng, mean):
+    return min(5, max(1, round(rng.gauss(mean, 0.9))))
+
+
+def review_text(rng, score):
+    """A few sentences, leaning positive or negative with the score."""
+    pool = PRAISE if score >= 3.5 else CRITICISM if score <= 2.5 else PRAISE + CRITICISM
+    sentences = rng.sample(pool, rng.randint(1, 3)) + rng.sample(NEUTRAL, rng.randint(0, 2))
+    rng.shuffle(sentences)
+    return ' '.join(sentences)
+
+
+def generate_reviews(writer, rng, args, catalog, quality, heaviness, tags, password_hash):
+    """
+    Create users until args.posts reviews exist. Reviews per user are log-normal (most
+    students write one or two, a few review everything), each reviewed course is drawn by
+    popularity from the user's own program, and ratings scatter around the course's quality.
+    """
+    now = args.until
+    program_ids = sorted(catalog)
+    program_weights = zipf_weights(len(program_ids), 0.6)
+    avatars = [filename for filename, _ in avatar_registry.choices()] or ['default1.png']
+    program_codes = dict(db.session.query(Program.id, Program.code).filter(Program.id.in_(program_ids)))
+    positive = [tag_id for tag_id, sentiment in tags if sentiment == TagSentiment.positive]
+    negative = [tag_id for tag_id, sentiment in tags if sentiment == TagSentiment.negative]
+    workloads = list(WorkloadLevel)
+    mu = math.log(args.reviews_per_user) - 0.5  # log-normal with the requested mean
+
+    remaining = args.posts
+    users = written = 0
+    started = time.perf_counter()
+    while remaining > 0:
+        program_id = rng.choices(program_ids, weights=program_weights)[0]
+        course_ids, cumulative = catalog[program_id]
+        user_id = writer.next_id(User)
+        username = User.generate_username(program_codes[program_id], user_id)
+        writer.add(User.__table__, {
+            'id': user_id, 'username': username, 'email': f"{username.lower()}@{EMAIL_DOMAIN}",
+            'image_file': rng.choice(avatars), 'password': password_hash,
+            'email_verified': True, 'program_id': program_id,
+        })
+        users += 1
+
+        wanted = min(remaining, max(1, round(rng.lognormvariate(mu, 1.0))), max(1, len(course_ids) // 2))
+        reviewed = set()
+        while len(reviewed) < wanted:
+            reviewed.update(rng.choices(course_ids, cum_weights=cumulative, k=wanted - len(reviewed)))
+        bias = rng.gauss(0, 0.4)
+
+        for course_id in reviewed:
+            mean = quality[course_id] + bias
+            professor, material, peers = rating(rng, mean), rating(rng, mean), rating(rng, mean)
+            heavy = heaviness[course_id]
+            workload = rng.choices(workloads, weights=[1 - heavy, 1, heavy * 1.5])[0]
+            # Skewed towards recent dates, like a growing site
+            posted = now - timedelta(days=args.days * rng.random() ** 2, seconds=rng.randrange(86400))
+            updated = posted + timedelta(days=rng.random() * 30) if rng.random() < 0.1 else posted
+            updated = min(updated, now)
+            score = (professor + material + peers) / 3
+
+            post_id = writer.next_id(Post)
+            writer.add(Post.__table__, {
+                'id': post_id, 'date_posted': posted, 'updated_at': updated,
+                'year_taken': posted.year if posted.month >= 6 else posted.year - 1,
+                'rating_professor': professor, 'rating_material': material, 'rating_peers': peers,
+                'rating_workload': workload,
+                'rating_sum': professor + material + peers, 'workload_rank': workload.rank,
+                'content': review_text(rng, score) if rng.random() < 0.9 else None,
+                'user_id': user_id, 'course_id': course_id,
+            })
+            leaning = positive if score >= 3 else negative
+            for tag_id in set(rng.choices(leaning or positive + negative, k=rng.choice([0, 1, 1, 2, 3]))):
+                writer.add(post_tags, {'post_id': post_id, 'tag_id': tag_id})
+        remaining -= len(reviewed)
+
+        if writer.counts.get('post', 0) > written:
+            db.session.commit()
+            written = writer.counts['post']
+            rate = written / (time.perf_counter() - started)
+            print(f"\r  {written:,}/{args.posts:,} reviews, {users:,} users ({rate:,.0f} reviews/s)", end='', flush=True)
+
+    writer.flush()
+    print()
+    return users
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    writer = BulkWriter(args.batch_size)
+
+    # One bcrypt hash shared by every generated user
+    password_hash = password_hasher.hash(PASSWORD)
+
+    offered, courses, tags = generate_catalog(writer, rng, args)
+    catalog, quality, heaviness = course_profiles(rng, args, offered, courses)
+    print(f"Created {len(offered)} programs and {len(courses)} courses.")
+    users = generate_reviews(writer, rng, args, catalog, quality, heaviness, tags, password_hash)
+
+    writer.reset_sequences()
+    finish()
+    print(f"Success! {users:,} users and {writer.counts.get('post', 0):,} reviews "
+          f"({writer.counts.get('post_tags', 0):,} tag links) in {time.perf_counter() - started:.1f}s. "
+          f"Every generated user's password is '{PASSWORD}'.")
+
+
+def clear():
+    """Deletes everything `generate` created (tags are kept)."""
+    users = db.select(User.id).where(User.email.like(f"%@{EMAIL_DOMAIN}"))
+    courses = db.select(Course.id).where(Course.code.like(f"{COURSE_PREFIX}%"))
+    programs = db.select(Program.id).where(Program.code.like(f"{PROGRAM_PREFIX}%"))
+    posts = db.select(Post.id).where(or_(Post.user_id.in_(users), Post.course_id.in_(courses)))
+
+    db.session.execute(post_tags.delete().where(post_tags.c.post_id.in_(posts)))
+    deleted = db.session.execute(db.delete(Post).where(Post.id.in_(posts.scalar_subquery()))).rowcount
+    db.session.execute(db.delete(User).where(User.id.in_(users.scalar_subquery())))
+    db.session.execute(db.delete(Course_Program).where(or_(Course_Program.course_id.in_(courses.scalar_subquery()),
+                                                           Course_Program.program_id.in_(programs.scalar_subquery()))))
+    db.session.execute(db.delete(CourseStats).where(CourseStats.course_id.in_(courses.scalar_subquery())))
+    db.session.execute(db.delete(CourseTagStats).where(CourseTagStats.course_id.in_(courses.scalar_subquery())))
+    db.session.execute(db.delete(Course).where(Course.id.in_(courses.scalar_subquery())))
+    db.session.execute(db.delete(Program).where(Program.id.in_(programs.scalar_subquery())))
+    finish()
+    print(f"Success! Removed synthetic data ({deleted:,} reviews).")
+
+
+def finish():
+    """Posts were written without the ORM, so rebuild the rollups and invalidate caches."""
+    CourseStats.rebuild()
+    CourseTagStats.rebuild()
+    CacheVersion.bump(CATALOG_VERSION)
+    CacheVersion.bump(FEED_VERSION)
+    CacheVersion.bump(TAG_VERSION)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a large, reproducible synthetic dataset')
+    subparsers = parser.add_subparsers(dest='command', help='Command to run')
+
+    generate_parser = subparsers.add_parser('generate', help='Add synthetic programs, courses, users and reviews')
+    generate_parser.add_argument('--posts', type=int, default=10000, help='Number of reviews to create')
+    generate_parser.add_argument('--programs', type=int, default=12, help='Number of programs to create')
+    generate_parser.add_argument('--courses', type=int, default=600, help='Number of courses to create')
+    generate_parser.add_argument('--reviews-per-user', type=float, default=6,
+                                 help='Average reviews per user (the number of users follows)')
+    generate_parser.add_argument('--skew', type=float, default=1.1,
+                                 help='Zipf exponent of course popularity (0 = uniform)')
+    generate_parser.add_argument('--days', type=int, default=3 * 365, help='Spread reviews over this many days')
+    generate_parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+    generate_parser.add_argument('--until', type=datetime.fromisoformat,
+                                 default=datetime.combine(date.today(), datetime.min.time()),
+                                 help='Date of the newest reviews, YYYY-MM-DD (default: today)')
+    generate_parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT/COPY batch')
+
+    subparsers.add_parser('clear', help='Remove all synthetic data')
+
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'generate':
+            generate(args)
+        elif args.command == 'clear':
+            clear()
+        else:
+            parser.print_help()
+
+if __name__ == '__main__':
+    main()
+
+
+# ./venv/bin/python scripts/generate_data.py generate --posts 100000
+# ./venv/bin/python scripts/generate_data.py generate --posts 1000000 --courses 2000 --programs 30 --seed 7
+# ./venv/bin/python scripts/generate_data.py clear
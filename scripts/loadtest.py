@@ -0,0 +1,418 @@
+import argparse
+import json
+import logging
+import platform
+import random
+import re
+import subprocess
+import threading
+import sys
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from http.cookiejar import CookieJar
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from flask import g, has_request_context, request, request_finished
+from sqlalchemy import event, func
+from werkzeug.serving import make_server
+from flasknetwork import create_app, db
+from flasknetwork.models import User, Post, Course, Course_Program, Tag, WorkloadLevel
+from flasknetwork.main.utils import SORT_OPTIONS
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(ROOT, 'loadtest-results')
+NEXT_LINK = re.compile(r'href="([^"]+)">Next &gt;')
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects instead of following them, so every request is timed on its own."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Recorder:
+    """Collects client-side timings, and SQL statement counts per request from inside the app."""
+
+    def __init__(self):
+        self.client = []   # (key, status, ms)
+        self.server = []   # (key, statements)
+        self.recording = False
+
+    def add(self, key, status, ms):
+        if self.recording:
+            self.client.append((key, status, ms))
+
+    def attach(self, app):
+        def count_statement(*args):
+            if has_request_context():
+                g.loadtest_statements = g.get('loadtest_statements', 0) + 1
+
+        def request_done(sender, response, **extra):
+            if self.recording and request.endpoint:
+                self.server.append((f"{request.method} {request.endpoint}", g.get('loadtest_statements', 0)))
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', count_statement)
+        request_finished.connect(request_done, app, weak=False)
+
+
+class VirtualUser(threading.Thread):
+    """One simulated visitor running a scenario in a loop until stopped."""
+
+    def __init__(self, scenario, base_url, dataset, recorder, stop, rng, args):
+        super().__init__(daemon=True)
+        self.scenario = scenario
+        self.base_url = base_url
+        self.dataset = dataset
+        self.recorder = recorder
+        self.stop = stop
+        self.rng = rng
+        self.args = args
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), NoRedirect)
+
+    def run(self):
+        step = getattr(self, self.scenario)
+        while not self.stop.is_set():
+            step()
+            if self.args.think_time:
+                self.stop.wait(self.rng.expovariate(1 / self.args.think_time))
+
+    def fetch(self, key, path, data=None):
+        """Request path, record it under key ('METHOD endpoint') and return (status, body)."""
+        body = urllib.parse.urlencode(data, doseq=True).encode() if data is not None else None
+        start = time.perf_counter()
+        try:
+            with self.opener.open(urllib.request.Request(self.base_url + path, data=body), timeout=60) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, content = e.code, e.read()
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            status, content = 0, b''
+        self.recorder.add(key, status, (time.perf_counter() - start) * 1000)
+        return status, content.decode('utf-8', 'replace')
+
+    # Scenarios
+
+    def browse(self):
+        """Anonymous visitor: feed, course pages, reviews and profiles, sometimes paging on."""
+        rng, data = self.rng, self.dataset
+        roll = rng.random()
+        sort = rng.choice(SORT_OPTIONS) if rng.random() < 0.3 else 'newest'
+        if roll < 0.35:
+            key, path = 'GET main.home', f"/home?sort={sort}"
+        elif roll < 0.7:
+            key, path = 'GET courses.course_detail', f"/courses/course/{self.popular_course()}?sort={sort}"
+        elif roll < 0.85:
+            key, path = 'GET users.user_posts', f"/user/{rng.choice(data['usernames'])}"
+        else:
+            key, path = 'GET posts.post', f"/post/{rng.choice(data['post_ids'])}"
+        status, content = self.fetch(key, path)
+        # Some visitors page through the listing
+        while status == 200 and rng.random() < 0.3 and not self.stop.is_set():
+            link = NEXT_LINK.search(content)
+            if not link:
+                break
+            status, content = self.fetch(key, link.group(1).replace('&amp;', '&'))
+
+    def autocomplete(self):
+        """Someone typing a course code or a word of its name into the search box."""
+        target = self.rng.choice(self.dataset['search_terms'])
+        for length in range(2, len(target) + 1):
+            if self.stop.is_set():
+                return
+            self.fetch('GET courses.api_search', f"/courses/api/search?q={urllib.parse.quote(target[:length])}")
+            if self.args.keystroke_delay:
+                time.sleep(self.args.keystroke_delay)
+
+    def review(self):
+        """A student logs in, opens the review form and submits a review of a course in their program."""
+        reviewers = self.dataset['reviewers']
+        if not reviewers:
+            self.stop.wait(1)
+            return
+        email, courses = reviewers.pop()
+        self.fetch('POST users.login', '/login', {'email': email, 'password': self.args.password})
+        for course_id in courses[:self.rng.randint(1, 3)]:
+            if self.stop.is_set():
+                break
+            self.fetch('GET posts.new_post', f"/post/new?course_id={course_id}")
+            scores = [self.rng.randint(1, 5) for _ in range(3)]
+            self.fetch('POST posts.new_post', '/post/new', {
+                'course': course_id, 'year_taken': datetime.utcnow().year,
+                'rating_professor': scores[0], 'rating_material': scores[1], 'rating_peers': scores[2],
+                'rating_workload': self.rng.choice(list(WorkloadLevel)).value,
+                'content': 'Load test review. ' * self.rng.randint(1, 20),
+                'tags': self.rng.sample(self.dataset['tag_ids'], min(len(self.dataset['tag_ids']), self.rng.randint(0, 2))),
+            })
+        self.fetch('GET users.logout', '/logout')
+
+    def popular_course(self):
+        return self.rng.choices(self.dataset['course_ids'], cum_weights=self.dataset['course_weights'])[0]
+
+
+def load_dataset(rng, review_users):
+    """Ids and names to request, and accounts with courses they can still review."""
+    course_rows = db.session.query(Course.id, Course.code, Course.name, func.count(Post.id))\
+        .outerjoin(Post, Post.course_id == Course.id).group_by(Course.id).all()
+    if not course_rows:
+        raise SystemExit("The database has no courses. Seed it first (see scripts/generate_data.py).")
+    # Course pages are visited in proportion to their reviews (+1 so empty courses show up too)
+    cumulative, total = [], 0
+    for row in course_rows:
+        total += row[3] + 1
+        cumulative.append(total)
+
+    terms = [row[1] for row in course_rows] + [word for row in course_rows for word in row[2].split() if len(word) > 3]
+    usernames = [name for (name,) in db.session.query(User.username).order_by(func.random()).limit(2000)]
+    post_ids = [post_id for (post_id,) in db.session.query(Post.id).order_by(func.random()).limit(5000)]
+
+    reviewers = []
+    candidates = User.query.filter_by(email_verified=True).order_by(func.random()).limit(review_users * 5).all()
+    for user in candidates:
+        if len(reviewers) >= review_users:
+            break
+        offered = {course_id for (course_id,) in db.session.query(Course_Program.course_id)
+                   .filter_by(program_id=user.program_id)}
+        reviewed = {course_id for (course_id,) in db.session.query(Post.course_id).filter_by(user_id=user.id)}
+        available = sorted(offered - reviewed)
+        if available:
+            rng.shuffle(available)
+            reviewers.append((user.email, available))
+
+    return {
+        'course_ids': [row[0] for row in course_rows], 'course_weights': cumulative,
+        'search_terms': sorted(set(terms)), 'usernames': usernames or ['nobody'],
+        'post_ids': post_ids or [0], 'reviewers': reviewers,
+        'tag_ids': [tag_id for (tag_id,) in db.session.query(Tag.id)],
+        'counts': {'courses': len(course_rows), 'users': db.session.query(func.count(User.id)).scalar(),
+                   'posts': db.session.query(func.count(Post.id)).scalar()},
+    }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('browse', 'autocomplete', 'review'):
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def assign_scenarios(users, mix):
+    """Split the virtual users between scenarios by weight (largest remainder)."""
+    total = sum(mix.values())
+    shares = {name: users * weight / total for name, weight in mix.items()}
+    counts = {name: int(share) for name, share in shares.items()}
+    for name in sorted(shares, key=lambda n: shares[n] - counts[n], reverse=True)[:users - sum(counts.values())]:
+        counts[name] += 1
+    return [name for name, count in counts.items() for _ in range(count)]
+
+
+def summarize(recorder, duration):
+    """Per-endpoint throughput, latency percentiles, error counts and SQL statements per request."""
+    statements = {}
+    for key, count in recorder.server:
+        statements.setdefault(key, []).append(count)
+
+    def stats(entries, key=None):
+        timings = [ms for _, _, ms in entries]
+        result = {
+            'requests': len(entries),
+            'throughput': round(len(entries) / duration, 2),
+            'errors': sum(1 for _, status, _ in entries if status == 0 or status >= 500),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'max_ms': round(max(timings), 2) if timings else 0.0,
+        }
+        if key is not None:
+            counts = statements.get(key, [])
+            result['sql_per_request'] = round(sum(counts) / len(counts), 2) if counts else None
+            result['sql_max'] = max(counts) if counts else None
+            result['status'] = {str(s): sum(1 for _, status, _ in entries if status == s)
+                                for s in sorted({status for _, status, _ in entries})}
+        return result
+
+    by_key = {}
+    for entry in recorder.client:
+        by_key.setdefault(entry[0], []).append(entry)
+    return stats(recorder.client), {key: stats(entries, key) for key, entries in sorted(by_key.items())}
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True,
+                                         stderr=subprocess.DEVNULL).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             cwd=ROOT, text=True, stderr=subprocess.DEVNULL).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def print_report(total, endpoints):
+    print(f"{'endpoint':<28} {'req':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'sql/req':>8} {'err':>5}")
+    for key, stats in list(endpoints.items()) + [('total', total)]:
+        sql = stats.get('sql_per_request')
+        print(f"{key:<28} {stats['requests']:7d} {stats['throughput']:8.1f} {stats['p50_ms']:7.1f}ms "
+              f"{stats['p95_ms']:7.1f}ms {stats['p99_ms']:7.1f}ms {'' if sql is None else f'{sql:.1f}':>8} "
+              f"{stats['errors']:5d}")
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    app = create_app()
+    # Virtual users post forms directly
+    app.config['WTF_CSRF_ENABLED'] = False
+    scenarios = assign_scenarios(args.users, args.mix)
+
+    with app.app_context():
+        dataset = load_dataset(rng, scenarios.count('review') * 50)
+        database = db.engine.dialect.name
+
+    recorder = Recorder()
+    recorder.attach(app)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    counts = ', '.join(f"{scenarios.count(name)} {name}" for name in args.mix)
+    print(f"{args.users} virtual users ({counts}) for {args.duration:.0f}s after {args.warmup:.0f}s warmup; "
+          f"{dataset['counts']['posts']:,} posts, {dataset['counts']['courses']:,} courses on {database}\n")
+
+    stop = threading.Event()
+    users = [VirtualUser(name, base_url, dataset, recorder, stop, random.Random(rng.random()), args)
+             for name in scenarios]
+    try:
+        for user in users:
+            user.start()
+        time.sleep(args.warmup)
+        recorder.recording = True
+        started = time.perf_counter()
+        time.sleep(args.duration)
+        recorder.recording = False
+        duration = time.perf_counter() - started
+        stop.set()
+        for user in users:
+            user.join(timeout=60)
+    finally:
+        server.shutdown()
+
+    total, endpoints = summarize(recorder, duration)
+    print_report(total, endpoints)
+
+    commit, dirty = git_revision()
+    result = {
+        'meta': {
+            'commit': commit, 'dirty': dirty, 'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'duration': round(duration, 2), 'warmup': args.warmup, 'users': args.users, 'mix': args.mix,
+            'think_time': args.think_time, 'seed': args.seed, 'database': database,
+            'dataset': dataset['counts'], 'python': platform.python_version(), 'cpus': os.cpu_count(),
+        },
+        'total': total,
+        'endpoints': endpoints,
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{(commit or 'nogit')[:8]}{'-dirty' if dirty else ''}.json")
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+def compare(args):
+    """Print per-endpoint changes between two result files; exit 1 if anything regressed."""
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.candidate) as f:
+        new = json.load(f)
+    print(f"baseline  {old['meta'].get('commit') or '?'} ({old['meta']['started_at']})")
+    print(f"candidate {new['meta'].get('commit') or '?'} ({new['meta']['started_at']})\n")
+
+    # (metric, higher is better)
+    metrics = [('throughput', True), ('p50_ms', False), ('p95_ms', False), ('p99_ms', False),
+               ('sql_per_request', False)]
+    regressions = []
+    print(f"{'endpoint':<28} {'metric':<16} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    rows = dict(new['endpoints'], total=new['total'])
+    for key, stats in rows.items():
+        before = old['total'] if key == 'total' else old['endpoints'].get(key)
+        if before is None:
+            print(f"{key:<28} (new endpoint)")
+            continue
+        for metric, higher_is_better in metrics:
+            a, b = before.get(metric), stats.get(metric)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a * 100 if a else 0.0
+            worse = change < -args.threshold if higher_is_better else change > args.threshold
+            if worse:
+                regressions.append((key, metric))
+            print(f"{key:<28} {metric:<16} {a:10.2f} {b:10.2f} {change:+7.1f}%{'  <-- regression' if worse else ''}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0f}%.")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the app with a realistic traffic mix')
+    subparsers = parser.add_subparsers(dest='command', help='Command to run')
+
+    run_parser = subparsers.add_parser('run', help='Serve the app locally and run the traffic mix against it')
+    run_parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+    run_parser.add_argument('--mix', type=parse_mix, default='browse=6,autocomplete=3,review=1',
+                            help='Scenario weights: browse, autocomplete, review')
+    run_parser.add_argument('--duration', type=float, default=30, help='Seconds measured')
+    run_parser.add_argument('--warmup', type=float, default=5, help='Seconds of unmeasured load first')
+    run_parser.add_argument('--think-time', type=float, default=0,
+                            help='Mean pause between scenario iterations in seconds (0 = closed loop)')
+    run_parser.add_argument('--keystroke-delay', type=float, default=0, help='Seconds between autocomplete requests')
+    run_parser.add_argument('--password', default='password',
+                            help='Password of the reviewing accounts (generate_data.py uses "password")')
+    run_parser.add_argument('--seed', type=int, default=1, help='Random seed for the traffic')
+    run_parser.add_argument('--output', help='Result file (default: loadtest-results/<time>-<commit>.json)')
+
+    compare_parser = subparsers.add_parser('compare', help='Diff two result files')
+    compare_parser.add_argument('baseline', help='Earlier result file')
+    compare_parser.add_argument('candidate', help='Later result file')
+    compare_parser.add_argument('--threshold', type=float, default=10,
+                                help='Percent change in throughput or latency reported as a regression')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        compare(args)
+    else:
+        parser.print_help()
+
+if __name__ == '__main__':
+    main()
+
+
+# ./venv/bin/python scripts/generate_data.py generate --posts 100000
+# ./venv/bin/python scripts/loadtest.py run --users 20 --duration 60
+# ./venv/bin/python scripts/loadtest.py run --mix browse=1,autocomplete=1 --think-time 0.5 --output before.json
+# ./venv/bin/python scripts/loadtest.py compare before.json loadtest-results/20250101-120000-abcdef12.json
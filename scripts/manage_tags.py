@@ -10,7 +10,16 @@ from dotenv import load_dotenv
 load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
 
 from flasknetwork import create_app, db
-from flasknetwork.models import Post, Tag
+from flasknetwork.models import Post, Tag, CourseStats, CourseTagStats, CacheVersion
+from flasknetwork.main.conditional import FEED_VERSION
+from flasknetwork.posts.tags import TAG_VERSION
+
+def mark_modified(posts):
+    """Touch posts, their course pages and the home feed so cached cards and ETags change."""
+    for post in posts:
+        post.touch()
+        CourseStats.touch(post.course_id)
+    CacheVersion.bump(FEED_VERSION)
 
 def add_tag_to_post(post_id, tag_names):
     """Adds tags to a specific post."""
@@ -31,6 +40,7 @@ def add_tag_to_post(post_id, tag_names):
             print("No valid tags to add. Aborting.")
             return
 
+    old_tags = CourseTagStats.snapshot(post)
     added_count = 0
     for tag in tags_to_add:
         if tag not in post.tags:
@@ -41,6 +51,8 @@ def add_tag_to_post(post_id, tag_names):
             print(f" -> Post already has tag: {tag.name}")
 
     if added_count > 0:
+        CourseTagStats.post_changed(old_tags, post)
+        mark_modified([post])
         db.session.commit()
         print(f"Success! {added_count} tags added.")
     else:
@@ -63,6 +75,7 @@ def remove_tag_from_post(post_id, tag_names):
     if missing_db_tags:
         print(f"Warning: These tags don't exist in the database: {', '.join(missing_db_tags)}")
 
+    old_tags = CourseTagStats.snapshot(post)
     removed_count = 0
     for tag in tags_to_remove:
         if tag in post.tags:
@@ -73,6 +86,8 @@ def remove_tag_from_post(post_id, tag_names):
             print(f" -> Post does not have tag: {tag.name}")
 
     if removed_count > 0:
+        CourseTagStats.post_changed(old_tags, post)
+        mark_modified([post])
         db.session.commit()
         print(f"Success! {removed_count} tags removed.")
     else:
@@ -85,8 +100,7 @@ def delete_tag_globally(tag_name):
         print(f"Error: Tag '{tag_name}' not found in database.")
         return
 
-    # Count usage before deletion
-    usage_count = len(tag.posts)
+    usage_count = tag.post_count
     print(f"\nWARNING: You are about to PERMANENTLY DELETE the tag: '{tag.name}'")
     print(f"This tag is currently used on {usage_count} posts.")
     print("This action cannot be undone.")
@@ -96,11 +110,16 @@ def delete_tag_globally(tag_name):
         print("Aborted.")
         return
 
+    mark_modified(tag.posts)
+
     # SQLAlchemy handles the association table cleanup automatically
     # But explicitly clearing it is safe/explicit
     tag.posts = [] 
+    CourseTagStats.query.filter_by(tag_id=tag.id).delete(synchronize_session=False)
     
     db.session.delete(tag)
+    # Workers drop the tag from their tag registry
+    CacheVersion.bump(TAG_VERSION)
     db.session.commit()
     print(f"Tag '{tag_name}' has been deleted from the database and removed from {usage_count} posts.")
 
@@ -110,7 +129,7 @@ def list_tags():
     print(f"\nFound {len(tags)} tags:")
     print("-" * 40)
     for tag in tags:
-        print(f"- {tag.name} ({tag.sentiment.value}) [Used on {len(tag.posts)} posts]")
+        print(f"- {tag.name} ({tag.sentiment.value}) [Used on {tag.post_count} posts]")
     print("-" * 40)
 
 def main():
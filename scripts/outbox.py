@@ -0,0 +1,167 @@
+import argparse
+import random
+import socketserver
+import sys
+import os
+import time
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from flasknetwork import create_app, db
+from flasknetwork.models import OutboxEmail
+from flasknetwork.outbox import outbox_sender, queue_depth, SmtpConnection
+
+
+def status():
+    """Prints queue depth and the most recent dead-lettered emails."""
+    for name, count in queue_depth().items():
+        print(f"{name:<8} {count}")
+    dead = OutboxEmail.query.filter_by(status=OutboxEmail.DEAD)\
+        .order_by(OutboxEmail.id.desc()).limit(10).all()
+    if dead:
+        print("\nRecent dead letters:")
+        for email in dead:
+            print(f" #{email.id} to {email.recipients} '{email.subject}' "
+                  f"({email.attempts} attempts): {email.last_error}")
+
+
+def retry_dead(email_id=None):
+    """Moves dead-lettered emails back to the queue."""
+    query = OutboxEmail.query.filter_by(status=OutboxEmail.DEAD)
+    if email_id:
+        query = query.filter_by(id=email_id)
+    count = 0
+    for email in query:
+        email.status = OutboxEmail.PENDING
+        email.attempts = 0
+        email.next_attempt_at = email.created_at
+        count += 1
+    db.session.commit()
+    print(f"Requeued {count} emails.")
+
+
+def flush(app):
+    """Sends everything that is due now over one connection, then exits."""
+    connection = SmtpConnection(app.config)
+    total = 0
+    try:
+        while True:
+            handled = outbox_sender.process_batch(connection)
+            if not handled:
+                break
+            total += handled
+    finally:
+        connection.close()
+    print(f"Handled {total} emails.")
+    status()
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server that prints received messages (no TLS or auth)."""
+
+    fail_rate = 0.0
+    reject_rate = 0.0
+
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        self.reply('220 stub SMTP ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode(errors='replace').rstrip('\r\n')
+            if not line:
+                return
+            command = line.split(' ', 1)[0].upper()
+            if command in ('HELO', 'EHLO'):
+                self.reply('250 stub')
+            elif command == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                recipients.append(line.split(':', 1)[1].strip())
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                size = 0
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b'.\r\n', b'.\n', b''):
+                        break
+                    size += len(data)
+                roll = random.random()
+                if roll < self.reject_rate:
+                    self.reply('550 Mailbox unavailable (stub)')
+                elif roll < self.reject_rate + self.fail_rate:
+                    self.reply('451 Try again later (stub)')
+                else:
+                    print(f"{time.strftime('%H:%M:%S')} connection {id(self.connection):x}: "
+                          f"{size} bytes to {', '.join(recipients)}")
+                    self.reply('250 Queued')
+            elif command in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+def stub_smtp(port, fail_rate, reject_rate):
+    StubSMTPHandler.fail_rate = fail_rate
+    StubSMTPHandler.reject_rate = reject_rate
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer(('127.0.0.1', port), StubSMTPHandler) as server:
+        print(f"Stub SMTP server on 127.0.0.1:{port} (Ctrl+C to stop)")
+        print(f"Point the app at it with MAIL_SERVER=127.0.0.1 MAIL_PORT={port} MAIL_USE_TLS=false")
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Operate the email outbox')
+    subparsers = parser.add_subparsers(dest='command', help='Command to run')
+
+    subparsers.add_parser('run', help='Deliver emails continuously (for OUTBOX_SENDER=external)')
+    subparsers.add_parser('flush', help='Send all due emails once and exit')
+    subparsers.add_parser('status', help='Show queue depth and dead letters')
+
+    retry_parser = subparsers.add_parser('retry-dead', help='Requeue dead-lettered emails')
+    retry_parser.add_argument('--id', type=int, help='Only requeue this email')
+
+    stub_parser = subparsers.add_parser('stub-smtp', help='Run a local SMTP sink for testing')
+    stub_parser.add_argument('--port', type=int, default=1025, help='Port to listen on')
+    stub_parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction answered with 451 (retried)')
+    stub_parser.add_argument('--reject-rate', type=float, default=0.0, help='Fraction answered with 550 (dead-lettered)')
+
+    args = parser.parse_args()
+
+    if args.command == 'stub-smtp':
+        stub_smtp(args.port, args.fail_rate, args.reject_rate)
+        return
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'run':
+            outbox_sender.run()
+        elif args.command == 'flush':
+            flush(app)
+        elif args.command == 'status':
+            status()
+        elif args.command == 'retry-dead':
+            retry_dead(args.id)
+        else:
+            parser.print_help()
+
+if __name__ == '__main__':
+    main()
+
+
+# ./venv/bin/python scripts/outbox.py stub-smtp --port 1025 --fail-rate 0.2
+# MAIL_SERVER=127.0.0.1 MAIL_PORT=1025 MAIL_USE_TLS=false ./venv/bin/python scripts/outbox.py flush
+# ./venv/bin/python scripts/outbox.py status
+# ./venv/bin/python scripts/outbox.py retry-dead
@@ -0,0 +1,115 @@
+import argparse
+import sys
+import os
+from collections import Counter
+# Add parent directory to path to allow importing flasknetwork
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+
+from flasknetwork import create_app
+from flasknetwork.timing import request_timing
+
+
+def read_profile(path):
+    """Returns {stack: samples} from a collapsed-stack file."""
+    stacks = Counter()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+def select(paths, match):
+    return [path for path in paths if not match or match in os.path.basename(path)]
+
+
+def list_profiles(match):
+    """Lists stored profiles, newest last."""
+    paths = select(request_timing.store.paths(), match)
+    print(f"{len(paths)} profile(s) in {request_timing.store.directory}")
+    for path in paths:
+        print(f"  {os.path.basename(path)} ({sum(read_profile(path).values())} samples)")
+
+
+def top(match, limit, app_only):
+    """Merges the selected profiles and prints the functions with the most samples."""
+    paths = select(request_timing.store.paths(), match)
+    if not paths:
+        print("No profiles found.")
+        return
+    own, total = Counter(), Counter()
+    samples = 0
+    for path in paths:
+        for stack, count in read_profile(path).items():
+            frames = stack.split(';')
+            if app_only:
+                frames = [frame for frame in frames if '(flasknetwork/' in frame] or frames[-1:]
+            samples += count
+            own[frames[-1]] += count
+            # A frame counts once per stack, however often it recurses
+            for frame in set(frames):
+                total[frame] += count
+
+    print(f"{samples} samples from {len(paths)} profile(s)\n")
+    print(f"{'own %':>7} {'total %':>8}  function")
+    for frame, count in own.most_common(limit):
+        print(f"{count / samples:7.1%} {total[frame] / samples:8.1%}  {frame}")
+
+
+def merge(match, output):
+    """Merges the selected profiles into one collapsed-stack file (e.g. for flamegraph.pl or speedscope)."""
+    merged = Counter()
+    paths = select(request_timing.store.paths(), match)
+    for path in paths:
+        merged.update(read_profile(path))
+    with open(output, 'w', encoding='utf-8') as f:
+        for stack, count in merged.most_common():
+            f.write(f"{stack} {count}\n")
+    print(f"Success! Merged {len(paths)} profile(s) into {output}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect request profiles from the sampling profiler')
+    subparsers = parser.add_subparsers(dest='command', help='Command to run')
+
+    list_parser = subparsers.add_parser('list', help='List stored profiles')
+    list_parser.add_argument('--match', help='Only profiles whose file name contains this (e.g. course_detail)')
+
+    top_parser = subparsers.add_parser('top', help='Functions with the most samples')
+    top_parser.add_argument('--match', help='Only profiles whose file name contains this')
+    top_parser.add_argument('--limit', type=int, default=25, help='Number of functions to show')
+    top_parser.add_argument('--app', action='store_true',
+                            help='Attribute samples to the innermost flasknetwork frame (code or template)')
+
+    merge_parser = subparsers.add_parser('merge', help='Merge profiles into one collapsed-stack file')
+    merge_parser.add_argument('output', help='Output file')
+    merge_parser.add_argument('--match', help='Only profiles whose file name contains this')
+
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'list':
+            list_profiles(args.match)
+        elif args.command == 'top':
+            top(args.match, args.limit, args.app)
+        elif args.command == 'merge':
+            merge(args.match, args.output)
+        else:
+            parser.print_help()
+
+if __name__ == '__main__':
+    main()
+
+
+# PROFILE_SLOW_MS=200 (or PROFILE_SAMPLE_RATE=0.01) in the web process, then:
+# ./venv/bin/python scripts/profiles.py list --match course_detail
+# ./venv/bin/python scripts/profiles.py top --match course_detail --app
+# ./venv/bin/python scripts/profiles.py merge course_detail.collapsed --match course_detail
+# curl -H "X-Profile-Token: $STATS_TOKEN" -D - -o /dev/null http://localhost:5000/courses/course/1
@@ -1,147 +1,135 @@
-# pip installed selenium beautifulsoup4
-# it said this after "pip install selenium beautifulsoup4": 
-# "
-# Installing collected packages: sortedcontainers, websocket-client, urllib3, soupsieve, sniffio, pysocks, pycparser, h11, certifi, attrs, wsproto, outcome, cffi, beautifulsoup4, trio, trio-websocket, selenium
-# Successfully installed attrs-25.3.0 beautifulsoup4-4.13.4 certifi-2025.8.3 cffi-1.17.1 h11-0.16.0 outcome-1.3.0.post0 pycparser-2.22 pysocks-1.7.1 selenium-4.35.0 sniffio-1.3.1 sortedcontainers-2.4.0 soupsieve-2.7 trio-0.30.0 trio-websocket-0.12.2 urllib3-2.5.0 websocket-client-1.8.0 wsproto-1.2.0
-# "
-# ^ not added to requirements.txt !
+# Needs selenium (snapshot only) and beautifulsoup4, which are not in requirements.txt:
+# pip install selenium beautifulsoup4
 
-from dotenv import load_dotenv
+import argparse
+import glob
+import re
 import sys
 import os
-
+import time
+from concurrent.futures import ProcessPoolExecutor
 # Add parent directory to path to allow importing flasknetwork
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
-
-from selenium import webdriver
-from bs4 import BeautifulSoup
-import time
-
-driver = webdriver.Chrome()
-#driver.get("https://www.kth.se/student/kurser/program/TCOMK/20252/arskurs1?l=en") # added to prod db (only åk1)
-#driver.get("https://www.kth.se/student/kurser/program/CTKEM/20252/arskurs1?l=en") # added to prod db (only åk1)
-#driver.get("https://www.kth.se/student/kurser/program/CDATE/20252/arskurs1?l=en")
-# all of the above are done ^
-
-time.sleep(5)
-
-html = driver.page_source
-soup = BeautifulSoup(html, "html.parser")
-#print(soup.prettify())
-driver.quit()
-
-table = soup.find("table")
-print(table)
-
-for row in soup.find_all("tr"):
-    cols = row.find_all("td")
-    if len(cols) >= 1:
-        text = cols[0].get_text(strip=True)
-        parts = text.split(" ", 1)
-        if len(parts) == 2:
-            course_code = parts[0]
-            course_name = parts[1][:200] # Clip to 200 chars just in case
-            print("\ncourse code:", course_code, "\ncourse name:", course_name)
-
-
-
-print("\n\n\n")
-
-
-
-import re
-
-title = (soup.title.string or "").strip()
-
-
-# 2) Extract *all* codes in parentheses, take the *last* one
-codes = re.findall(r"\(([A-Z0-9]+)\)", title)
-programme_code = codes[-1] if codes else None
-
-
-# 3) Cut off everything *after* that "(CODE)"
-before = title.split(f"({programme_code})", 1)[0]
-
-
-# 4) If there’s a comma, assume the *last* clause is the programme phrase
-raw_prog = before.rsplit(",", 1)[-1].strip()
-
-
-# 5) Strip any “—Programme in” prefix (Degree/Master’s/Bachelor’s etc.)
-programme_name = re.sub(
-    r"^(?:.*Programme(?:\s+in)?\s+)",
-    "",
-    raw_prog,
-    flags=re.IGNORECASE
-).strip()
-
-
-print("programme code:", programme_code)
-print("programme name:", programme_name)
-
-
-
-# add and commit program and courses
-
-from flasknetwork import create_app, db
-from flasknetwork.models import Course_Program, Program, Course
-
-app = create_app()
-app.app_context().push()
-
-program = Program.query.filter_by(code=programme_code).first()
-if not program:
-    while True:
-        ptype = input(f"Enter type for “{programme_name}” [{programme_code}] (bachelor/master): ").strip().lower()
-        if ptype in ("bachelor", "master"):
-            break
-        print("  ✗ Invalid—must be 'bachelor' or 'master'")
-    # 3) create & commit
-    program = Program(
-        name=programme_name,
-        code=programme_code,
-        program_type=ptype
-    )
-    db.session.add(program)
-    db.session.commit()
-    print(f"✓ Created Program {programme_code} ({programme_name}) as {ptype}")
-else:
-    print(f"→ Program {programme_code} already exists ({program.program_type})")
-
-
-for row in soup.find_all("tr"):
-    cols = row.find_all("td")
-    if len(cols) < 1:
-        continue
-
-    text = cols[0].get_text(strip=True)
-    parts = text.split(" ", 1)
-    if len(parts) != 2:
-        continue
+from dotenv import load_dotenv
 
-    course_code, course_name = parts
+# Load environment variables from .env file in parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
 
-    # 1) Upsert course
-    course = Course.query.filter_by(code=course_code).first()
-    if not course:
-        course = Course(name=course_name, code=course_code)
-        db.session.add(course)
-        db.session.commit()
-        print(f"✓ Created Course {course_code} ({course_name})")
-    else:
-        print(f"→ Course {course_code} already exists")
-
-    existing_link = Course_Program.query.filter_by(
-        course_id=course.id, 
-        program_id=program.id
-    ).first()
-    if not existing_link:
-        #program.courses.append(course)
-        cp = Course_Program(course=course, program=program)
-        db.session.add(cp)
-        db.session.commit()
-        print(f"→ Linked {course_code} to Program {programme_code}")
+from flasknetwork import create_app
+from flasknetwork.courses.ingest import parse_programme_file, ingest_programme
+
+
+def snapshot(urls, out_dir, wait):
+    """Saves rendered programme pages (the course table is built by JavaScript) for offline ingestion."""
+    from selenium import webdriver
+
+    os.makedirs(out_dir, exist_ok=True)
+    driver = webdriver.Chrome()
+    try:
+        for url in urls:
+            driver.get(url)
+            time.sleep(wait)
+            # .../kurser/program/CDATE/20252/arskurs1?l=en -> CDATE-20252-arskurs1.html
+            match = re.search(r"/program/([^?#]+)", url)
+            name = (match.group(1) if match else re.sub(r"\W+", '-', url)).strip('/').replace('/', '-')
+            path = os.path.join(out_dir, f"{name}.html")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(driver.page_source)
+            print(f"✓ Saved {url} -> {path}")
+    finally:
+        driver.quit()
+
+
+def expand_paths(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, '*.html')))
+        else:
+            files.append(path)
+    return files
+
+
+def print_diff(page, diff, dry_run):
+    prefix = 'Would' if dry_run else 'Did'
+    title = f"{page.code} ({page.name})" + (' [new programme]' if diff.new_program else '')
+    print(f"{title}: {len(page.courses)} courses on the page ({page.source})")
+    for code, name in diff.new_courses:
+        print(f"  + course {code} ({name})")
+    for code, old, new in diff.renamed_courses:
+        print(f"  ~ course {code}: '{old}' -> '{new}'")
+    for code in diff.new_links:
+        print(f"  + link {code} -> {page.code}")
+    for code in diff.unlisted_links:
+        print(f"  ? {code} is linked to {page.code} but not on this page (kept)")
+    if not (diff.new_program or diff.new_courses or diff.renamed_courses or diff.new_links):
+        print("  (up to date)")
     else:
-        print(f"→ {course_code} already linked to Program {programme_code}")
\ No newline at end of file
+        print(f"  {prefix} add {len(diff.new_courses)} courses, rename {len(diff.renamed_courses)}, "
+              f"add {len(diff.new_links)} links")
+
+
+def ingest(paths, workers, program_type, update_names, dry_run):
+    """Parses saved programme pages in parallel, then upserts each programme in its own transaction."""
+    files = expand_paths(paths)
+    if not files:
+        print("No HTML files given.")
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pages = list(executor.map(parse_programme_file, files))
+
+    failed = 0
+    for page in pages:
+        try:
+            diff = ingest_programme(page, program_type=program_type, update_names=update_names, dry_run=dry_run)
+        except Exception as e:
+            failed += 1
+            print(f"✗ {page.source}: {e}")
+            continue
+        print_diff(page, diff, dry_run)
+    print(f"\n{'Dry run: nothing written. ' if dry_run else ''}{len(pages) - failed}/{len(pages)} programmes ok.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import KTH programme pages into the course catalog')
+    subparsers = parser.add_subparsers(dest='command', help='Command to run')
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='Save programme pages with a browser')
+    snapshot_parser.add_argument('urls', nargs='+', help='Programme page URLs')
+    snapshot_parser.add_argument('--out', default='snapshots', help='Directory for the HTML files')
+    snapshot_parser.add_argument('--wait', type=float, default=5, help='Seconds to let each page render')
+
+    ingest_parser = subparsers.add_parser('ingest', help='Upsert programmes, courses and links from saved pages')
+    ingest_parser.add_argument('paths', nargs='+', help='HTML files or directories of them')
+    ingest_parser.add_argument('--workers', type=int, default=None, help='Parser processes (default: CPU count)')
+    ingest_parser.add_argument('--program-type', choices=['bachelor', 'master'],
+                               help="Type for new programmes whose page title doesn't say")
+    ingest_parser.add_argument('--update-names', action='store_true',
+                               help='Also rename existing courses whose name differs from the page')
+    ingest_parser.add_argument('--dry-run', action='store_true', help='Only show what would change')
+
+    args = parser.parse_args()
+
+    if args.command == 'snapshot':
+        snapshot(args.urls, args.out, args.wait)
+        return
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'ingest':
+            ingest(args.paths, args.workers, args.program_type, args.update_names, args.dry_run)
+        else:
+            parser.print_help()
+
+if __name__ == '__main__':
+    main()
+
+
+# Already in the prod db (only åk1):
+#   https://www.kth.se/student/kurser/program/TCOMK/20252/arskurs1?l=en
+#   https://www.kth.se/student/kurser/program/CTKEM/20252/arskurs1?l=en
+#   https://www.kth.se/student/kurser/program/CDATE/20252/arskurs1?l=en
+# ./venv/bin/python scripts/scrape.py snapshot https://www.kth.se/student/kurser/program/CDATE/20252/arskurs1?l=en
+# ./venv/bin/python scripts/scrape.py ingest snapshots/ --dry-run
+# ./venv/bin/python scripts/scrape.py ingest snapshots/
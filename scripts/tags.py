@@ -14,7 +14,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
   # seeding after migration
 from flasknetwork import db, create_app
-from flasknetwork.models import Tag, TagSentiment
+from flasknetwork.models import Tag, TagSentiment, CacheVersion
+from flasknetwork.posts.tags import TAG_VERSION
    
 app = create_app()
 with app.app_context():
@@ -40,4 +41,6 @@ with app.app_context():
     for name, sentiment in tags_data:
         tag = Tag(name=name, sentiment=sentiment)
         db.session.add(tag)
+    # Workers reload their tag registry
+    CacheVersion.bump(TAG_VERSION)
     db.session.commit()
\ No newline at end of file
@@ -0,0 +1,164 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Configure before flasknetwork.config is imported; never run against DATABASE_URL
+os.environ['DATABASE_URL'] = ''
+os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+os.environ.setdefault('FLASK_SECRET_KEY', 'test')
+os.environ['OUTBOX_SENDER'] = 'external'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+os.environ['STATS_TOKEN'] = STATS_TOKEN = 'test-stats-token'
+os.environ.pop('SERVER_TIMING', None)
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+from sqlalchemy import event
+from flasknetwork import create_app, db
+from flasknetwork.models import User, Program, Course, Course_Program, Post, Tag, TagSentiment, \
+    WorkloadLevel, CourseStats, CourseTagStats
+from flasknetwork.courses.catalog import course_catalog
+from flasknetwork.courses.programs import program_courses
+from flasknetwork.main.fragments import post_card_cache
+from flasknetwork.posts.tags import tag_registry
+from flasknetwork.sqlstats import sql_stats
+from flasknetwork.users.hashing import password_hasher
+from flasknetwork.users.loader import user_cache
+
+PASSWORD = 'password'
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, MAIL_SUPPRESS_SEND=True)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def database(app):
+    """A fresh schema and empty in-process caches for every test."""
+    with app.app_context():
+        db.create_all()
+        yield db
+        db.session.remove()
+        db.drop_all()
+    course_catalog._index = None
+    tag_registry._index = None
+    program_courses.clear()
+    for cache in (post_card_cache, user_cache):
+        if cache.backend is not None:
+            cache.backend.clear()
+    sql_stats.reset()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """Log a user in on the test client."""
+    def login(user):
+        # Tests share the app context, and with it Flask-Login's cached user
+        g.pop('_login_user', None)
+        return client.post('/login', data={'email': user.email, 'password': PASSWORD})
+    return login
+
+
+class StatementCounter:
+    """Counts the SQL statements run on the engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+
+@pytest.fixture
+def count_statements(database):
+    return lambda: StatementCounter(db.engine)
+
+
+class Factory:
+    """Creates programs, users, courses and reviews with the side effects of the routes."""
+
+    def __init__(self):
+        self._password = None
+        self._program = None
+        self._serial = 0
+
+    def _next(self):
+        self._serial += 1
+        return self._serial
+
+    def program(self, **fields):
+        n = self._next()
+        program = Program(**{'name': f'Program {n}', 'code': f'P{n:04d}', 'program_type': 'bachelor', **fields})
+        db.session.add(program)
+        db.session.flush()
+        return program
+
+    def user(self, program=None, **fields):
+        if self._password is None:
+            self._password = password_hasher.hash(PASSWORD)
+        if program is None:
+            if self._program is None:
+                self._program = self.program()
+            program = self._program
+        n = self._next()
+        user = User(**{'username': f'user{n}', 'email': f'user{n}@kth.se', 'password': self._password,
+                       'program': program, 'email_verified': True, **fields})
+        db.session.add(user)
+        db.session.flush()
+        return user
+
+    def course(self, programs=(), **fields):
+        n = self._next()
+        course = Course(**{'name': f'Course {n}', 'code': f'DD{1000 + n}', **fields})
+        db.session.add(course)
+        db.session.flush()
+        for program in programs:
+            db.session.add(Course_Program(course_id=course.id, program_id=program.id))
+        return course
+
+    def tag(self, **fields):
+        n = self._next()
+        tag = Tag(**{'name': f'tag {n}', 'sentiment': TagSentiment.positive, **fields})
+        db.session.add(tag)
+        db.session.flush()
+        return tag
+
+    def post(self, author, course, tags=(), minutes_ago=0, **fields):
+        post = Post(**{'author': author, 'course': course, 'year_taken': 2024, 'rating_professor': 4,
+                       'rating_material': 3, 'rating_peers': 5, 'rating_workload': WorkloadLevel.medium,
+                       'content': 'A review of the course.',
+                       'date_posted': datetime.utcnow() - timedelta(minutes=minutes_ago), **fields})
+        post.tags = list(tags)
+        db.session.add(post)
+        CourseStats.post_added(post)
+        CourseTagStats.post_added(post)
+        return post
+
+
+@pytest.fixture
+def make(database):
+    return Factory()
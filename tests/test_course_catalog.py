@@ -0,0 +1,24 @@
+from flasknetwork import db
+from flasknetwork.courses.catalog import course_catalog
+
+
+def test_review_count_refresh_swaps_the_index(app, make, monkeypatch):
+    algebra, analysis = make.course(name='Linear Algebra'), make.course(name='Linear Analysis')
+    db.session.commit()
+    before = course_catalog.get_index()
+    assert [c['id'] for c in course_catalog.search('linear', 10)] == [algebra.id, analysis.id]
+
+    for _ in range(2):
+        make.post(make.user(), analysis)
+    db.session.commit()
+    monkeypatch.setitem(app.config, 'COURSE_CATALOG_CHECK_INTERVAL', 0)
+    after = course_catalog.get_index()
+
+    # Requests still holding the old index keep a consistent snapshot
+    assert after is not before
+    assert [entry.review_count for entry in before.entries] == [0, 0]
+    assert [c['id'] for c in before.search('linear', 10)] == [algebra.id, analysis.id]
+    assert after.by_id[analysis.id].review_count == 2
+    assert after.etag != before.etag
+    # Reviews break the tie between equally good matches
+    assert [c['id'] for c in course_catalog.search('linear', 10)] == [analysis.id, algebra.id]
@@ -0,0 +1,220 @@
+import re
+import pytest
+from sqlalchemy import func
+from flasknetwork import db
+from flasknetwork.models import Post, Tag, CourseStats, CourseTagStats, WorkloadLevel, post_tags
+
+
+def rollup(course_id):
+    stats = db.session.get(CourseStats, course_id)
+    if stats is None:
+        return None
+    return (stats.review_count, stats.sum_professor, stats.sum_material, stats.sum_peers,
+            stats.workload_light, stats.workload_medium, stats.workload_heavy)
+
+
+def from_posts(course_id):
+    posts = Post.query.filter_by(course_id=course_id).all()
+    if not posts:
+        return None
+    return (len(posts), sum(p.rating_professor for p in posts), sum(p.rating_material for p in posts),
+            sum(p.rating_peers for p in posts),
+            sum(p.rating_workload == WorkloadLevel.light for p in posts),
+            sum(p.rating_workload == WorkloadLevel.medium for p in posts),
+            sum(p.rating_workload == WorkloadLevel.heavy for p in posts))
+
+
+@pytest.fixture
+def courses(make):
+    first, second = make.course(), make.course()
+    for i in range(4):
+        make.post(make.user(), first, rating_professor=1 + i, rating_workload=list(WorkloadLevel)[i % 3])
+    make.post(make.user(), second)
+    db.session.commit()
+    return first, second
+
+
+def drop_stats(course):
+    db.session.execute(db.delete(CourseStats).where(CourseStats.course_id == course.id))
+    db.session.commit()
+
+
+def assert_consistent(*courses):
+    for course in courses:
+        assert rollup(course.id) == from_posts(course.id)
+
+
+@pytest.mark.parametrize('missing', [False, True])
+def test_create(make, courses, missing):
+    first, second = courses
+    if missing:
+        drop_stats(first)
+    make.post(make.user(), first, rating_professor=2)
+    db.session.commit()
+    assert_consistent(first, second)
+
+
+@pytest.mark.parametrize('missing', [False, True])
+def test_update(courses, missing):
+    first, second = courses
+    if missing:
+        drop_stats(first)
+    post = Post.query.filter_by(course_id=first.id).first()
+    old = CourseStats.snapshot(post)
+    post.rating_professor, post.rating_peers, post.rating_workload = 5, 1, WorkloadLevel.heavy
+    CourseStats.post_changed(old, post)
+    db.session.commit()
+    assert_consistent(first, second)
+
+
+@pytest.mark.parametrize('missing', ['none', 'old', 'new', 'both'])
+def test_move(courses, missing):
+    first, second = courses
+    if missing in ('old', 'both'):
+        drop_stats(first)
+    if missing in ('new', 'both'):
+        drop_stats(second)
+    post = Post.query.filter_by(course_id=first.id).first()
+    old = CourseStats.snapshot(post)
+    post.course_id, post.rating_material = second.id, 1
+    CourseStats.post_changed(old, post)
+    db.session.commit()
+    assert_consistent(first, second)
+
+
+@pytest.mark.parametrize('missing', [False, True])
+def test_delete(courses, missing):
+    first, second = courses
+    if missing:
+        drop_stats(first)
+    post = Post.query.filter_by(course_id=first.id).first()
+    db.session.delete(post)
+    CourseStats.post_removed(post)
+    db.session.commit()
+    assert_consistent(first, second)
+
+
+def test_text_edit_touches_course(courses):
+    first, _ = courses
+    before = db.session.get(CourseStats, first.id).last_modified
+    post = Post.query.filter_by(course_id=first.id).first()
+    old = CourseStats.snapshot(post)
+    post.content = 'Edited.'
+    CourseStats.post_changed(old, post)
+    db.session.commit()
+    stats = db.session.get(CourseStats, first.id)
+    assert stats.last_modified >= before
+    assert rollup(first.id) == from_posts(first.id)
+
+
+def tag_rollup():
+    return {(row.course_id, row.tag_id): row.post_count for row in CourseTagStats.query if row.post_count}
+
+
+def tags_from_posts():
+    rows = db.session.execute(
+        db.select(Post.course_id, post_tags.c.tag_id, func.count())
+        .join(post_tags, post_tags.c.post_id == Post.id)
+        .group_by(Post.course_id, post_tags.c.tag_id))
+    return {(course_id, tag_id): count for course_id, tag_id, count in rows}
+
+
+def assert_tags_consistent():
+    db.session.expire_all()
+    assert tag_rollup() == tags_from_posts()
+    used = db.session.execute(db.select(post_tags.c.tag_id, func.count()).group_by(post_tags.c.tag_id))
+    assert {tag.id: tag.post_count for tag in Tag.query} == {tag.id: 0 for tag in Tag.query} | dict(used.all())
+
+
+@pytest.fixture
+def tagged(make):
+    """Two courses and four tags; the last tag is on no review of the first course."""
+    first, second = make.course(), make.course()
+    tags = [make.tag() for _ in range(4)]
+    for review_tags in ([tags[0], tags[1]], [tags[1], tags[2]], [tags[0]]):
+        make.post(make.user(), first, tags=review_tags)
+    make.post(make.user(), second, tags=[tags[1], tags[3]])
+    db.session.commit()
+    return first, second, tags
+
+
+def drop_tag_stats(course):
+    db.session.execute(db.delete(CourseTagStats).where(CourseTagStats.course_id == course.id))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('missing', [False, True])
+@pytest.mark.parametrize('new_tag', [False, True])
+def test_tags_create(make, tagged, missing, new_tag):
+    first, second, tags = tagged
+    if missing:
+        drop_tag_stats(first)
+    make.post(make.user(), first, tags=[tags[0], tags[3] if new_tag else tags[1]])
+    db.session.commit()
+    assert_tags_consistent()
+
+
+@pytest.mark.parametrize('missing', [False, True])
+@pytest.mark.parametrize('new_tag', [False, True])
+def test_tags_edit(tagged, missing, new_tag):
+    first, second, tags = tagged
+    if missing:
+        drop_tag_stats(first)
+    post = Post.query.filter_by(course_id=first.id).order_by(Post.id).first()
+    old = CourseTagStats.snapshot(post)
+    # Drop tags[1], keep tags[0], add one
+    post.tags = [tags[0], tags[3] if new_tag else tags[2]]
+    CourseTagStats.post_changed(old, post)
+    db.session.commit()
+    assert_tags_consistent()
+
+
+@pytest.mark.parametrize('missing', ['none', 'old', 'new', 'both'])
+def test_tags_move(tagged, missing):
+    first, second, tags = tagged
+    if missing in ('old', 'both'):
+        drop_tag_stats(first)
+    if missing in ('new', 'both'):
+        drop_tag_stats(second)
+    post = Post.query.filter_by(course_id=first.id).order_by(Post.id).first()
+    old = CourseTagStats.snapshot(post)
+    post.course_id = second.id
+    post.tags = [tags[1], tags[2]]
+    CourseTagStats.post_changed(old, post)
+    db.session.commit()
+    assert_tags_consistent()
+
+
+@pytest.mark.parametrize('missing', [False, True])
+def test_tags_delete(tagged, missing):
+    first, second, tags = tagged
+    if missing:
+        drop_tag_stats(first)
+    post = Post.query.filter_by(course_id=first.id).order_by(Post.id).first()
+    db.session.delete(post)
+    CourseTagStats.post_removed(post)
+    db.session.commit()
+    assert_tags_consistent()
+
+
+def test_delete_tag_globally(tagged, monkeypatch):
+    from scripts.manage_tags import delete_tag_globally
+    first, second, tags = tagged
+    monkeypatch.setattr('builtins.input', lambda prompt: 'DELETE')
+    delete_tag_globally(tags[1].name)
+    assert_tags_consistent()
+    assert Tag.query.count() == 3
+
+
+def test_top_tags_on_course_page(make, client):
+    course = make.course()
+    tags = [make.tag(name=f'tag {name}') for name in 'abcdef']
+    # Usage counts 6, 5, 4, 4, 2, 1: the page shows the five most used, ties by name
+    usage = {'a': 4, 'b': 6, 'c': 1, 'd': 4, 'e': 2, 'f': 5}
+    for i in range(6):
+        make.post(make.user(), course, tags=[tag for tag in tags if usage[tag.name[-1]] > i])
+    db.session.commit()
+
+    html = client.get(f'/courses/course/{course.id}').get_data(as_text=True)
+    chips = re.findall(r'tag-chip-static[^"]*">([^<]+) &middot; (\d+)</span>', html)
+    assert chips == [('tag b', '6'), ('tag f', '5'), ('tag a', '4'), ('tag d', '4'), ('tag e', '2')]
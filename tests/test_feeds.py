@@ -0,0 +1,50 @@
+import pytest
+from flasknetwork import db
+from flasknetwork.models import Post
+from flasknetwork.main.utils import load_feed_page
+
+
+@pytest.fixture
+def reviews(make):
+    """Every one of 8 authors reviewed each of 6 courses, with two of 4 tags per review."""
+    tags = [make.tag() for _ in range(4)]
+    courses = [make.course() for _ in range(6)]
+    authors = [make.user() for _ in range(8)]
+    for i, (author, course) in enumerate((a, c) for a in authors for c in courses):
+        make.post(author, course, tags=[tags[i % 4], tags[(i + 1) % 4]],
+                  rating_professor=1 + i % 5, minutes_ago=i)
+    db.session.commit()
+    return courses[0].id, authors[0].id
+
+
+def render_card_fields(page):
+    """Touch everything a post card renders, as templates/components/post_card.html does."""
+    for post in page.items:
+        post.author.username, post.author.image_file, post.course.code, post.course.name
+        [(tag.name, tag.sentiment) for tag in post.tags]
+
+
+def statements_for_page(count_statements, query, sort_by, per_page, second_page=False):
+    cursor = None
+    if second_page:
+        cursor = load_feed_page(query(), sort_by, per_page=per_page).next_cursor
+    db.session.expunge_all()
+    with count_statements() as counter:
+        page = load_feed_page(query(), sort_by, cursor=cursor, per_page=per_page)
+        render_card_fields(page)
+    assert len(page.items) == per_page
+    return counter.count
+
+
+@pytest.mark.parametrize('feed', ['home', 'course', 'user'])
+@pytest.mark.parametrize('sort_by', ['newest', 'top', 'workload'])
+@pytest.mark.parametrize('second_page', [False, True])
+def test_statements_per_page_do_not_grow_with_page_size(reviews, count_statements, feed, sort_by, second_page):
+    course_id, user_id = reviews
+    query = {
+        'home': lambda: Post.query,
+        'course': lambda: Post.query.filter_by(course_id=course_id),
+        'user': lambda: Post.query.filter_by(user_id=user_id),
+    }[feed]
+    small, large = (statements_for_page(count_statements, query, sort_by, n, second_page) for n in (2, 3))
+    assert small == large == 2
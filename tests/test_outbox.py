@@ -0,0 +1,145 @@
+import smtplib
+import socketserver
+import threading
+from datetime import datetime, timedelta
+import pytest
+from flask_mail import Message
+from flasknetwork import db
+from flasknetwork.models import OutboxEmail
+from flasknetwork.outbox import enqueue, outbox_sender, SmtpConnection
+from scripts.outbox import StubSMTPHandler
+
+
+class CountingHandler(StubSMTPHandler):
+    """The scripts/outbox.py stub, counting the connections it accepts."""
+
+    connections = 0
+
+    def handle(self):
+        type(self).connections += 1
+        super().handle()
+
+
+@pytest.fixture
+def smtp(app, monkeypatch):
+    CountingHandler.connections = 0
+    CountingHandler.fail_rate = CountingHandler.reject_rate = 0.0
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), CountingHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for key, value in {'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': server.server_address[1],
+                       'MAIL_USE_TLS': False, 'MAIL_USE_SSL': False, 'MAIL_SUPPRESS_SEND': False,
+                       'MAIL_USERNAME': None, 'MAIL_PASSWORD': None, 'OUTBOX_BATCH_SIZE': 20,
+                       'OUTBOX_MAX_ATTEMPTS': 3}.items():
+        monkeypatch.setitem(app.config, key, value)
+    monkeypatch.setattr(outbox_sender, '_session_failures', 0)
+    yield CountingHandler
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def connection(app):
+    connection = SmtpConnection(app.config)
+    yield connection
+    connection.close()
+
+
+def queue(count):
+    for i in range(count):
+        enqueue(Message(f'Email {i}', sender='noreply@example.com', recipients=[f'user{i}@kth.se'], body='Hi'))
+    db.session.commit()
+
+
+def make_due():
+    db.session.execute(db.update(OutboxEmail).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def emails():
+    db.session.expire_all()
+    return OutboxEmail.query.order_by(OutboxEmail.id).all()
+
+
+def test_batches_share_one_connection(smtp, connection):
+    queue(3)
+    assert outbox_sender.process_batch(connection) == 3
+    queue(2)
+    assert outbox_sender.process_batch(connection) == 2
+    assert [email.status for email in emails()] == [OutboxEmail.SENT] * 5
+    assert smtp.connections == 1
+
+
+def test_temporary_failure_is_retried(smtp, connection):
+    smtp.fail_rate = 1.0
+    queue(1)
+    outbox_sender.process_batch(connection)
+    email, = emails()
+    assert (email.status, email.attempts) == (OutboxEmail.PENDING, 1)
+    assert '451' in email.last_error
+    assert email.next_attempt_at > datetime.utcnow()
+
+    smtp.fail_rate = 0.0
+    make_due()
+    outbox_sender.process_batch(connection)
+    email, = emails()
+    assert (email.status, email.attempts, email.last_error) == (OutboxEmail.SENT, 2, None)
+
+
+def test_rejected_email_is_dead_lettered(smtp, connection):
+    smtp.reject_rate = 1.0
+    queue(2)
+    outbox_sender.process_batch(connection)
+    assert [(email.status, email.attempts) for email in emails()] == [(OutboxEmail.DEAD, 1)] * 2
+
+
+def test_dead_lettered_after_max_attempts(smtp, connection):
+    smtp.fail_rate = 1.0
+    queue(1)
+    for _ in range(3):
+        make_due()
+        outbox_sender.process_batch(connection)
+    email, = emails()
+    assert (email.status, email.attempts) == (OutboxEmail.DEAD, 3)
+
+
+def refuse_login(self, user, password, **kwargs):
+    raise smtplib.SMTPAuthenticationError(535, b'5.7.8 Authentication credentials invalid')
+
+
+@pytest.mark.parametrize('failure', ['login', 'connect'])
+def test_session_failure_defers_the_batch(app, smtp, connection, monkeypatch, failure):
+    port = app.config['MAIL_PORT']
+    if failure == 'login':
+        monkeypatch.setitem(app.config, 'MAIL_USERNAME', 'app@example.com')
+        monkeypatch.setitem(app.config, 'MAIL_PASSWORD', 'wrong')
+        monkeypatch.setattr(smtplib.SMTP, 'login', refuse_login)
+    else:
+        # Nothing listens on the discard port
+        monkeypatch.setitem(app.config, 'MAIL_PORT', 9)
+    queue(4)
+
+    assert outbox_sender.process_batch(connection) == 4
+    first = emails()
+    assert [(email.status, email.attempts) for email in first] == [(OutboxEmail.PENDING, 0)] * 4
+    assert all(email.next_attempt_at > datetime.utcnow() for email in first)
+    # One session attempt for the whole batch, not one per email
+    assert smtp.connections == (1 if failure == 'login' else 0)
+
+    # Still failing: the sender backs off further, without using up attempts
+    first_delay = first[0].next_attempt_at - datetime.utcnow()
+    make_due()
+    outbox_sender.process_batch(connection)
+    second = emails()
+    assert [(email.status, email.attempts) for email in second] == [(OutboxEmail.PENDING, 0)] * 4
+    assert second[0].next_attempt_at - datetime.utcnow() > first_delay
+
+    # Fixed: everything goes out over one new connection
+    monkeypatch.setitem(app.config, 'MAIL_USERNAME', None)
+    monkeypatch.setitem(app.config, 'MAIL_PORT', port)
+    connections = smtp.connections
+    make_due()
+    outbox_sender.process_batch(connection)
+    assert [email.status for email in emails()] == [OutboxEmail.SENT] * 4
+    assert smtp.connections == connections + 1
@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+import pytest
+from flasknetwork import db
+from flasknetwork.models import Post
+from flasknetwork.main.utils import encode_cursor, decode_cursor, paginate_posts
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def test_cursor_round_trip():
+    key = (12, datetime(2024, 5, 1, 12, 30), 7)
+    assert decode_cursor(encode_cursor('top', key, 'prev'), 'top') == (key, 'prev')
+
+
+@pytest.mark.parametrize('payload', [
+    {'s': 'top', 'k': [{'a': 1}, '2020-01-01', 1], 'd': 'next'},
+    {'s': 'top', 'k': ['12', '2020-01-01', 1], 'd': 'next'},
+    {'s': 'top', 'k': [True, '2020-01-01', 1], 'd': 'next'},
+    {'s': 'top', 'k': [1.5, '2020-01-01', 1], 'd': 'next'},
+    {'s': 'top', 'k': ['2020-01-01', 1], 'd': 'next'},
+    {'s': 'top', 'k': {'a': 1, 'b': 2, 'c': 3}, 'd': 'next'},
+    {'s': 'top', 'k': [12, 'yesterday', 1], 'd': 'next'},
+    {'s': 'top', 'k': [12, '2020-01-01', [1]], 'd': 'next'},
+    {'s': 'newest', 'k': ['2020-01-01', 1], 'd': 'next'},
+    {'s': 'top', 'k': [12, '2020-01-01', 1], 'd': 'sideways'},
+])
+def test_tampered_cursor_is_rejected(payload):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor(payload), 'top')
+
+
+def test_tampered_cursor_falls_back_to_first_page(make, client):
+    course = make.course()
+    for i in range(3):
+        make.post(make.user(), course, minutes_ago=i)
+    db.session.commit()
+    cursor = raw_cursor({'s': 'top', 'k': [{'a': 1}, '2020-01-01', 1], 'd': 'next'})
+    response = client.get(f'/home?sort=top&cursor={cursor}')
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('sort_by', ['newest', 'top', 'workload'])
+def test_pages_cover_every_post_once(make, sort_by):
+    course = make.course()
+    for i in range(7):
+        make.post(make.user(), course, rating_professor=1 + i % 5, minutes_ago=i % 3)
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = paginate_posts(Post.query, sort_by, cursor, per_page=3)
+        seen.extend(post.id for post in page.items)
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert sorted(seen) == sorted(post.id for post in Post.query)
+
+    back = paginate_posts(Post.query, sort_by, page.prev_cursor, per_page=3)
+    assert [post.id for post in back.items] == seen[-len(page.items) - 3:-len(page.items)]
+
+
+def test_user_page_counts_only_on_first_page(make, client, count_statements):
+    author = make.user()
+    for i in range(7):
+        make.post(author, make.course(), minutes_ago=i)
+    db.session.commit()
+
+    first = client.get(f'/user/{author.username}')
+    assert f'Reviews by {author.username} (7)' in first.get_data(as_text=True)
+
+    page = paginate_posts(Post.query.filter_by(author=author), 'newest', per_page=5)
+    with count_statements() as counter:
+        second = client.get(f'/user/{author.username}?cursor={page.next_cursor}')
+    assert second.status_code == 200
+    assert f'Reviews by {author.username}' in second.get_data(as_text=True)
+    assert '(7)' not in second.get_data(as_text=True)
+    assert not [s for s in counter.statements if 'count(' in s.lower()]
@@ -0,0 +1,21 @@
+from flasknetwork import db
+from flasknetwork.models import TagSentiment
+from flasknetwork.main.fragments import post_card_cache
+
+
+def test_tag_changes_change_the_card(app, make, client):
+    tag = make.tag(name='Friendly TAs')
+    course = make.course()
+    make.post(make.user(), course, tags=[tag])
+    db.session.commit()
+
+    assert 'Friendly TAs' in client.get('/').get_data(as_text=True)
+    hits = post_card_cache.stats.hits
+    client.get('/')
+    assert post_card_cache.stats.hits == hits + 1
+
+    # Renamed and flipped without touching the post, as a direct database edit would
+    tag.name, tag.sentiment = 'Unfriendly TAs', TagSentiment.negative
+    db.session.commit()
+    html = client.get('/').get_data(as_text=True)
+    assert 'Unfriendly TAs' in html
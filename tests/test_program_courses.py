@@ -0,0 +1,86 @@
+import re
+import pytest
+from flasknetwork import db
+from flasknetwork.models import Course_Program, CacheVersion
+from flasknetwork.courses.catalog import CATALOG_VERSION
+from flasknetwork.courses.programs import program_courses
+
+
+def course_select(html):
+    """[(optgroup label, [(course id, selected)])] of the course field."""
+    select = re.search(r'<select[^>]*name="course"[^>]*>(.*?)</select>', html, re.S).group(1)
+    return [(label, [(int(value), bool(selected))
+                     for value, selected in re.findall(r'<option value="(\d+)"( selected)?>', options)])
+            for label, options in re.findall(r'<optgroup label="([^"]*)">(.*?)</optgroup>', select, re.S)]
+
+
+@pytest.fixture
+def program(make, login):
+    """A logged-in user whose program offers three courses; they reviewed the second."""
+    program = make.program()
+    user = make.user(program=program)
+    names = ['Algebra', 'Databases & <Systems>', 'Compilers']
+    courses = [make.course(programs=[program], name=name) for name in names]
+    post = make.post(user, courses[1])
+    db.session.commit()
+    login(user)
+    # Sorted by name: Algebra, Compilers, Databases
+    return program.id, [courses[0].id, courses[2].id, courses[1].id], post.id
+
+
+def test_new_review_form(client, program):
+    program_id, (algebra, compilers, databases), _ = program
+    html = client.get('/post/new').get_data(as_text=True)
+    assert course_select(html) == [
+        ('Courses to Review', [(algebra, False), (compilers, False)]),
+        ('Already Reviewed Courses', [(databases, False)]),
+    ]
+    assert 'Databases &amp; &lt;Systems&gt;' in html
+
+    html = client.get(f'/post/new?course_id={compilers}').get_data(as_text=True)
+    assert course_select(html) == [
+        ('Courses to Review', [(algebra, False), (compilers, True)]),
+        ('Already Reviewed Courses', [(databases, False)]),
+    ]
+
+
+def test_edit_form_selects_the_reviewed_course(client, program):
+    program_id, (algebra, compilers, databases), post_id = program
+    html = client.get(f'/post/{post_id}/update').get_data(as_text=True)
+    assert course_select(html) == [
+        ('Courses to Review', [(algebra, False), (compilers, False)]),
+        ('Already Reviewed Courses', [(databases, True)]),
+    ]
+
+
+def test_shared_block_when_nothing_is_reviewed(make):
+    program = make.program()
+    ids = [make.course(programs=[program], name=name).id for name in ('B', 'A')]
+    db.session.commit()
+    courses = program_courses.get(program.id)
+    unreviewed, reviewed = courses.partition(set())
+    assert (unreviewed, reviewed) == (courses.choices, [])
+    plain = courses.render_options([('All', unreviewed)])
+    assert plain.count(' selected') == 0
+    assert courses.render_options([('All', unreviewed)], selected=ids[0]).count(' selected') == 1
+    # The shared block itself is never marked
+    assert courses.render_options([('All', unreviewed)]) == plain
+
+
+def test_catalog_version_bump_reloads_the_program(app, make, client, program, monkeypatch):
+    program_id, ids, _ = program
+    client.get('/post/new')
+    added = make.course(name='Zoology').id
+    db.session.add(Course_Program(course_id=added, program_id=program_id))
+    db.session.commit()
+    monkeypatch.setitem(app.config, 'COURSE_CATALOG_CHECK_INTERVAL', 0)
+
+    # Without a version bump the cached entry is kept
+    html = client.get('/post/new').get_data(as_text=True)
+    assert added not in [value for _, options in course_select(html) for value, _ in options]
+
+    CacheVersion.bump(CATALOG_VERSION)
+    db.session.commit()
+    html = client.get('/post/new').get_data(as_text=True)
+    assert course_select(html)[0][1][-1] == (added, False)
+    assert program_courses.get(program_id).version == CacheVersion.get(CATALOG_VERSION)
@@ -0,0 +1,82 @@
+from collections import Counter
+import pytest
+from sqlalchemy import event
+from flasknetwork import db
+from flasknetwork.models import Post, Course_Program
+
+
+class RowLoads:
+    """Counts ORM instances loaded from rows, per mapped class."""
+
+    classes = (Post, Course_Program)
+
+    def __init__(self):
+        self.loaded = Counter()
+
+    def _record(self, target, context):
+        self.loaded[type(target).__name__] += 1
+
+    def __enter__(self):
+        for cls in self.classes:
+            event.listen(cls, 'load', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        for cls in self.classes:
+            event.remove(cls, 'load', self._record)
+
+
+@pytest.fixture
+def course(make):
+    """A course of the default program with 40 reviews from other users."""
+    program = make.program()
+    course = make.course(programs=[program])
+    for i in range(40):
+        make.post(make.user(program=program), course, minutes_ago=i)
+    db.session.commit()
+    return course
+
+
+def exists_statements(counter):
+    return [statement for statement in counter.statements if 'EXISTS' in statement.upper()]
+
+
+@pytest.mark.parametrize('viewer, expected_exists', [
+    ('eligible', 2),      # reviewed? no; in program? yes
+    ('reviewer', 1),      # reviewed? yes, which settles all three checks
+    ('other_program', 2),
+])
+def test_course_page_eligibility_checks(make, client, login, count_statements, course, viewer, expected_exists):
+    course_program = Course_Program.query.filter_by(course_id=course.id).first().program
+    if viewer == 'reviewer':
+        user = Post.query.filter_by(course_id=course.id).first().author
+    else:
+        user = make.user(program=course_program if viewer == 'eligible' else make.program())
+    db.session.commit()
+    login(user)
+    course_id = course.id
+    db.session.expunge_all()
+
+    with count_statements() as counter, RowLoads() as rows:
+        response = client.get(f'/courses/course/{course_id}')
+    assert response.status_code == 200
+    assert len(exists_statements(counter)) == expected_exists
+    # Only the page of reviews (5, plus one to detect a next page) is loaded,
+    # never the course's other reviews or its program links
+    assert rows.loaded['Post'] == 6
+    assert rows.loaded['Course_Program'] == 0
+
+
+def test_checks_are_memoized_per_request(app, make, count_statements, course):
+    user = make.user(program=make.program())
+    db.session.commit()
+    # Reload the expired attributes outside the counted block
+    user.email_verified, user.program_id, course.id
+
+    with app.test_request_context(), count_statements() as counter, RowLoads() as rows:
+        for _ in range(3):
+            user.can_review(course)
+            course.is_reviewed_by(user)
+            course.course_is_available_for_program(user.program_id)
+    assert counter.count == len(exists_statements(counter)) == 2
+    assert not rows.loaded
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from flasknetwork import db
+from flasknetwork.models import User
+from flasknetwork.sqlstats import sql_stats, QueryBudgetExceeded
+
+
+@pytest.fixture
+def strict(monkeypatch):
+    monkeypatch.setattr(sql_stats, 'strict', True)
+    monkeypatch.setattr(sql_stats, 'n_plus_one_threshold', 5)
+    return lambda budgets: monkeypatch.setattr(sql_stats, 'budgets', budgets)
+
+
+def load_users_one_by_one(ids):
+    for user_id in ids:
+        db.session.execute(select(User).where(User.id == user_id)).all()
+
+
+def test_repeated_statement_is_reported_as_n_plus_one(app, make, caplog):
+    ids = [make.user().id for _ in range(5)]
+    db.session.commit()
+    with app.test_request_context('/'):
+        load_users_one_by_one(ids)
+        app.process_response(app.response_class())
+    assert sql_stats.report()['GET main.home']['n_plus_one'] == 1
+    assert 'Possible N+1 on GET main.home: 5 executions (5 distinct parameter sets)' in caplog.text
+    assert 'from no template' in caplog.text
+
+
+def test_strict_mode_fails_a_request_over_budget(app, make, strict):
+    ids = [make.user().id for _ in range(5)]
+    db.session.commit()
+    strict({'main.home': 4})
+    with app.test_request_context('/'):
+        load_users_one_by_one(ids)
+        with pytest.raises(QueryBudgetExceeded, match='GET main.home issued 5 SQL statements'):
+            app.process_response(app.response_class())
+
+    with app.test_request_context('/'):
+        load_users_one_by_one(ids[:4])
+        app.process_response(app.response_class())
+
+
+def test_strict_mode_on_a_feed(make, client, strict):
+    def add_reviews(count):
+        course = make.course()
+        for i in range(count):
+            make.post(make.user(), course, tags=[make.tag()], minutes_ago=i)
+        db.session.commit()
+
+    add_reviews(1)
+    strict({})
+    client.get('/')
+    budget = sql_stats.report()['GET main.home']['max_statements']
+
+    strict({'main.home': budget - 1})
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/')
+    # The eager-loaded feed stays in budget however many cards it shows
+    add_reviews(4)
+    strict({'main.home': budget})
+    assert client.get('/').status_code == 200
+
+
+def test_failed_statement_leaves_no_start_time(app):
+    with app.test_request_context('/'):
+        started = db.session.connection().info.setdefault('sql_stats_started', {})
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        assert not started
+        db.session.rollback()
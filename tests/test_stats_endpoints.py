@@ -0,0 +1,24 @@
+import pytest
+from conftest import STATS_TOKEN
+
+
+@pytest.fixture(params=['/internal/cache-stats', '/internal/sql-stats'])
+def endpoint(request):
+    return request.param
+
+
+def test_stats_need_the_bearer_token(client, endpoint):
+    response = client.get(endpoint, headers={'Authorization': f'Bearer {STATS_TOKEN}'})
+    assert response.status_code == 200
+    assert response.is_json
+
+
+@pytest.mark.parametrize('query, headers', [
+    ('', {}),
+    ('', {'Authorization': 'Bearer wrong'}),
+    ('', {'Authorization': STATS_TOKEN}),
+    # The query string ends up in access logs, so it never authenticates
+    (f'?token={STATS_TOKEN}', {}),
+])
+def test_stats_are_hidden_without_it(client, endpoint, query, headers):
+    assert client.get(endpoint + query, headers=headers).status_code == 404
@@ -0,0 +1,138 @@
+import re
+import pytest
+from sqlalchemy import text
+from flasknetwork import db
+from flasknetwork.models import Post, Tag, CacheVersion, CourseTagStats, post_tags
+from flasknetwork.posts.tags import tag_registry, TAG_VERSION
+
+
+def tag_queries(counter):
+    return [statement for statement in counter.statements if re.search(r'\bfrom tag\b', statement.lower())]
+
+
+def review_form(course, tags=(), **fields):
+    return {'course': course.id, 'year_taken': 2024, 'rating_professor': 4, 'rating_material': 3,
+            'rating_workload': 'medium', 'rating_peers': 5, 'content': 'Good course.',
+            'tags': [tag.id if isinstance(tag, Tag) else tag for tag in tags], **fields}
+
+
+@pytest.fixture
+def reviewer(make, login):
+    """
+    A logged-in user whose program offers two courses, and three tags. Another user reviewed
+    both courses with every tag, so the course rollups already have their rows.
+    """
+    program = make.program()
+    user, other = make.user(program=program), make.user(program=program)
+    courses = [make.course(programs=[program]) for _ in range(2)]
+    tags = [make.tag() for _ in range(3)]
+    for course in courses:
+        make.post(other, course, tags=tags)
+    db.session.commit()
+    login(user)
+    return user, courses, tags
+
+
+@pytest.fixture
+def foreign_keys():
+    """Enforce foreign keys on the test database, as PostgreSQL does."""
+    db.session.execute(text('PRAGMA foreign_keys=ON'))
+    yield
+    db.session.rollback()
+    db.session.execute(text('PRAGMA foreign_keys=OFF'))
+
+
+def delete_in_other_worker(tag):
+    """Delete a tag the way scripts/manage_tags.py does, leaving this worker's snapshot stale."""
+    tag_id = tag.id
+    db.session.execute(db.delete(post_tags).where(post_tags.c.tag_id == tag_id))
+    db.session.execute(db.delete(CourseTagStats).where(CourseTagStats.tag_id == tag_id))
+    db.session.execute(db.delete(Tag).where(Tag.id == tag_id))
+    CacheVersion.bump(TAG_VERSION)
+    db.session.commit()
+    return tag_id
+
+
+def test_form_and_save_run_no_tag_queries(client, count_statements, reviewer):
+    user, courses, tags = reviewer
+    tag_ids = [tag.id for tag in tags]
+    form = review_form(courses[0], tag_ids[:2])
+    client.get('/post/new')
+
+    with count_statements() as counter:
+        form_page = client.get('/post/new')
+        saved = client.post('/post/new', data=form)
+    assert all(tag.name in form_page.get_data(as_text=True) for tag in tags)
+    assert saved.status_code == 302
+    assert not tag_queries(counter)
+    post = Post.query.filter_by(user_id=user.id).one()
+    assert sorted(tag.id for tag in post.tags) == tag_ids[:2]
+
+    post_id = post.id
+    form = review_form(courses[0], tag_ids[2:])
+    with count_statements() as counter:
+        client.get(f'/post/{post_id}/update')
+        client.post(f'/post/{post_id}/update', data=form)
+    assert not tag_queries(counter)
+    db.session.expire_all()
+    assert [tag.id for tag in db.session.get(Post, post_id).tags] == tag_ids[2:]
+
+
+def test_version_bump_refreshes_the_snapshot(app, make, monkeypatch):
+    make.tag(name='old')
+    db.session.commit()
+    assert [name for _, name in tag_registry.choices()] == ['old']
+
+    make.tag(name='new')
+    CacheVersion.bump(TAG_VERSION)
+    db.session.commit()
+    monkeypatch.setitem(app.config, 'TAG_REGISTRY_CHECK_INTERVAL', 3600)
+    assert [name for _, name in tag_registry.choices()] == ['old']
+    monkeypatch.setitem(app.config, 'TAG_REGISTRY_CHECK_INTERVAL', 0)
+    assert [name for _, name in tag_registry.choices()] == ['new', 'old']
+
+
+def test_resolve_skips_unknown_ids(make):
+    tag = make.tag()
+    db.session.commit()
+    assert [t.id for t in tag_registry.resolve([tag.id, tag.id, 9999])] == [tag.id]
+
+
+def test_deleted_tag_on_a_new_review(client, foreign_keys, reviewer):
+    user, courses, tags = reviewer
+    kept_id = tags[1].id
+    client.get('/post/new')
+    deleted_id = delete_in_other_worker(tags[0])
+
+    response = client.post('/post/new', data=review_form(courses[0], [deleted_id, kept_id]))
+    assert response.status_code == 200
+    assert 'A tag you selected no longer exists' in response.get_data(as_text=True)
+    assert Post.query.filter_by(user_id=user.id).count() == 0
+    assert deleted_id not in dict(tag_registry.choices())
+
+    response = client.post('/post/new', data=review_form(courses[0], [kept_id]))
+    assert response.status_code == 302
+    post = Post.query.filter_by(user_id=user.id).one()
+    assert [tag.id for tag in post.tags] == [kept_id]
+    # The failed attempt left no trace in the rollups
+    assert db.session.get(CourseTagStats, (courses[0].id, kept_id)).post_count == 2
+    assert db.session.get(Tag, kept_id).post_count == 3
+
+
+def test_deleted_tag_on_an_edited_review(make, client, foreign_keys, reviewer):
+    user, courses, tags = reviewer
+    post = make.post(user, courses[0], tags=[tags[1]])
+    db.session.commit()
+    post_id, kept_id = post.id, tags[1].id
+    client.get(f'/post/{post_id}/update')
+    deleted_id = delete_in_other_worker(tags[0])
+
+    response = client.post(f'/post/{post_id}/update',
+                           data=review_form(courses[1], [deleted_id], content='Changed.'))
+    assert response.status_code == 200
+    assert 'A tag you selected no longer exists' in response.get_data(as_text=True)
+    db.session.expire_all()
+    post = db.session.get(Post, post_id)
+    # Nothing of the edit was saved
+    assert (post.course_id, post.content, [tag.id for tag in post.tags]) == \
+        (courses[0].id, 'A review of the course.', [kept_id])
@@ -0,0 +1,28 @@
+import pytest
+from conftest import STATS_TOKEN
+from flasknetwork.timing import request_timing
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    {'Authorization': 'Bearer wrong'},
+    {'X-Profile-Token': 'wrong'},
+])
+def test_no_server_timing_without_the_stats_token(client, headers):
+    response = client.get('/home', headers=headers)
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response.headers
+
+
+@pytest.mark.parametrize('headers', [
+    {'Authorization': f'Bearer {STATS_TOKEN}'},
+    {'X-Profile-Token': STATS_TOKEN},
+])
+def test_server_timing_for_the_stats_token(client, headers):
+    timing = client.get('/home', headers=headers).headers['Server-Timing']
+    assert 'app;dur=' in timing and 'total;dur=' in timing
+
+
+def test_server_timing_for_everyone_when_enabled(client, monkeypatch):
+    monkeypatch.setattr(request_timing, 'server_timing', True)
+    assert 'total;dur=' in client.get('/home').headers['Server-Timing']